@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Callable, Iterator, Union, Optional, List, Type
+import os
+import hashlib
+import re
 import logging
 import datetime
 from enum import Enum
@@ -13,13 +16,40 @@ try:
 except:  # fake out sphinx and autodoc which are loading the module directly and losing the namespace
     __package__ = "s100py"
 
-from .s1xx import s1xx_sequence, S1xxAttributesBase, S1xxDatasetBase, S1XXFile, h5py_string_dtype, is_sub_class
+from .s1xx import s1xx_sequence, s1xx_sequence_types, S1xxAttributesBase, S1xxDatasetBase, S1xxGridsBase, S1XXFile, h5py_string_dtype, is_sub_class, \
+    swmr_status_dataset, LazyGridField
+
+try:
+    from scipy.spatial import Delaunay, cKDTree
+except ImportError:  # only needed to build a BarycentricRegridder or KDTreeIndex
+    Delaunay = cKDTree = None
+
+
+TIME_SERIES_SUFFIX = ".timeseries.h5"  #: added to a file name to make the name of its time-major index sidecar
+REGRID_WEIGHTS_SUFFIX = ".weights.h5"  #: added to a model index file name to make the name of its regridding weights sidecar
+VALUES_CUBE = "valuesCube"  #: name of the (time, ...) virtual dataset :any:`build_virtual_time_cube` adds to each feature instance, not in the S100 spec
 
 
 class S100Exception(Exception):
     pass
 
 
+def file_stamp(path: str) -> tuple:
+    """ Returns the (modification time in nanoseconds, size in bytes) of a file.
+    Sidecars (i.e. time series indexes and overviews) store the stamp of the file they were made from
+    and are ignored once the file is rewritten, even with the same shape.
+    """
+    stats = os.stat(path)
+    return stats.st_mtime_ns, stats.st_size
+
+
+def matches_file_stamp(attrs, path: str) -> bool:
+    """ True if a sidecar's "sourceStamp" attribute (see :any:`file_stamp`) matches the file at path as it is now """
+    if path is None or "sourceStamp" not in attrs or not os.path.exists(path):
+        return False
+    return tuple(int(val) for val in attrs["sourceStamp"]) == file_stamp(path)
+
+
 H5T_CLASS_T = {
     h5py.h5t.NO_CLASS: 'H5T_NO_CLASS',
     h5py.h5t.INTEGER: 'H5T_INTEGER',
@@ -110,6 +140,7 @@ DATA_CODING_FORMAT = Enum(value="DATA_CODING_FORMAT",
                               ('Irregular grid', 5),
                               ('Variable cell size', 6),
                               ('TIN', 7),
+                              ('Time series at fixed stations (stationwise)', 8),
                               # alternate shortcut names that also show up in sphinx, these will be stored with full names including spaces
                               ('TIME', 1),
                               ('REGULAR', 2),
@@ -117,6 +148,7 @@ DATA_CODING_FORMAT = Enum(value="DATA_CODING_FORMAT",
                               ('MOVING', 4),
                               ('IRREGULAR', 5),
                               ('VARIABLE', 6),
+                              ('STATIONWISE', 8),
                           ]
                           )
 """
@@ -129,6 +161,7 @@ Sphinx is not interpreting the enum names properly when there are spaces. The co
   ('Irregular grid', 5),
   ('Variable cell size', 6),
   ('TIN', 7),
+  ('Time series at fixed stations (stationwise)', 8),
 """
 
 
@@ -623,6 +656,7 @@ class VertexPoint(S1xxAttributesBase):
 class FeatureInstanceBase(GeographicBoundingBox):
     """ The feature instance group attributes from table 10c-12 in S100 spec
     """
+    _ignored_hdf5_keys = (VALUES_CUBE,)
 
     vertical_extent_minimum_z_attribute_name = "verticalExtent.minimumZ"
     vertical_extent_maximum_z_attribute_name = "verticalExtent.maximumZ"
@@ -993,6 +1027,214 @@ class StartSequence:
         self.start_sequence = self.start_sequence_type()
 
 
+def _cache_put(cache: dict, key, value, size: int):
+    """ Adds (or refreshes) key in a dict used as a least recently used cache of at most size items """
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > size:
+        del cache[next(iter(cache))]
+
+
+class KDTreeIndex:
+    """ A 2D KD-tree (scipy.spatial.cKDTree) of node positions (e.g. the geometryValues of a Data Coding Format 3 grid)
+    for nearest node, k nearest nodes and bounding box queries that don't scan every node.
+
+    Trees are only cached in memory, keyed by a hash of the positions, so every file sharing the same mesh reuses one tree.
+    Building one takes milliseconds so they are not stored on disk.
+    """
+    _memory_cache = {}
+    memory_cache_size = 8  #: number of trees kept in the memory cache, the oldest is dropped first
+
+    def __init__(self, tree, content_hash: str = ""):
+        self.tree = tree  #: the scipy.spatial.cKDTree of the (x, y) positions
+        self.content_hash = content_hash
+
+    @staticmethod
+    def hash_positions(x, y) -> str:
+        """ Returns a hash of the node positions, used to match a cached tree to the nodes """
+        digest = hashlib.sha1()
+        for coords in (x, y):
+            digest.update(numpy.ascontiguousarray(coords, dtype=numpy.float64).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, x, y, leaf_size: int = 16):
+        """ Builds a tree from arrays of x (longitude) and y (latitude) of the nodes """
+        if cKDTree is None:
+            raise S100Exception("scipy is required to build a KDTreeIndex")
+        positions = numpy.column_stack([numpy.asarray(x, dtype=numpy.float64).ravel(), numpy.asarray(y, dtype=numpy.float64).ravel()])
+        return cls(cKDTree(positions, leafsize=leaf_size), cls.hash_positions(x, y))
+
+    @classmethod
+    def from_positions(cls, x, y, leaf_size: int = 16):
+        """ Gets the tree for the node positions from the memory cache or builds it.
+
+        Parameters
+        ----------
+        x
+            x or longitude of the nodes
+        y
+            y or latitude of the nodes
+        leaf_size
+            maximum number of nodes in the leaves of a newly built tree
+
+        Returns
+        -------
+        KDTreeIndex
+        """
+        content_hash = cls.hash_positions(x, y)
+        tree = cls._memory_cache.get(content_hash)
+        if tree is None:
+            tree = cls.build(x, y, leaf_size)
+        _cache_put(cls._memory_cache, content_hash, tree, cls.memory_cache_size)
+        return tree
+
+    def __len__(self):
+        return self.tree.n
+
+    def query(self, points, k: int = 1) -> tuple:
+        """ Finds the k nearest nodes to each point.
+
+        Parameters
+        ----------
+        points
+            sequence of (x, y) positions
+        k
+            number of neighbors to find
+
+        Returns
+        -------
+        (numpy.ndarray, numpy.ndarray)
+            distances and node numbers, shaped (number of points,) if k is 1 otherwise (number of points, k),
+            nearest first.  Node numbers are -1 if there are less than k nodes.
+        """
+        points = numpy.atleast_2d(numpy.asarray(points, dtype=numpy.float64))[:, :2]
+        distances, nodes = self.tree.query(points, k)
+        nodes = numpy.where(nodes >= len(self), -1, nodes).astype(numpy.int64)  # cKDTree marks missing neighbors with n
+        return distances, nodes
+
+    def query_bbox(self, bbox) -> numpy.ndarray:
+        """ Finds the nodes inside (or on the edge of) a bounding box of (min_x, min_y, max_x, max_y), returned as sorted node numbers """
+        low = numpy.array(bbox[:2], dtype=numpy.float64)
+        high = numpy.array(bbox[2:], dtype=numpy.float64)
+        # the square around the box center that covers the box (max norm), then trim to the box
+        candidates = numpy.array(self.tree.query_ball_point((low + high) / 2, (high - low).max() / 2, p=numpy.inf), dtype=numpy.int64)
+        pts = self.tree.data[candidates]
+        inside = numpy.all((pts >= low) & (pts <= high), axis=1)
+        return numpy.sort(candidates[inside])
+
+
+class BarycentricRegridder:
+    """ Linear interpolation from scattered source nodes (i.e. a native model mesh) onto fixed target points (i.e. a regular grid)
+    with the triangulation and weights computed once.
+
+    The source nodes are Delaunay triangulated and each target point stores the three nodes of the triangle it falls in
+    and its barycentric weights, which gives the same results as scipy.interpolate.griddata(method='linear').
+    Regridding a time step is then a sparse matrix-vector product (three weights per target point) instead of a new
+    triangulation and point location.  The weights are cached in memory and optionally in an
+    HDF5 file keyed by a hash of the source and target positions.
+    """
+    _memory_cache = {}
+    memory_cache_size = 4  #: number of regridders kept in the memory cache, the oldest is dropped first
+
+    def __init__(self, nodes, weights, target_shape, content_hash: str = ""):
+        self.nodes = nodes  #: (number of targets, 3) source node numbers of the triangle each target is in
+        self.weights = weights  #: (number of targets, 3) barycentric weights, NaN for targets outside the triangulation
+        self.target_shape = tuple(target_shape)
+        self.content_hash = content_hash
+
+    @staticmethod
+    def hash_positions(source_x, source_y, target_x, target_y) -> str:
+        """ Returns a hash of the source and target positions, used to match cached weights to the geometry """
+        digest = hashlib.sha1()
+        for coords in (source_x, source_y, target_x, target_y):
+            coords = numpy.ascontiguousarray(coords, dtype=numpy.float64)
+            digest.update(str(coords.shape).encode())
+            digest.update(coords.tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, source_x, source_y, target_x, target_y):
+        """ Triangulates the source nodes and computes the weights of the target points, which can be any (matching) shape """
+        if Delaunay is None:
+            raise S100Exception("scipy is required to build a BarycentricRegridder")
+        source = numpy.column_stack([numpy.asarray(source_x, dtype=numpy.float64).ravel(), numpy.asarray(source_y, dtype=numpy.float64).ravel()])
+        target = numpy.column_stack([numpy.asarray(target_x, dtype=numpy.float64).ravel(), numpy.asarray(target_y, dtype=numpy.float64).ravel()])
+        triangulation = Delaunay(source)
+        simplex = triangulation.find_simplex(target)
+        inside = simplex >= 0
+        transform = triangulation.transform[simplex[inside]]
+        partial = numpy.einsum('ijk,ik->ij', transform[:, :2], target[inside] - transform[:, 2])
+
+        nodes = numpy.zeros((len(target), 3), dtype=numpy.int64)
+        weights = numpy.full((len(target), 3), numpy.nan)
+        nodes[inside] = triangulation.simplices[simplex[inside]]
+        weights[inside] = numpy.column_stack([partial, 1 - partial.sum(axis=1)])
+        return cls(nodes, weights, numpy.shape(target_x), cls.hash_positions(source_x, source_y, target_x, target_y))
+
+    @classmethod
+    def from_positions(cls, source_x, source_y, target_x, target_y, cache_file: str = None):
+        """ Gets the weights from the memory cache, then the cache_file, or builds them (and stores them in the cache_file).
+
+        Parameters
+        ----------
+        source_x
+            x or longitude of the source nodes
+        source_y
+            y or latitude of the source nodes
+        target_x
+            x or longitude of the target points, i.e. from numpy.meshgrid of a regular grid
+        target_y
+            y or latitude of the target points, the same shape as target_x
+        cache_file
+            optional HDF5 sidecar path, weights are stored in it in groups named by the hash of the positions
+
+        Returns
+        -------
+        BarycentricRegridder
+        """
+        content_hash = cls.hash_positions(source_x, source_y, target_x, target_y)
+        regridder = cls._memory_cache.get(content_hash)
+        if regridder is None and cache_file is not None and os.path.exists(cache_file):
+            with h5py.File(cache_file, "r") as cache:
+                if content_hash in cache:
+                    group = cache[content_hash]
+                    regridder = cls(group["nodes"][()], group["weights"][()], group.attrs["targetShape"], content_hash)
+        if regridder is None:
+            regridder = cls.build(source_x, source_y, target_x, target_y)
+            if cache_file is not None:
+                regridder.save(cache_file)
+        _cache_put(cls._memory_cache, content_hash, regridder, cls.memory_cache_size)
+        return regridder
+
+    def save(self, cache_file: str):
+        """ Stores the weights in an HDF5 file in a group named by their content hash """
+        with h5py.File(cache_file, "a") as cache:
+            if self.content_hash in cache:
+                del cache[self.content_hash]
+            group = cache.create_group(self.content_hash)
+            group.attrs["targetShape"] = self.target_shape
+            group.create_dataset("nodes", data=self.nodes, chunks=True, compression='gzip', compression_opts=9)
+            group.create_dataset("weights", data=self.weights, chunks=True, compression='gzip', compression_opts=9)
+
+    def regrid(self, values) -> numpy.ndarray:
+        """ Interpolates values at the source nodes onto the target points.
+
+        Parameters
+        ----------
+        values
+            one value per source node, masked or NaN values make the targets in triangles touching them NaN
+
+        Returns
+        -------
+        numpy.ndarray
+            float64 array shaped like the target points, NaN outside the triangulation
+        """
+        values = numpy.ma.filled(numpy.ma.asarray(values, dtype=numpy.float64), numpy.nan).ravel()
+        result = (values[self.nodes] * self.weights).sum(axis=1)
+        return result.reshape(self.target_shape)
+
+
 class FeatureInstanceDCF2(StartSequence, GridSpacing, GridOrigin, FeatureInstanceBase):
     """ Data Coding Format 2 is the grid format from table 10c-12 in S100 spec.  Used in S102 for example.
     """
@@ -1058,6 +1300,490 @@ class FeatureInstanceDCF2(StartSequence, GridSpacing, GridOrigin, FeatureInstanc
         # pylint: disable=attribute-defined-outside-init
         self.num_points_vertical = self.num_points_vertical_type()
 
+    def get_window_slices(self, bbox) -> tuple:
+        """ Finds the rows and columns of the grid nodes that are inside a bounding box.
+
+        Parameters
+        ----------
+        bbox
+            (min_x, min_y, max_x, max_y) in the same coordinates as the grid origin and spacing,
+            i.e. longitude/latitude for geographic grids or easting/northing for projected grids (like S102)
+
+        Returns
+        -------
+        (slice, slice)
+            row (latitude) and column (longitude) slices of the nodes inside the box, the slices are empty if nothing is inside
+        """
+        min_x, min_y, max_x, max_y = bbox
+        rows = self._nodes_between(min_y, max_y, self.grid_origin_latitude, self.grid_spacing_latitudinal, self.num_points_latitudinal)
+        cols = self._nodes_between(min_x, max_x, self.grid_origin_longitude, self.grid_spacing_longitudinal, self.num_points_longitudinal)
+        return rows, cols
+
+    @staticmethod
+    def _nodes_between(low, high, origin, spacing, num_points):
+        # allow a tiny tolerance so nodes exactly on the box edge are included despite floating point error
+        tolerance = 1e-9
+        first, last = sorted(((low - origin) / spacing, (high - origin) / spacing))
+        start = max(int(numpy.ceil(first - tolerance)), 0)
+        stop = min(int(numpy.floor(last + tolerance)) + 1, num_points)
+        return slice(start, max(start, stop))
+
+    def get_grids(self) -> list:
+        """ Returns the 'values' grids (S1xxGridsBase) of each Group_NNN in this instance, in order (i.e. by time for S104/S111) """
+        grids = []
+        for group_attrib in self.get_standard_list_properties().values():
+            for grp in self.__getattribute__(group_attrib):
+                for val in grp._attributes.values():
+                    if isinstance(val, S1xxGridsBase):
+                        grids.append(val)
+        return grids
+
+    def _get_groups(self) -> list:
+        return [grp for group_attrib in self.get_standard_list_properties().values() for grp in self.__getattribute__(group_attrib)]
+
+    @staticmethod
+    def _format_time_point(time_point):
+        if isinstance(time_point, datetime.datetime):
+            time_point = time_point.strftime('%Y%m%dT%H%M%SZ')
+        return None if time_point is None else str(time_point)
+
+    def _update_time_records(self, completed_groups):
+        """ Sets numGRP and the first/last record times from the groups that are complete so far """
+        self.num_grp = len(completed_groups)
+        if completed_groups:
+            first = self._format_time_point(getattr(completed_groups[0], "time_point", None))
+            last = self._format_time_point(getattr(completed_groups[-1], "time_point", None))
+            if first is not None and self.date_time_of_first_record_attribute_name not in self._attributes:
+                self.date_time_of_first_record = first
+            if last is not None:
+                self.date_time_of_last_record = last
+
+    def write_completed_group(self, hdf5_file, index: int):
+        """ Writes the values of one Group_NNN into the datasets already in the file and marks it as complete by
+        updating numGRP and dateTimeOfLastRecord of this instance, then flushes so SWMR readers can see it.
+        See :any:`S1XXFile.start_swmr`, the groups must already have been written to the file (with fill values)
+        and the groups should be completed in order since numGRP becomes index + 1.
+
+        Parameters
+        ----------
+        hdf5_file
+            The S1XXFile (or h5py.File) this instance was written to
+        index
+            Index of the group that was completed, 0 is Group_001
+
+        Returns
+        -------
+        None
+        """
+        groups = self._get_groups()
+        grp = groups[index]
+        group_object = hdf5_file[grp._hdf5_path]
+        for val in grp._attributes.values():
+            if isinstance(val, S1xxGridsBase):
+                val.write_in_place(group_object)
+        self._update_time_records(groups[:index + 1])
+        # modify the existing attributes in place, SWMR doesn't allow attributes to be created or deleted.
+        # SWMR readers only see the copies on the status dataset, see S1XXFile.start_swmr
+        instance_object = hdf5_file[self._hdf5_path]
+        status = swmr_status_dataset(instance_object)
+        for key in (self.num_grp_attribute_name, self.date_time_of_last_record_attribute_name):
+            if key in self._attributes:
+                instance_object.attrs.modify(key, self._attributes[key])
+                if status is not None and key in status.attrs:
+                    status.attrs.modify(key, self._attributes[key])
+        hdf5_file.flush()
+
+    def write_incremental(self, hdf5_file, feature_container=None):
+        """ Writes the Group_NNN of this instance that aren't in the file yet, then releases their grids
+        (see :any:`S1xxGridsBase.release`) so the arrays don't stay in memory.  numGRP and the first/last record
+        times are updated to match the groups written.
+        Calling this after each time step is added keeps the memory used to one time step however many are written.
+        Once the instance is in the file only the new groups and the attributes that changed are written,
+        everything else (i.e. Positioning) is written with the instance on the first call.
+
+        Parameters
+        ----------
+        hdf5_file
+            The S1XXFile to write to.  If this instance isn't in the file yet then the whole file is written.
+        feature_container
+            The feature container (i.e. root.water_level) this instance belongs to, if supplied its attributes
+            are rewritten too so running values like the dataset min/max stay current in the file
+
+        Returns
+        -------
+        None
+        """
+        self._update_time_records(self._get_groups())
+        if self._hdf5_path and self._hdf5_path in hdf5_file:
+            if feature_container is not None:
+                feature_container.write_simple_attributes(hdf5_file[feature_container._hdf5_path], changed_only=True)
+            instance_group = hdf5_file[self._hdf5_path]
+            time_records = (self.num_grp_attribute_name, self.date_time_of_first_record_attribute_name, self.date_time_of_last_record_attribute_name)
+            self.write_simple_attributes(instance_group, changed_only=True, keys=time_records)
+            for group_list in (self.__getattribute__(prop) for prop in self.get_standard_list_properties().values()):
+                new_groups = []
+                for index in reversed(range(len(group_list))):  # the groups are written in order so stop at the last one in the file
+                    name = group_list.metadata_name + group_list.write_format_str % (index + 1)
+                    if name in instance_group:
+                        break
+                    new_groups.insert(0, (name, group_list[index]))
+                for name, group in new_groups:
+                    group.write(instance_group.create_group(name))
+        else:
+            hdf5_file.write()
+        for grid in self.get_grids():
+            if any(isinstance(val, s1xx_sequence_types) and not isinstance(val, LazyGridField) for val in grid._attributes.values()):
+                grid.release(hdf5_file)
+        hdf5_file.flush()
+
+    def read_window(self, bbox, fields=None, time_groups=None) -> tuple:
+        """ Reads the nodes inside a bounding box.
+        Only for a file opened with lazy_grids=True (see :any:`S1XXFile`) are just the HDF5 chunks that intersect the window
+        read and decompressed, otherwise the whole grids were already read when the file was opened and the window is sliced from them.
+
+        Parameters
+        ----------
+        bbox
+            (min_x, min_y, max_x, max_y) see :any:`get_window_slices`
+        fields
+            name or list of names of the fields to read (e.g. "depth" or ["surfaceCurrentSpeed", "surfaceCurrentDirection"]),
+            None reads all the fields
+        time_groups
+            an int to read one Group_NNN (0 is the first group) giving 2D arrays,
+            or a list of ints or None (all groups) to get 3D arrays of (group, row, column)
+
+        Returns
+        -------
+        (slice, slice, dict)
+            the row and column slices from :any:`get_window_slices` and a dictionary of field name to numpy array
+        """
+        rows, cols = self.get_window_slices(bbox)
+        grids = self.get_grids()
+        single_group = isinstance(time_groups, (int, numpy.integer))
+        if single_group:
+            selected = [grids[time_groups]]
+        elif time_groups is None:
+            selected = grids
+        else:
+            selected = [grids[index] for index in time_groups]
+        if not selected:
+            raise S100Exception("No grids were found in the feature instance")
+
+        if fields is None:
+            fields = [key for key, val in selected[0]._attributes.items() if isinstance(val, s1xx_sequence_types)]
+        elif isinstance(fields, str):
+            fields = [fields]
+        window = {}
+        for field in fields:
+            data = [grid._attributes[field][rows, cols] for grid in selected]
+            window[field] = data[0] if single_group else numpy.stack(data)
+        return rows, cols, window
+
+    def get_time_points(self) -> list:
+        """ Returns the timePoint of each Group_NNN in this instance (None for groups without one), in the same order as :any:`get_grids` """
+        times = []
+        for group_attrib in self.get_standard_list_properties().values():
+            for grp in self.__getattribute__(group_attrib):
+                times.append(grp._attributes.get("timePoint"))
+        return times
+
+    def get_node_positions(self):
+        """ Returns (longitude, latitude) arrays of the nodes from the Positioning group (Data Coding Format 3)
+        or None if the instance doesn't have one, meaning it is a regular grid described by the origin and spacing.
+        """
+        positioning = self._attributes.get(getattr(self, "positioning_group_attribute_name", "Positioning"))
+        if positioning is None:
+            return None
+        geometry = positioning._attributes.get("geometryValues")
+        if geometry is None:
+            return None
+        return numpy.asarray(geometry._attributes["longitude"]), numpy.asarray(geometry._attributes["latitude"])
+
+    def get_node_index(self) -> KDTreeIndex:
+        """ Returns the KD-tree of the Positioning node positions (Data Coding Format 3), see :any:`KDTreeIndex.from_positions`
+
+        Returns
+        -------
+        KDTreeIndex
+        """
+        positions = self.get_node_positions()
+        if positions is None:
+            raise S100Exception("The feature instance has no Positioning group, the node index is only used for Data Coding Format 3")
+        return KDTreeIndex.from_positions(*positions)
+
+    def get_nearest_nodes(self, points, k: int = 1) -> tuple:
+        """ Finds the k nearest Positioning nodes to each point (Data Coding Format 3), see :any:`KDTreeIndex.query`
+
+        Returns
+        -------
+        (numpy.ndarray, numpy.ndarray)
+            distances and node numbers which index the 1D values of every Group_NNN
+        """
+        return self.get_node_index().query(points, k)
+
+    def get_nodes_in_bbox(self, bbox) -> numpy.ndarray:
+        """ Returns the sorted node numbers inside a bounding box of (min_x, min_y, max_x, max_y).
+        For Data Coding Format 3 these index the 1D values, for a regular grid they are indices into the flattened grid.
+        """
+        if self.get_node_positions() is None:
+            rows, cols = self.get_window_slices(bbox)
+            row_index, col_index = numpy.meshgrid(numpy.arange(rows.start, rows.stop), numpy.arange(cols.start, cols.stop), indexing="ij")
+            return numpy.ravel_multi_index((row_index.ravel(), col_index.ravel()), (self.num_points_latitudinal, self.num_points_longitudinal))
+        return self.get_node_index().query_bbox(bbox)
+
+    def get_point_indices(self, points) -> tuple:
+        """ Finds the grid node nearest to each point.
+
+        Parameters
+        ----------
+        points
+            sequence of (x, y) positions in the coordinates of the grid (see :any:`get_window_slices`)
+
+        Returns
+        -------
+        (tuple, numpy.ndarray)
+            a tuple of index arrays, one per grid dimension, suitable for indexing a grid with numpy,
+            and a boolean array that is False for points that are outside the grid (their indices are set to 0)
+        """
+        points = numpy.atleast_2d(numpy.asarray(points, dtype=numpy.float64))
+        if self.get_node_positions() is None:
+            rows = numpy.round((points[:, 1] - self.grid_origin_latitude) / self.grid_spacing_latitudinal).astype(numpy.int64)
+            cols = numpy.round((points[:, 0] - self.grid_origin_longitude) / self.grid_spacing_longitudinal).astype(numpy.int64)
+            valid = (rows >= 0) & (rows < self.num_points_latitudinal) & (cols >= 0) & (cols < self.num_points_longitudinal)
+            return (numpy.where(valid, rows, 0), numpy.where(valid, cols, 0)), valid
+        distances, nodes = self.get_nearest_nodes(points, 1)
+        valid = nodes >= 0
+        return (numpy.where(valid, nodes, 0),), valid
+
+    def _get_fields_and_fills(self, grid, fields):
+        if fields is None:
+            fields = [key for key, val in grid._attributes.items() if isinstance(val, s1xx_sequence_types)]
+        elif isinstance(fields, str):
+            fields = [fields]
+        fill_values = grid.get_fill_values()
+        fills = dict(zip(grid.get_write_order(), fill_values)) if fill_values is not None else {}
+        return fields, [fills.get(field, 0) for field in fields]
+
+    def time_series_at(self, points, fields=None, index_file=None, max_window: int = 1000000, source_path: str = None) -> dict:
+        """ Extracts the values at the nodes nearest to the given points from every Group_NNN (i.e. every time).
+
+        Without an index each group is read once with a single hyperslab covering all the points,
+        or one small read per point if that hyperslab would be more than max_window nodes.
+        With a time-major index (see :any:`build_time_series_index`) each point is one small read for all the times.
+
+        Parameters
+        ----------
+        points
+            sequence of (x, y) positions in the coordinates of the grid
+        fields
+            name or list of names of the fields to read, None reads all the fields
+        index_file
+            path of the sidecar made by :any:`build_time_series_index`, it is ignored if it doesn't exist or doesn't match the grids
+        max_window
+            largest number of nodes to read from a group in one hyperslab
+        source_path
+            path of the file the feature instance was read from, the index_file is only used if it was built from this file
+            as it is now (see :any:`file_stamp`), so a rewritten file never returns the old values
+
+        Returns
+        -------
+        dict
+            field name to array of shape (number of groups, number of points),
+            points outside of the grid get the fill value
+        """
+        grids = self.get_grids()
+        if not grids:
+            raise S100Exception("No grids were found in the feature instance")
+        indices, valid = self.get_point_indices(points)
+        fields, fills = self._get_fields_and_fills(grids[0], fields)
+        series = {}
+        for field, fill in zip(fields, fills):
+            series[field] = numpy.full((len(grids), len(valid)), fill, dtype=grids[0]._attributes[field].dtype)
+        if not valid.any():
+            return series
+        indices = tuple(index[valid] for index in indices)
+        grid_shape = grids[0]._attributes[fields[0]].shape
+
+        if index_file is not None and os.path.exists(index_file):
+            with h5py.File(index_file, "r") as index:
+                group = index.get(self._hdf5_path.split("/")[-1])
+                if group is not None and matches_file_stamp(group.attrs, source_path) and tuple(group.attrs["gridShape"]) == tuple(grid_shape) \
+                        and group.attrs["numberOfTimes"] == len(grids) and all(field in group for field in fields):
+                    nodes = numpy.ravel_multi_index(indices, grid_shape)
+                    unique_nodes, inverse = numpy.unique(nodes, return_inverse=True)  # h5py wants increasing indices
+                    for field in fields:
+                        series[field][:, valid] = group[field][unique_nodes, :][inverse].T
+                    return series
+
+        low = [int(index.min()) for index in indices]
+        high = [int(index.max()) + 1 for index in indices]
+        window = tuple(slice(lo, hi) for lo, hi in zip(low, high))
+        in_window = tuple(index - lo for index, lo in zip(indices, low))
+        use_window = numpy.prod([hi - lo for lo, hi in zip(low, high)]) <= max_window
+        for time_index, grid in enumerate(grids):
+            for field in fields:
+                data = grid._attributes[field]
+                if use_window:
+                    values = data[window][in_window]
+                else:
+                    values = [data[node] for node in zip(*indices)]
+                series[field][time_index, valid] = values
+        return series
+
+    def build_time_series_index(self, output_path: str, source_path: str, fields=None, band_nodes: int = 262144):
+        """ Writes a time-major copy of the grids into a sidecar HDF5 file, a dataset per field of shape (nodes, times)
+        chunked so that the whole time series of a node is in one small chunk.  :any:`time_series_at` then reads
+        a point's values for every time at once instead of a chunk from every Group_NNN.
+        The grids are transposed in bands of about band_nodes nodes so memory use stays bounded.
+        The index for each feature instance is a group named like the instance (e.g. WaterLevel.01) so one sidecar can serve all of them.
+
+        Parameters
+        ----------
+        output_path
+            path of the sidecar, created if it doesn't exist
+        source_path
+            path of the file the feature instance was read from, its :any:`file_stamp` is stored so :any:`time_series_at`
+            can tell if the file changed after the index was made
+        fields
+            name or list of names of the fields to index, None indexes all the fields
+        band_nodes
+            approximate number of nodes transposed at a time
+
+        Returns
+        -------
+        None
+        """
+        grids = self.get_grids()
+        if not grids:
+            raise S100Exception("No grids were found in the feature instance")
+        fields, fills = self._get_fields_and_fills(grids[0], fields)
+        grid_shape = grids[0]._attributes[fields[0]].shape
+        num_nodes = int(numpy.prod(grid_shape))
+        num_times = len(grids)
+        nodes_per_row = int(numpy.prod(grid_shape[1:]))
+        band_rows = max(1, band_nodes // max(nodes_per_row, 1))
+        with h5py.File(output_path, "a") as index:
+            name = self._hdf5_path.split("/")[-1]
+            if name in index:
+                del index[name]
+            group = index.create_group(name)
+            group.attrs["gridShape"] = grid_shape
+            group.attrs["numberOfTimes"] = num_times
+            group.attrs["sourceStamp"] = file_stamp(source_path)
+            for field, fill in zip(fields, fills):
+                dtype = grids[0]._attributes[field].dtype
+                chunk_nodes = max(1, min(num_nodes, 16384 // (num_times * dtype.itemsize)))
+                dataset = group.create_dataset(field, shape=(num_nodes, num_times), dtype=dtype, chunks=(chunk_nodes, num_times),
+                                               compression='gzip', compression_opts=9, fillvalue=fill)
+                for row_start in range(0, grid_shape[0], band_rows):
+                    band = numpy.stack([numpy.asarray(grid._attributes[field][row_start:row_start + band_rows]).reshape(-1) for grid in grids])
+                    node_start = row_start * nodes_per_row
+                    dataset[node_start:node_start + band.shape[1]] = band.T
+
+
+def _time_group_names(instance_group) -> list:
+    """ Returns the names of the Group_NNN groups of a feature instance in numeric order """
+    names = [name for name in instance_group if re.match(r"Group_\d+$", name)]
+    return sorted(names, key=lambda name: int(name[6:]))
+
+
+def _copy_header(source, destination, skip):
+    """ Copies the attributes and all the groups and datasets of source into destination except the names in skip """
+    for key, val in source.attrs.items():
+        destination.attrs.create(key, val, dtype=source.attrs.get_id(key).dtype)
+    for name, item in source.items():
+        if item.name in skip:
+            continue
+        if isinstance(item, h5py.Group):
+            _copy_header(item, destination.create_group(name), skip)
+        else:
+            source.copy(item, destination, name=name)
+
+
+def build_virtual_time_cube(h5_files, output_path: str):
+    """ Presents the grids of many S100 files (i.e. the hourly S111 or S104 files of a forecast cycle) as one file
+    without copying any grid data.
+
+    The output has the header of the first file and a Group_NNN for every time step of every file, in the order of h5_files,
+    whose values are HDF5 virtual datasets of the values in the input files, so it reads like a concatenated file
+    (including with :any:`FeatureInstanceDCF2.read_window` and :any:`FeatureInstanceDCF2.time_series_at`).
+    Each feature instance also gets a VALUES_CUBE ("valuesCube") virtual dataset which stacks all the time steps
+    with the timePoint of each in an attribute, the S100 classes skip it so read it with h5py.
+    The input files are referenced relative to the output so they have to stay next to each other, the grids are read from them.
+
+    Parameters
+    ----------
+    h5_files
+        paths of the S100 files in time order, all with the same feature instances and grids
+    output_path
+        path of the virtual file to create
+
+    Returns
+    -------
+    None
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with h5py.File(h5_files[0], "r") as first_file:
+        instances = set()
+
+        def find_instances(name, item):
+            if isinstance(item, h5py.Group) and re.match(r"Group_\d+$", name.split("/")[-1]) and "values" in item:
+                instances.add(item.parent.name)
+        first_file.visititems(find_instances)
+        groups = {first_file[instance][name].name for instance in instances for name in _time_group_names(first_file[instance])}
+
+        with h5py.File(output_path, "w") as output_file:
+            _copy_header(first_file, output_file, groups)
+
+            # min/max of the container attributes like minDatasetHeight come from the headers of all the files
+            containers = {instance.rsplit("/", 1)[0] for instance in instances}
+            for path in h5_files[1:]:
+                with h5py.File(path, "r") as input_file:
+                    for container in containers:
+                        for key, val in input_file[container].attrs.items():
+                            if key.startswith("minDataset") and val < output_file[container].attrs[key]:
+                                output_file[container].attrs.modify(key, val)
+                            elif key.startswith("maxDataset") and val > output_file[container].attrs[key]:
+                                output_file[container].attrs.modify(key, val)
+
+            for instance in sorted(instances):
+                sources = []  # (file, group path, time point) of every time step
+                for path in h5_files:
+                    with h5py.File(path, "r") as input_file:
+                        for name in _time_group_names(input_file[instance]):
+                            time_point = input_file[instance][name].attrs.get("timePoint", "")
+                            if isinstance(time_point, bytes):
+                                time_point = time_point.decode()
+                            values = input_file[instance][name]["values"]
+                            sources.append((os.path.relpath(os.path.abspath(path), output_dir), values.name, str(time_point),
+                                            values.shape, values.dtype, values.fillvalue))
+
+                shape, dtype, fill_value = sources[0][3:]
+                cube_layout = h5py.VirtualLayout(shape=(len(sources),) + shape, dtype=dtype)
+                output_instance = output_file[instance]
+                for index, (path, values_path, time_point, step_shape, step_dtype, step_fill) in enumerate(sources):
+                    if step_shape != shape:
+                        raise S100Exception("{} in {} is {} but the first grid is {}".format(values_path, path, step_shape, shape))
+                    source = h5py.VirtualSource(path, values_path, shape=shape, dtype=dtype)
+                    cube_layout[index] = source
+                    group_layout = h5py.VirtualLayout(shape=shape, dtype=dtype)
+                    group_layout[...] = source
+                    group = output_instance.create_group("Group_{:03d}".format(index + 1))
+                    group.attrs.create("timePoint", time_point, dtype=h5py_string_dtype)
+                    group.create_virtual_dataset("values", group_layout, fillvalue=fill_value)
+                cube = output_instance.create_virtual_dataset(VALUES_CUBE, cube_layout, fillvalue=fill_value)
+                cube.attrs.create("timePoint", [source[2] for source in sources], dtype=h5py_string_dtype)
+
+                output_instance.attrs.modify(FeatureInstanceBase.num_grp_attribute_name, len(sources))
+                output_instance.attrs.modify(FeatureInstanceBase.number_of_times_attribute_name, len(sources))
+                output_instance.attrs.modify(FeatureInstanceBase.date_time_of_last_record_attribute_name, sources[-1][2])
+                if len(sources) > 1 and FeatureInstanceBase.time_record_interval_attribute_name in output_instance.attrs:
+                    try:
+                        first, second = (datetime.datetime.strptime(source[2], "%Y%m%dT%H%M%SZ") for source in sources[:2])
+                        output_instance.attrs.modify(FeatureInstanceBase.time_record_interval_attribute_name, int((second - first).total_seconds()))
+                    except ValueError:
+                        pass  # time points that aren't S100 datetimes, leave the interval as it was
+
 
 class FeatureInformation(S1xxAttributesBase):
     """  In S100, table 10c-8.
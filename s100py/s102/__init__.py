@@ -6,7 +6,8 @@ Tools for converting various datasets to S-102.
 from .api import BathymetryValues, BathymetryCoverage, TrackingListValues, TrackingListValuesList, TrackingListSetList, \
     TrackingListCoverage, TrackingListGroupList, BathymetryGroupList, TrackingListCoveragesList, BathymetryFeatureInstance, \
     BathymetryCoveragesList, BathymetryContainer, TrackingListContainer, FeatureInformationDataset, TrackingListCoverageDataset, \
-    BathymetryCoverageDataset, FeatureCodes, S102Root, S102File
-from .utils import create_s102, from_arrays, from_arrays_with_metadata, from_gdal, from_bag
+    BathymetryCoverageDataset, FeatureCodes, S102Root, S102File, TrackingListValuesArrays, read_overview
+from .utils import create_s102, from_arrays, from_arrays_with_metadata, from_gdal, from_bag, add_tracking_list_from_arrays, \
+    S102GridWriter, mosaic, to_geotiff, build_overviews
 
 __all__ = ["api", "utils"]
\ No newline at end of file
@@ -18,10 +18,14 @@ try:
 except:  # fake out sphinx and autodoc which are loading the module directly and losing the namespace
     __package__ = "s100py.s102"
 
-from ..s1xx import s1xx_sequence, S1xxAttributesBase, S1xxMetadataListBase, S1xxGridsBase, S1XXFile, h5py_string_dtype
+from ..s1xx import s1xx_sequence, S1xxAttributesBase, S1xxMetadataListBase, S1xxGridsBase, S1XXFile, h5py_string_dtype, LazyGridField
 from ..s100 import GridCoordinate, DirectPosition, GeographicExtent, GridEnvelope, SequenceRule, VertexPoint, \
     FeatureInformation, FeatureInformationDataset, FeatureContainerDCF2, S100Root, S100Exception, FeatureInstanceDCF2, GroupFBase, \
-    CommonPointRule
+    CommonPointRule, matches_file_stamp
+
+
+FILLVALUE = 1000000.0  #: fill value of both depth and uncertainty in the bathymetry grids
+OVERVIEW_SUFFIX = ".overviews.h5"  #: added to the S102 file name to make the name of its overview pyramid sidecar
 
 
 class S102Exception(S100Exception):
@@ -201,6 +205,9 @@ class BathymetryValues(S1xxGridsBase):
     def get_compound_dtype(self):
         return [self.depth_dtype, self.uncertainty_dtype]
 
+    def get_fill_values(self):
+        return [FILLVALUE, FILLVALUE]
+
 
 class BathymetryCoverage(S1xxAttributesBase):
     """ This is the Group.NNN object that contains the grid data in a values dataset and other metadata about the grids.
@@ -657,17 +664,163 @@ class TrackingListSetList(S102MetadataListBase):
         return TrackingListValuesList
 
 
+class TrackingListValuesArrays(S1xxGridsBase):
+    """ Array backed storage of the tracking list.
+    Rather than storing each overridden node as its own point group (see :class:`TrackingListSetList`)
+    all the nodes are kept as parallel arrays and written as one compound dataset named 'values'
+    whose fields match the TrackingListCoverage entries in Group_F (X, Y, originalValue, trackCode, listSeries).
+    """
+    x_attribute_name = "X"  #: HDF5 naming
+    y_attribute_name = "Y"  #: HDF5 naming
+    original_value_attribute_name = "originalValue"  #: HDF5 naming
+    track_code_attribute_name = "trackCode"  #: HDF5 naming
+    list_series_attribute_name = "listSeries"  #: HDF5 naming
+
+    @property
+    def __version__(self) -> int:
+        return 1
+
+    @property
+    def metadata_name(self) -> str:
+        return "values"
+
+    @property
+    def x(self) -> s1xx_sequence:
+        """ Column (longitudinal) index of each overridden node in the bathymetry grid """
+        return self._attributes[self.x_attribute_name]
+
+    @x.setter
+    def x(self, val: s1xx_sequence):
+        self._attributes[self.x_attribute_name] = val
+
+    @property
+    def x_type(self) -> s1xx_sequence:
+        return numpy.ndarray
+
+    @property
+    def x_dtype(self) -> Type[int]:
+        return numpy.uint32
+
+    def x_create(self):
+        """ Creates a blank, empty or zero value for x"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.x = self.x_type([], self.x_dtype)
+
+    @property
+    def y(self) -> s1xx_sequence:
+        """ Row (latitudinal) index of each overridden node in the bathymetry grid """
+        return self._attributes[self.y_attribute_name]
+
+    @y.setter
+    def y(self, val: s1xx_sequence):
+        self._attributes[self.y_attribute_name] = val
+
+    @property
+    def y_type(self) -> s1xx_sequence:
+        return numpy.ndarray
+
+    @property
+    def y_dtype(self) -> Type[int]:
+        return numpy.uint32
+
+    def y_create(self):
+        """ Creates a blank, empty or zero value for y"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.y = self.y_type([], self.y_dtype)
+
+    @property
+    def original_value(self) -> s1xx_sequence:
+        """ The depth value that was overridden in the bathymetry coverage """
+        return self._attributes[self.original_value_attribute_name]
+
+    @original_value.setter
+    def original_value(self, val: s1xx_sequence):
+        self._attributes[self.original_value_attribute_name] = val
+
+    @property
+    def original_value_type(self) -> s1xx_sequence:
+        return numpy.ndarray
+
+    @property
+    def original_value_dtype(self) -> Type[float]:
+        return numpy.float32
+
+    def original_value_create(self):
+        """ Creates a blank, empty or zero value for original_value"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.original_value = self.original_value_type([], self.original_value_dtype)
+
+    @property
+    def track_code(self) -> s1xx_sequence:
+        """ See :any:`TrackingListValues.track_code`, the reason for the override of each node """
+        return self._attributes[self.track_code_attribute_name]
+
+    @track_code.setter
+    def track_code(self, val: s1xx_sequence):
+        self._attributes[self.track_code_attribute_name] = val
+
+    @property
+    def track_code_type(self) -> s1xx_sequence:
+        return numpy.ndarray
+
+    @property
+    def track_code_dtype(self):
+        return h5py_string_dtype
+
+    def track_code_create(self):
+        """ Creates a blank, empty or zero value for track_code"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.track_code = self.track_code_type([], self.track_code_dtype)
+
+    @property
+    def list_series(self) -> s1xx_sequence:
+        """ See :any:`TrackingListValues.list_series`, index into the list of metadata describing the override """
+        return self._attributes[self.list_series_attribute_name]
+
+    @list_series.setter
+    def list_series(self, val: s1xx_sequence):
+        self._attributes[self.list_series_attribute_name] = val
+
+    @property
+    def list_series_type(self) -> s1xx_sequence:
+        return numpy.ndarray
+
+    @property
+    def list_series_dtype(self) -> Type[int]:
+        return numpy.int32
+
+    def list_series_create(self):
+        """ Creates a blank, empty or zero value for list_series"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.list_series = self.list_series_type([], self.list_series_dtype)
+
+    def get_write_order(self):
+        return [self.x_attribute_name, self.y_attribute_name, self.original_value_attribute_name,
+                self.track_code_attribute_name, self.list_series_attribute_name]
+
+    def get_compound_dtype(self):
+        return [self.x_dtype, self.y_dtype, self.original_value_dtype, self.track_code_dtype, self.list_series_dtype]
+
+
 class TrackingListCoverage(CommonPointRule, S1xxAttributesBase):
     """ 4.2.1.1.9 and Figure 4.4 of v2.0.0
     commonPointRule is defined to be an S100_PointCoverage with a value of default and it therefore optional.
     a metadata attribute from S100 is allowed but not necessary as well.
 
+    The tracked nodes can either be stored individually in the 'set' groups
+    or in bulk as arrays in the 'values' dataset (see :class:`TrackingListValuesArrays`).
     """
     write_format_str = ".%02d"
 
     domain_extent_attribute_name = "domainExtent"  #: HDF5 naming
     common_point_rule_attribute_name = "commonPointRule"  #: HDF5 naming
     set_attribute_name = "set"  #: HDF5 naming
+    values_attribute_name = "values"  #: HDF5 naming
 
     @property
     def __version__(self) -> int:
@@ -718,6 +871,30 @@ class TrackingListCoverage(CommonPointRule, S1xxAttributesBase):
     def set(self, val: S102MetadataListBase):
         self._attributes[self.set_attribute_name] = val
 
+    @property
+    def values_type(self) -> Type[TrackingListValuesArrays]:
+        return TrackingListValuesArrays
+
+    def values_create(self):
+        """ Creates a blank, empty or zero value for values"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.values = self.values_type()
+
+    @property
+    def values(self) -> TrackingListValuesArrays:
+        """ The tracked nodes stored as parallel arrays in one compound dataset.
+
+        Returns
+        -------
+        TrackingListValuesArrays
+        """
+        return self._attributes[self.values_attribute_name]
+
+    @values.setter
+    def values(self, val: TrackingListValuesArrays):
+        self._attributes[self.values_attribute_name] = val
+
     # @TODO  I don't think this is right, but not sure where I found it
     #
     # geometry_attribute_name = "geometry"  #: HDF5 naming
@@ -953,7 +1130,7 @@ class S102FeatureInformation(FeatureInformation):
     def fill_value_create(self):
         # noinspection PyAttributeOutsideInit
         # pylint: disable=attribute-defined-outside-init
-        self.fill_value = self.fill_value_type(1000000)
+        self.fill_value = self.fill_value_type(FILLVALUE)
 
     def datatype_create(self):
         # noinspection PyAttributeOutsideInit
@@ -1144,30 +1321,107 @@ class S102Root(S100Root):
         self._attributes[self.tracking_list_coverage_attribute_name] = val
 
 
+def read_overview(overview_file, source_shape, display_rows: int, display_cols: int = None, field: str = DEPTH,
+                  source_path: str = None) -> Optional[numpy.ndarray]:
+    """ Reads the coarsest level of an overview pyramid (see :any:`build_overviews`) that still has at least
+    display_rows by display_cols nodes, so a small picture of a large grid only reads a small amount of data.
+
+    Parameters
+    ----------
+    overview_file
+        path of the overview sidecar, normally the S102 file name + OVERVIEW_SUFFIX
+    source_shape
+        shape of the full resolution grid, the overviews are ignored if they were made from a grid of a different shape
+    display_rows
+        number of rows that will be displayed
+    display_cols
+        number of columns that will be displayed, default is the same as display_rows
+    field
+        DEPTH or UNCERTAINTY
+    source_path
+        path of the S102 file, default is overview_file without OVERVIEW_SUFFIX.
+        The overviews are ignored if the S102 file changed after they were made (see :any:`s100py.s100.file_stamp`).
+
+    Returns
+    -------
+    numpy.ndarray
+        The overview grid, using the S102 fill value for empty nodes, each node covering 2**level full resolution nodes in each direction.
+        None if the file doesn't exist, doesn't match source_shape or source_path or the full resolution grid would be needed.
+    """
+    if display_cols is None:
+        display_cols = display_rows
+    if not isinstance(overview_file, str) or not os.path.exists(overview_file):
+        return None
+    if source_path is None and overview_file.endswith(OVERVIEW_SUFFIX):
+        source_path = overview_file[:-len(OVERVIEW_SUFFIX)]
+    with h5py.File(overview_file, "r") as ovr:
+        if tuple(ovr.attrs["sourceShape"]) != tuple(source_shape) or not matches_file_stamp(ovr.attrs, source_path):
+            return None
+        chosen = None
+        for name in sorted(ovr.keys()):
+            level = ovr[name]
+            rows, cols = level[field].shape
+            if rows < display_rows or cols < display_cols:
+                break
+            chosen = level
+        if chosen is None:
+            return None
+        return chosen[field][()]
+
+
 class S102File(S1XXFile):
     PRODUCT_SPECIFICATION = numpy.string_('INT.IHO.S-102.2.0')
     # these keys allow backward compatibility with NAVO data, the first key is current at time of writing
     top_level_keys = ('BathymetryCoverage', 'S102_Grid', 'S102_BathymetryCoverage')
     tracking_list_top_level = ("TrackingListCoverage",)
-    tracking_list_second_level = ("TrackingListCoverage.01",)
+    tracking_list_second_level = ("TrackingListCoverage.01", "TrackingListCoverage.001")
     tracking_list_group_level = ("Group.001",)
     second_level_keys = (
-        'BathymetryCoverage.01', 'S102_Grid.01', 'S102_BathymetryCoverage.01', 'BathymetryCoverage_01', 'S102_Grid_01', 'S102_BathymetryCoverage_01',)
+        'BathymetryCoverage.01', 'BathymetryCoverage.001', 'S102_Grid.01', 'S102_BathymetryCoverage.01', 'BathymetryCoverage_01', 'S102_Grid_01', 'S102_BathymetryCoverage_01',)
     group_level_keys = ('Group.001', 'Group_001',)
     value_level_keys = ("values",)
     depth_keys = ("depth", "depths", 'elevation', "elevations", "S102_Elevation")
+    uncertainty_keys = ("uncertainty", "uncertainties", "S102_Uncertainty")
 
     def __init__(self, *args, **kywrds):
         super().__init__(*args, root=S102Root, **kywrds)
 
     def print_overview(self, display_nodes=10):
-        depths = self.get_depths()
+        depths = self._get_field_view(self.depth_keys)
         print("shape of grid is", depths.shape, "of type", depths.dtype)
         with numpy.printoptions(precision=2, suppress=True, linewidth=200):
             x, y = depths.shape
-            r = max(x, y)
-            step = int(r / display_nodes)
-            print(depths[::step, ::step])
+            overview = self.get_overview(min(display_nodes, x), min(display_nodes, y))
+            step = max(1, int(max(overview.shape) / display_nodes))
+            print(overview[::step, ::step])
+
+    def get_overview(self, display_rows: int, display_cols: int = None, field: str = DEPTH) -> numpy.ndarray:
+        """ Gets a reduced resolution grid for display that has at least display_rows by display_cols nodes.
+        Uses the overview pyramid sidecar if one was made (see :any:`build_overviews`),
+        otherwise reads every Nth node of the full resolution grid.
+
+        Parameters
+        ----------
+        display_rows
+            number of rows that will be displayed
+        display_cols
+            number of columns that will be displayed, default is the same as display_rows
+        field
+            DEPTH or UNCERTAINTY
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if display_cols is None:
+            display_cols = display_rows
+        grid = self._get_field_view(self.depth_keys if field == DEPTH else self.uncertainty_keys)  # only the overview nodes are read
+        overview = read_overview(self.filename + OVERVIEW_SUFFIX, grid.shape, display_rows, display_cols, field, self.filename)
+        if overview is None:
+            rows, cols = grid.shape
+            step = max(1, min(rows // max(display_rows, 1), cols // max(display_cols, 1)))
+            overview = grid[::step, ::step]
+        return overview
 
     def print_depth_attributes(self):
         hdf5 = self.get_depth_dataset()
@@ -1213,11 +1467,70 @@ class S102File(S1XXFile):
         except NameError:
             raise KeyError(str(self.value_level_keys) + " were not found in " + str(list(gp.keys())))
 
-    def get_depths(self):
+    def _get_field_view(self, keys) -> LazyGridField:
+        """ Returns the first field of the bathymetry grid named in keys as a LazyGridField """
         v = self.get_depth_dataset()
         # v.dtype
         # dtype([('S102_Elevation', '<f4'), ('S102_Uncertainty', '<f4')])
-        for k in self.depth_keys:
+        for k in keys:
             if k in v.dtype.names:
-                return v[k]
-        raise KeyError(str(self.depth_keys) + " were not found in " + str(list(v.dtype.names)))
+                return LazyGridField(v, k)
+        raise KeyError(str(keys) + " were not found in " + str(list(v.dtype.names)))
+
+    def get_depths(self) -> Union[numpy.ndarray, LazyGridField]:
+        """ Returns the depth field of the bathymetry grid as a numpy array.
+        For a file opened with lazy_grids=True (see :any:`S1XXFile`) it is a lazy array instead, slicing it
+        (e.g. depths[::10, ::10] or depths[r1:r2, c1:c2]) only reads the needed part of the file,
+        use numpy.asarray(depths) or depths[()] to read the whole grid.
+        """
+        depths = self._get_field_view(self.depth_keys)
+        return depths if self.lazy_grids else depths[()]
+
+    def get_uncertainties(self) -> Union[numpy.ndarray, LazyGridField]:
+        """ Returns the uncertainty field of the bathymetry grid, see :any:`get_depths`
+        """
+        uncertainties = self._get_field_view(self.uncertainty_keys)
+        return uncertainties if self.lazy_grids else uncertainties[()]
+
+    def get_tracking_list_dataset(self):
+        for k in self.tracking_list_top_level:
+            if k in self:
+                d = self[k]
+                break
+        else:
+            raise KeyError(str(self.tracking_list_top_level) + " were not found in " + str(list(self.keys())))
+
+        for k in self.tracking_list_second_level:
+            if k in d:
+                g = d[k]
+                break
+        else:
+            raise KeyError(str(self.tracking_list_second_level) + " were not found in " + str(list(d.keys())))
+
+        for k in self.tracking_list_group_level:
+            if k in g:
+                gp = g[k]
+                break
+        else:
+            raise KeyError(str(self.tracking_list_group_level) + " were not found in " + str(list(g.keys())))
+
+        for k in self.value_level_keys:
+            if k in gp:
+                return gp[k]
+        raise KeyError(str(self.value_level_keys) + " were not found in " + str(list(gp.keys())))
+
+    def get_tracking_list(self):
+        """ Reads the array based tracking list (see :class:`TrackingListValuesArrays`) in one operation.
+
+        Returns
+        -------
+        numpy.ndarray
+            structured array with fields X, Y, originalValue, trackCode and listSeries, trackCode is decoded to str
+        """
+        tracking_list = self.get_tracking_list_dataset()[()]
+        track_code_name = TrackingListValuesArrays.track_code_attribute_name
+        track_code = tracking_list[track_code_name]
+        if track_code.size and isinstance(track_code.flat[0], bytes):
+            # h5py reads the variable length strings of a compound dataset as bytes
+            tracking_list[track_code_name] = numpy.char.decode(track_code.astype(bytes), "utf-8")
+        return tracking_list
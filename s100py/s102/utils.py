@@ -34,8 +34,9 @@ except:
     if not getattr(sys, 'frozen', False):  # we expect the frozen exe to not have matplotlib
         print("matplotlib.pyplot failed to import, plotting will not work")
 
-from s100py.s1xx import s1xx_sequence
-from s100py.s102.api import DEPTH, UNCERTAINTY, S102File, S102Exception
+from s100py.s1xx import s1xx_sequence, ordered_imap, constant_array, is_constant_array, LazyGridField
+from s100py.s100 import file_stamp
+from s100py.s102.api import DEPTH, UNCERTAINTY, FILLVALUE, OVERVIEW_SUFFIX, S102File, S102Exception, read_overview
 
 gco = "{http://www.isotc211.org/2005/gco}"
 
@@ -62,7 +63,7 @@ for bag_name in bag_names:
 """
 
 
-def plot_depth_using_h5py(filename, enc_color=False):
+def plot_depth_using_h5py(filename, enc_color=False, display_nodes=2000):
     # filename = r"G:\Data\S102 Data\GlenS102Test\102USA15NYCAH200430.H5"
     # h5py.File(r"G:\Data\S102 Data\LA_LB_Area_GEO_reprojected.bag_%d.h5", mode="r", driver="family", memb_size=681574400)
     try:
@@ -78,15 +79,24 @@ def plot_depth_using_h5py(filename, enc_color=False):
             f = h5py.File(filename, mode="r", driver="family", memb_size=int(sz))
         except:
             f = h5py.File(filename, mode="r")
-    fill_val = 1000000
+    fill_val = FILLVALUE
     try:
-        d = f["BathymetryCoverage/BathymetryCoverage.01/Group.001/values"]['depth']
+        d = LazyGridField(f["BathymetryCoverage/BathymetryCoverage.01/Group.001/values"], 'depth')
     except KeyError:
         try:
-            d = f["BathymetryCoverage/BathymetryCoverage.001/Group.001/values"]['depth']
+            d = LazyGridField(f["BathymetryCoverage/BathymetryCoverage.001/Group.001/values"], 'depth')
         except KeyError:
-            d = f["SurfaceCurrent/SurfaceCurrent.01/Group_001/values"]['surfaceCurrentSpeed']
+            d = LazyGridField(f["SurfaceCurrent/SurfaceCurrent.01/Group_001/values"], 'surfaceCurrentSpeed')
             fill_val = -9999
+    # the screen can't show more than display_nodes in each direction so use an overview or only read every Nth node
+    overview = None
+    if d.field == 'depth':
+        overview = read_overview(filename + OVERVIEW_SUFFIX, d.shape, min(display_nodes, d.shape[0]), min(display_nodes, d.shape[1]))
+    if overview is None:
+        step = max(1, int(numpy.ceil(max(d.shape) / display_nodes)))
+        d = d[::step, ::step].astype(numpy.float32)
+    else:
+        d = overview
     d[d==fill_val] = numpy.nan
 
     # ud = numpy.flipud(d)
@@ -207,6 +217,53 @@ def create_s102(output_file, overwrite=True) -> S102File:
     return data_file
 
 
+def _create_bathymetry_coverage(output_file, rows: int, cols: int, overwrite: bool = True) -> S102File:
+    """ Calls :any:`create_s102` and then fills in the BathymetryCoverage.01/Group.001 structure for a grid of the given size
+    without supplying any depth or uncertainty values.
+    """
+    data_file = create_s102(output_file)
+    root = data_file.root
+    try:
+        bathy_01 = root.bathymetry_coverage.bathymetry_coverage[0]
+    except IndexError:
+        bathy_01 = root.bathymetry_coverage.bathymetry_coverage.append_new_item()
+    bathy_01.initialize_properties(recursively_create_children=True, overwrite=overwrite)
+
+    del bathy_01.grid_spacing_vertical
+    del bathy_01.grid_origin_vertical
+    del bathy_01.number_of_times
+    del bathy_01.time_record_interval
+    del bathy_01.date_time_of_last_record
+    del bathy_01.date_time_of_first_record
+    bathy_01.num_grp = 1
+
+    try:
+        bathy_group_object = bathy_01.bathymetry_group[0]
+    except IndexError:
+        bathy_group_object = bathy_01.bathymetry_group.append_new_item()
+    # bathy_group_object.initialize_properties()  # Not creating everything as I'm not sure if the grid attributes should be there
+
+    bathy_01.num_points_latitudinal = rows
+    bathy_01.num_points_longitudinal = cols
+    bathy_01.start_sequence = "0,0"
+    del bathy_01.num_points_vertical
+    del bathy_01.vertical_extent_maximum_z
+    del bathy_01.vertical_extent_minimum_z
+
+    bathy_group_object.extent_create()
+    bathy_group_object.extent.initialize_properties(True, overwrite=overwrite)
+    bathy_group_object.extent.low.coord_values[0:2] = [0, 0]
+    bathy_group_object.extent.high.coord_values[0:2] = [rows, cols]
+
+    bathy_group_object.dimension = 2
+
+    bathy_group_object.origin_create()
+    bathy_group_object.origin.initialize_properties(True, overwrite=overwrite)
+    bathy_group_object.origin.dimension = 2
+
+    return data_file
+
+
 def from_arrays(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, output_file, nodata_value=None,
                 flip_x: bool = False, flip_y: bool = False, overwrite: bool = True) -> S102File:  # num_array, or list of lists accepted
     """  Creates or updates an S102File object based on numpy array/h5py datasets.
@@ -220,7 +277,7 @@ def from_arrays(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, output_fi
     depth_grid
     uncert_grid
         The uncertainty dataset to embed in the object.
-        If None then a numpy.zeros array will be created in the appropriate shape to be stored in the file.
+        If None then a constant array of the fill value is used, which takes no memory and no space in the file.
     output_file
         Can be an S102File object or anything the h5py.File would accept, e.g. string file path, tempfile obect, BytesIO etc.
     nodata_value
@@ -241,67 +298,37 @@ def from_arrays(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, output_fi
 
     """
     # @todo -- Add logic that if the grids are gdal raster bands then read in blocks and use h5py slicing to write in blocks.  Slower but saves resources
-    data_file = create_s102(output_file)
-    root = data_file.root
-    try:
-        bathy_01 = root.bathymetry_coverage.bathymetry_coverage[0]
-    except IndexError:
-        bathy_01 = root.bathymetry_coverage.bathymetry_coverage.append_new_item()
-    bathy_01.initialize_properties(recursively_create_children=True, overwrite=overwrite)
-
-    del bathy_01.grid_spacing_vertical
-    del bathy_01.grid_origin_vertical
-    del bathy_01.number_of_times
-    del bathy_01.time_record_interval
-    del bathy_01.date_time_of_last_record
-    del bathy_01.date_time_of_first_record
-    bathy_01.num_grp = 1
-
-    try:
-        bathy_group_object = bathy_01.bathymetry_group[0]
-    except IndexError:
-        bathy_group_object = bathy_01.bathymetry_group.append_new_item()
-    # bathy_group_object.initialize_properties()  # Not creating everything as I'm not sure if the grid attributes should be there
-
     # @todo @fixme fix here -- row/column order?
     rows, cols = depth_grid.shape
     if uncert_grid is None:
-        uncert_grid = numpy.full(depth_grid.shape, nodata_value, dtype=numpy.float32)
+        uncert_grid = constant_array(depth_grid.shape, FILLVALUE)
+    elif is_constant_array(uncert_grid) and uncert_grid.flat[0] == nodata_value:
+        uncert_grid = constant_array(depth_grid.shape, FILLVALUE)
     if depth_grid.shape != uncert_grid.shape:
         raise S102Exception("Depth and Uncertainty grids have different shapes")
 
-    bathy_01.num_points_latitudinal = rows
-    bathy_01.num_points_longitudinal = cols
-    bathy_01.start_sequence = "0,0"
-    del bathy_01.num_points_vertical
-    del bathy_01.vertical_extent_maximum_z
-    del bathy_01.vertical_extent_minimum_z
-
-    bathy_group_object.extent_create()
-    bathy_group_object.extent.initialize_properties(True, overwrite=overwrite)
-    bathy_group_object.extent.low.coord_values[0:2] = [0, 0]
-    bathy_group_object.extent.high.coord_values[0:2] = [rows, cols]
+    data_file = _create_bathymetry_coverage(output_file, rows, cols, overwrite=overwrite)
+    root = data_file.root
+    bathy_group_object = root.bathymetry_coverage.bathymetry_coverage[0].bathymetry_group[0]
 
     depth_max = depth_grid[depth_grid != nodata_value].max()
     depth_min = depth_grid[depth_grid != nodata_value].min()
     bathy_group_object.maximum_depth = depth_max
     bathy_group_object.minimum_depth = depth_min
 
-    try:
-        uncertainty_max = uncert_grid[uncert_grid != nodata_value].max()
-        uncertainty_min = uncert_grid[uncert_grid != nodata_value].min()
-    except ValueError:  # an empty uncertainty array (all values == nodata) will cause this
-        uncertainty_max = uncertainty_min = nodata_value
+    no_uncertainty = numpy.nan if nodata_value is None else nodata_value  # min/max when there is no uncertainty data
+    if is_constant_array(uncert_grid):  # don't expand a constant array just to find the one value it holds
+        uncertainty_max = uncertainty_min = no_uncertainty if uncert_grid.flat[0] == FILLVALUE else uncert_grid.flat[0]
+    else:
+        try:
+            uncertainty_max = uncert_grid[uncert_grid != nodata_value].max()
+            uncertainty_min = uncert_grid[uncert_grid != nodata_value].min()
+        except ValueError:  # an empty uncertainty array (all values == nodata) will cause this
+            uncertainty_max = uncertainty_min = no_uncertainty
 
     bathy_group_object.minimum_uncertainty = uncertainty_min
     bathy_group_object.maximum_uncertainty = uncertainty_max
 
-    bathy_group_object.dimension = 2
-
-    bathy_group_object.origin_create()
-    bathy_group_object.origin.initialize_properties(True, overwrite=overwrite)
-    bathy_group_object.origin.dimension = 2
-
     bathy_group_object.values_create()
     grid = bathy_group_object.values
     # @todo -- need to make sure nodata values are correct, especially if converting something other than bag which is supposed to have the same nodata value
@@ -315,8 +342,9 @@ def from_arrays(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, output_fi
     if nodata_value != root.feature_information.bathymetry_coverage_dataset[0].fill_value:
         depth_grid = numpy.copy(depth_grid)
         depth_grid[depth_grid == nodata_value] = root.feature_information.bathymetry_coverage_dataset[0].fill_value
-        uncert_grid = numpy.copy(uncert_grid)
-        uncert_grid[uncert_grid == nodata_value] = root.feature_information.bathymetry_coverage_dataset[1].fill_value
+        if not is_constant_array(uncert_grid):
+            uncert_grid = numpy.copy(uncert_grid)
+            uncert_grid[uncert_grid == nodata_value] = root.feature_information.bathymetry_coverage_dataset[1].fill_value
 
     grid.depth = depth_grid
     grid.uncertainty = uncert_grid
@@ -324,49 +352,11 @@ def from_arrays(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, output_fi
     return data_file
 
 
-def from_arrays_with_metadata(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, metadata: dict, output_file, nodata_value=None,
-                              overwrite: bool = True) -> S102File:  # raw arrays and metadata accepted
-    """ Fills or creates an :any:`S102File` from the given arguments.
-
-    Parameters
-    ----------
-    depth_grid
-        a numpy or hdf5 dataset object of the rectangular grid of depths
-    uncert_grid
-        a numpy or hdf5 dataset object of the rectangular grid of uncertainties, lower left corner is the first point
-    metadata
-        a dictionary of metadata describing the grids passed in,
-        metadata should have the following key/value pairs:
-            - "origin": tuple of the position (x,y) or (lon, lat) for the reference corner node.
-                Other corners are calulated from this corner using the resolution and size of the data array.
-            - "res": tuple of the resolution (cell size) of each grid cell (x, y).
-                Lower left corner is the first point of both resolutions are positive.
-                If a resolution is negative then the grid will be flipped in that dimension and the origin adjusted accordingly.
-            - "horizontalDatumReference": See :any:`S102Root` horizontal_datum_reference, ex: "EPSG".
-                "EPSG" is the default value.
-            - "horizontalDatumValue":  The value for the horizontal data such as the EPSG code ex: 32611
-            - "epoch":
-            - "geographicIdentifier": Location of the data, ex: "Long Beach, CA, USA".
-                An empty string ("") is the default.
-            - "issueDate":
-            - "metadataFile": File name for the associated discovery metatadata (xml)
-    output_file
-        Can be an S102File object or anything the h5py.File would accept, e.g. string file path, tempfile obect, BytesIO etc.
-    nodata_value
-        the "no data" value used in the grids
-    overwrite
-        if the output_file was an existing S102File then keep any attributes that might have
-    Returns
-    -------
-    S102File
-
+def _add_grid_metadata(data_file: S102File, rows: int, cols: int, metadata: dict, overwrite: bool = True):
+    """ Fills in the bounds, origin, spacing and coordinate system information described in :any:`from_arrays_with_metadata`
+    for a grid of the given size.
     """
-    # @todo - add logic to see if the coordinate system is lower right, if not then need to mirror the arrays or add flags to do that in from_arrays
     res_x, res_y = metadata["res"]
-    flip_x = True if res_x < 0 else False
-    flip_y = True if res_y < 0 else False
-
-    rows, cols = depth_grid.shape
     corner_x, corner_y = metadata['origin']
 
     # S-102 is node based, so distance to far corner is res * (n -1)
@@ -378,8 +368,6 @@ def from_arrays_with_metadata(depth_grid: s1xx_sequence, uncert_grid: s1xx_seque
     miny = min((corner_y, opposite_corner_y))
     maxy = max((corner_y, opposite_corner_y))
 
-    data_file = from_arrays(depth_grid, uncert_grid, output_file, nodata_value=nodata_value, overwrite=overwrite, flip_x=flip_x, flip_y=flip_y)
-
     # now add the additional metadata
     root = data_file.root
     bathy_01 = root.bathymetry_coverage.bathymetry_coverage[0]
@@ -433,9 +421,253 @@ def from_arrays_with_metadata(depth_grid: s1xx_sequence, uncert_grid: s1xx_seque
     if "metadataFile" in metadata or overwrite:
         root.metadata = metadata.get('metadataFile', "")  # datetime.date.today().isoformat()
 
+
+def from_arrays_with_metadata(depth_grid: s1xx_sequence, uncert_grid: s1xx_sequence, metadata: dict, output_file, nodata_value=None,
+                              overwrite: bool = True, overviews: bool = False) -> S102File:  # raw arrays and metadata accepted
+    """ Fills or creates an :any:`S102File` from the given arguments.
+
+    Parameters
+    ----------
+    depth_grid
+        a numpy or hdf5 dataset object of the rectangular grid of depths
+    uncert_grid
+        a numpy or hdf5 dataset object of the rectangular grid of uncertainties, lower left corner is the first point
+    metadata
+        a dictionary of metadata describing the grids passed in,
+        metadata should have the following key/value pairs:
+            - "origin": tuple of the position (x,y) or (lon, lat) for the reference corner node.
+                Other corners are calulated from this corner using the resolution and size of the data array.
+            - "res": tuple of the resolution (cell size) of each grid cell (x, y).
+                Lower left corner is the first point of both resolutions are positive.
+                If a resolution is negative then the grid will be flipped in that dimension and the origin adjusted accordingly.
+            - "horizontalDatumReference": See :any:`S102Root` horizontal_datum_reference, ex: "EPSG".
+                "EPSG" is the default value.
+            - "horizontalDatumValue":  The value for the horizontal data such as the EPSG code ex: 32611
+            - "epoch":
+            - "geographicIdentifier": Location of the data, ex: "Long Beach, CA, USA".
+                An empty string ("") is the default.
+            - "issueDate":
+            - "metadataFile": File name for the associated discovery metatadata (xml)
+    output_file
+        Can be an S102File object or anything the h5py.File would accept, e.g. string file path, tempfile obect, BytesIO etc.
+    nodata_value
+        the "no data" value used in the grids
+    overwrite
+        if the output_file was an existing S102File then keep any attributes that might have
+    overviews
+        if True then also make the display overview pyramid sidecar, see :any:`build_overviews`
+    Returns
+    -------
+    S102File
+
+    """
+    # @todo - add logic to see if the coordinate system is lower right, if not then need to mirror the arrays or add flags to do that in from_arrays
+    res_x, res_y = metadata["res"]
+    flip_x = True if res_x < 0 else False
+    flip_y = True if res_y < 0 else False
+
+    rows, cols = depth_grid.shape
+    data_file = from_arrays(depth_grid, uncert_grid, output_file, nodata_value=nodata_value, overwrite=overwrite, flip_x=flip_x, flip_y=flip_y)
+    _add_grid_metadata(data_file, rows, cols, metadata, overwrite=overwrite)
+
     data_file.write()
     data_file.flush()
-    
+    if overviews:
+        build_overviews(data_file)
+
+    return data_file
+
+
+class S102GridWriter:
+    """ Creates an S102 file and writes the depth and uncertainty a block at a time,
+    so grids that are larger than memory (like a :any:`mosaic` of many tiles) can be produced.
+
+    The metadata is the same as used by :any:`from_arrays_with_metadata` and shape is the (rows, cols) of the full grid.
+    Blocks are placed using the orientation described by the metadata "origin" and "res",
+    so a negative resolution flips the blocks the same way :any:`from_arrays` flips a full grid.
+    Nodes that are never written hold the S102 fillValue.
+    Writing blocks that are :attr:`block_rows` tall and start on a multiple of it avoids re-compressing HDF5 chunks.
+    If overviews is True then :any:`build_overviews` is run by finish().
+
+    >>> writer = S102GridWriter("output.h5", depth.shape, metadata, nodata_value=1000000)
+    >>> for row in range(0, depth.shape[0], writer.block_rows):
+    ...     writer.write_block(row, 0, depth[row:row + writer.block_rows], uncertainty[row:row + writer.block_rows])
+    >>> data_file = writer.finish()
+    """
+
+    def __init__(self, output_file, shape, metadata: dict, nodata_value=None, overwrite: bool = True, overviews: bool = False):
+        res_x, res_y = metadata["res"]
+        self.flip_x = True if res_x < 0 else False
+        self.flip_y = True if res_y < 0 else False
+        self.rows, self.cols = shape
+        self.nodata_value = nodata_value
+        self.overviews = overviews
+
+        self.data_file = _create_bathymetry_coverage(output_file, self.rows, self.cols, overwrite=overwrite)
+        _add_grid_metadata(self.data_file, self.rows, self.cols, metadata, overwrite=overwrite)
+        root = self.data_file.root
+        self.bathy_group_object = root.bathymetry_coverage.bathymetry_coverage[0].bathymetry_group[0]
+        # write the metadata now, which makes the groups, then the values dataset is created and filled by this class
+        self.data_file.write()
+
+        values = self.bathy_group_object.values_type()
+        self.fields = values.get_write_order()
+        self.fill_values = [info.fill_value for info in root.feature_information.bathymetry_coverage_dataset]
+        dtype = numpy.dtype(list(zip(self.fields, values.get_compound_dtype())))
+        group = self.data_file[self.bathy_group_object._hdf5_path]
+        self.dataset = group.create_dataset(values.metadata_name, shape=(self.rows, self.cols), dtype=dtype, chunks=True,
+                                            compression='gzip', compression_opts=9,
+                                            fillvalue=numpy.array(tuple(self.fill_values), dtype=dtype))
+        self.minimums = [numpy.inf] * len(self.fields)
+        self.maximums = [-numpy.inf] * len(self.fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+
+    @property
+    def block_rows(self) -> int:
+        """ Number of rows in an HDF5 chunk of the values dataset """
+        return self.dataset.chunks[0]
+
+    def write_block(self, row: int, col: int, depth_block: s1xx_sequence, uncert_block: s1xx_sequence = None):
+        """ Writes a block of the grid.  A block that is entirely empty is not written at all since the dataset
+        already reads as the fillValue there, so each area of the grid should only be written once.
+
+        Parameters
+        ----------
+        row
+            row (in the supplied orientation) of the first node of the block
+        col
+            column (in the supplied orientation) of the first node of the block
+        depth_block
+            2D array of depths, nodata_value or NaN denote an empty node
+        uncert_block
+            2D array of uncertainties the same shape as depth_block, if None the uncertainty is left as the fillValue
+
+        Returns
+        -------
+        None
+        """
+        depth_block = numpy.asarray(depth_block)
+        n_rows, n_cols = depth_block.shape
+        blocks = [depth_block, uncert_block]
+        if uncert_block is not None:
+            blocks[1] = numpy.asarray(uncert_block)
+            if blocks[1].shape != depth_block.shape:
+                raise S102Exception("Depth and Uncertainty blocks have different shapes")
+        if self.flip_x:
+            blocks = [None if b is None else numpy.fliplr(b) for b in blocks]
+            col = self.cols - col - n_cols
+        if self.flip_y:
+            blocks = [None if b is None else numpy.flipud(b) for b in blocks]
+            row = self.rows - row - n_rows
+        if row < 0 or col < 0 or row + n_rows > self.rows or col + n_cols > self.cols:
+            raise S102Exception("Block at row {} col {} of shape {} is outside the grid".format(row, col, depth_block.shape))
+
+        record = numpy.empty(depth_block.shape, dtype=self.dataset.dtype)
+        all_fill = True
+        for index, (field, block, fill) in enumerate(zip(self.fields, blocks, self.fill_values)):
+            if block is None:
+                record[field] = fill
+                continue
+            valid = numpy.isfinite(block)
+            if self.nodata_value is not None:
+                valid &= block != self.nodata_value
+            if valid.any():
+                self.minimums[index] = min(self.minimums[index], block[valid].min())
+                self.maximums[index] = max(self.maximums[index], block[valid].max())
+                all_fill = False
+            record[field] = numpy.where(valid, block, fill)
+        if not all_fill:
+            self.dataset[row:row + n_rows, col:col + n_cols] = record
+
+    def finish(self) -> S102File:
+        """ Stores the minimum and maximum depth and uncertainty of the written blocks and updates the metadata (e.g. chunking).
+
+        Returns
+        -------
+        S102File
+            The file that was written, it is left open like the other creation functions do.
+        """
+        minimums = [v if numpy.isfinite(v) else fill for v, fill in zip(self.minimums, self.fill_values)]
+        maximums = [v if numpy.isfinite(v) else fill for v, fill in zip(self.maximums, self.fill_values)]
+        self.bathy_group_object.minimum_depth, self.bathy_group_object.minimum_uncertainty = minimums
+        self.bathy_group_object.maximum_depth, self.bathy_group_object.maximum_uncertainty = maximums
+        self.data_file.write()
+        self.data_file.flush()
+        if self.overviews:
+            build_overviews(self.data_file)
+        return self.data_file
+
+
+def add_tracking_list_from_arrays(data_file: S102File, x: s1xx_sequence, y: s1xx_sequence, original_value: s1xx_sequence,
+                                  track_code: s1xx_sequence = None, list_series: s1xx_sequence = None) -> S102File:
+    """ Stores a tracking list of overridden nodes in bulk as a single compound dataset
+    (TrackingListCoverage/TrackingListCoverage.001/Group.001/values) rather than one group per node.
+    Only the tracking list is written, so this can be called after :any:`from_arrays_with_metadata` has already written the grids.
+    Read the data back with :any:`S102File.get_tracking_list`.
+
+    Parameters
+    ----------
+    data_file
+        S102File, usually the result of :any:`from_arrays_with_metadata` or :any:`from_gdal`
+    x
+        column index of each overridden node
+    y
+        row index of each overridden node
+    original_value
+        the depth that was overridden at each node
+    track_code
+        reason for the override of each node, empty strings are used if None
+    list_series
+        index into the lineage metadata for each node, zeros are used if None
+
+    Returns
+    -------
+    S102File
+    """
+    x = numpy.asarray(x)
+    y = numpy.asarray(y)
+    original_value = numpy.asarray(original_value)
+    if track_code is None:
+        track_code = numpy.full(x.shape, "", dtype=object)
+    if list_series is None:
+        list_series = numpy.zeros(x.shape, dtype=numpy.int32)
+    track_code = numpy.asarray(track_code, dtype=object)
+    list_series = numpy.asarray(list_series)
+    if not (x.shape == y.shape == original_value.shape == track_code.shape == list_series.shape) or x.ndim != 1:
+        raise S102Exception("Tracking list arrays must all be one dimensional and the same length")
+
+    root = data_file.root
+    try:
+        tracking_container = root.tracking_list_coverage
+    except KeyError:
+        root.tracking_list_coverage_create()
+        tracking_container = root.tracking_list_coverage
+    try:
+        tracking_groups = tracking_container.tracking_list_coverage[0]
+    except (KeyError, IndexError):
+        tracking_container.tracking_list_coverage_create()
+        tracking_groups = tracking_container.tracking_list_coverage.append_new_item()
+    try:
+        tracking_object = tracking_groups[0]
+    except IndexError:
+        tracking_object = tracking_groups.append_new_item()
+    tracking_container.num_instances = 1
+
+    tracking_object.values_create()
+    tracking_object.values.x = x
+    tracking_object.values.y = y
+    tracking_object.values.original_value = original_value
+    tracking_object.values.track_code = track_code
+    tracking_object.values.list_series = list_series
+
+    tracking_container.write(data_file.require_group(root.tracking_list_coverage_attribute_name))
+    data_file.flush()
     return data_file
 
 
@@ -557,6 +789,376 @@ def from_bag(bagfile, output_file, metadata: dict = None) -> S102File:
     return s102_data_file
 
 
+MOSAIC_RULES = ("shoalest", "newest", "average")
+
+
+def _get_values_dataset(h5_file):
+    """ Finds the BathymetryCoverage values in a plain h5py.File using the same names as :any:`S102File.get_depth_dataset`.
+    Opening an S102File would read every grid into memory which is more than is needed to look at part of a file.
+    """
+    obj = h5_file
+    for keys in (S102File.top_level_keys, S102File.second_level_keys, S102File.group_level_keys, S102File.value_level_keys):
+        for k in keys:
+            if k in obj:
+                obj = obj[k]
+                break
+        else:
+            raise KeyError(str(keys) + " were not found in " + str(list(obj.keys())))
+    return obj
+
+
+def _get_field_name(dataset, keys):
+    for k in keys:
+        if k in dataset.dtype.names:
+            return k
+    raise KeyError(str(keys) + " were not found in " + str(list(dataset.dtype.names)))
+
+
+def _as_str(val):
+    return val.decode() if isinstance(val, bytes) else val
+
+
+def _read_tile_header(path) -> dict:
+    """ Reads the grid description of an S102 file without reading the grid itself """
+    with h5py.File(path, "r") as h5_file:
+        values = _get_values_dataset(h5_file)
+        instance = values.parent.parent
+        try:
+            fill_values = h5_file["Group_F/BathymetryCoverage"]["fillValue"]
+            depth_fill, uncertainty_fill = float(fill_values[0]), float(fill_values[1])
+        except KeyError:
+            depth_fill = uncertainty_fill = 1000000.0
+        header = {"path": path,
+                  "origin_x": float(instance.attrs["gridOriginLongitude"]),
+                  "origin_y": float(instance.attrs["gridOriginLatitude"]),
+                  "res_x": float(instance.attrs["gridSpacingLongitudinal"]),
+                  "res_y": float(instance.attrs["gridSpacingLatitudinal"]),
+                  "rows": int(instance.attrs["numPointsLatitudinal"]),
+                  "cols": int(instance.attrs["numPointsLongitudinal"]),
+                  "depth_fill": depth_fill,
+                  "uncertainty_fill": uncertainty_fill,
+                  "metadata": {}}
+        if values.shape != (header["rows"], header["cols"]):
+            raise S102Exception("{} numPoints attributes don't match the shape of the values {}".format(path, values.shape))
+        for key in ("horizontalDatumReference", "horizontalDatumValue", "epoch", "geographicIdentifier", "issueDate", "metadata"):
+            if key in h5_file.attrs:
+                header["metadata"]["metadataFile" if key == "metadata" else key] = _as_str(h5_file.attrs[key])
+    return header
+
+
+def _mosaic_band(tiles, row_start, row_end, cols, rule):
+    """ Computes the mosaic for rows row_start to row_end from the tiles that overlap them,
+    only the overlapping rows of each tile are read.  Empty nodes are returned as NaN.
+    """
+    shape = (row_end - row_start, cols)
+    depth = numpy.full(shape, numpy.nan, dtype=numpy.float32)
+    uncertainty = numpy.full(shape, numpy.nan, dtype=numpy.float32)
+    if rule == "average":
+        depth_sum = numpy.zeros(shape, dtype=numpy.float64)
+        depth_count = numpy.zeros(shape, dtype=numpy.int32)
+        uncertainty_sum = numpy.zeros(shape, dtype=numpy.float64)
+        uncertainty_count = numpy.zeros(shape, dtype=numpy.int32)
+    for path, row_offset, col_offset, tile_rows, tile_cols, depth_fill, uncertainty_fill in tiles:
+        first = max(row_start - row_offset, 0)
+        last = min(row_end - row_offset, tile_rows)
+        if first >= last:
+            continue
+        with h5py.File(path, "r") as h5_file:
+            values = _get_values_dataset(h5_file)
+            window = values[first:last]  # one read for both fields
+            tile_depth = window[_get_field_name(values, S102File.depth_keys)]
+            tile_uncertainty = window[_get_field_name(values, S102File.uncertainty_keys)]
+        out = (slice(first + row_offset - row_start, last + row_offset - row_start), slice(col_offset, col_offset + tile_cols))
+        valid = tile_depth != depth_fill
+        tile_uncertainty = numpy.where(tile_uncertainty != uncertainty_fill, tile_uncertainty, numpy.nan)
+        if rule == "average":
+            depth_sum[out][valid] += tile_depth[valid]
+            depth_count[out] += valid
+            valid_uncertainty = valid & ~numpy.isnan(tile_uncertainty)
+            uncertainty_sum[out][valid_uncertainty] += tile_uncertainty[valid_uncertainty]
+            uncertainty_count[out] += valid_uncertainty
+        else:
+            current = depth[out]
+            if rule == "shoalest":
+                valid &= ~(current <= tile_depth)  # NaN (nothing there yet) compares False so is replaced
+            current[valid] = tile_depth[valid]
+            uncertainty[out][valid] = tile_uncertainty[valid]
+    if rule == "average":
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            depth[:] = numpy.where(depth_count > 0, depth_sum / depth_count, numpy.nan)
+            uncertainty[:] = numpy.where(uncertainty_count > 0, uncertainty_sum / uncertainty_count, numpy.nan)
+    return depth, uncertainty
+
+
+def mosaic(input_files, output_file, rule: str = "shoalest", metadata: dict = None, max_workers: int = 1,
+           overwrite: bool = True, overviews: bool = False) -> S102File:
+    """ Merges adjacent or overlapping S102 files into one S102 coverage.
+
+    The union grid is computed from each file's gridOrigin, gridSpacing and numPoints attributes,
+    so all the files must share the grid spacing and coordinate system and their nodes must line up.
+    The output is computed in bands of rows, reading only the rows of each file which overlap the band.
+    Bands are computed in parallel processes and written in order through :class:`S102GridWriter`.
+
+    Parameters
+    ----------
+    input_files
+        list of paths to S102 files
+    output_file
+        Can be an S102File object or anything the h5py.File would accept, e.g. string file path, tempfile obect, BytesIO etc.
+    rule
+        How nodes that have data in more than one file are resolved:
+            - "shoalest": the smallest depth (S102 depths are positive down) and its uncertainty
+            - "newest": the value from the file with the latest issueDate, ties go to the later file in input_files
+            - "average": the mean of the depths and the mean of the uncertainties
+    metadata
+        Overrides for the metadata described in :any:`from_arrays_with_metadata`, by default the values come from the first file.
+        "origin" and "res" are always computed from the files.
+    max_workers
+        number of processes to use, the default of 1 computes everything in the current process and None uses all the cpus
+    overwrite
+        See :any:`from_arrays_with_metadata`
+    overviews
+        if True then also make the display overview pyramid sidecar, see :any:`build_overviews`
+
+    Returns
+    -------
+    S102File
+    """
+    if rule not in MOSAIC_RULES:
+        raise S102Exception("mosaic rule must be one of {}, not {}".format(MOSAIC_RULES, rule))
+    headers = [_read_tile_header(path) for path in input_files]
+    if not headers:
+        raise S102Exception("No input files were supplied to mosaic")
+
+    res_x, res_y = headers[0]["res_x"], headers[0]["res_y"]
+    datum = headers[0]["metadata"].get("horizontalDatumValue")
+    for header in headers:
+        if not numpy.isclose(header["res_x"], res_x) or not numpy.isclose(header["res_y"], res_y):
+            raise S102Exception("{} has a different grid spacing than {}".format(header["path"], headers[0]["path"]))
+        if header["metadata"].get("horizontalDatumValue") != datum:
+            raise S102Exception("{} has a different horizontal datum than {}".format(header["path"], headers[0]["path"]))
+
+    minx = min(header["origin_x"] for header in headers)
+    miny = min(header["origin_y"] for header in headers)
+    maxx = max(header["origin_x"] + res_x * (header["cols"] - 1) for header in headers)
+    maxy = max(header["origin_y"] + res_y * (header["rows"] - 1) for header in headers)
+    cols = int(round((maxx - minx) / res_x)) + 1
+    rows = int(round((maxy - miny) / res_y)) + 1
+
+    out_metadata = dict(headers[0]["metadata"])
+    if metadata:
+        out_metadata.update(metadata)
+    out_metadata["origin"] = (minx, miny)
+    out_metadata["res"] = (res_x, res_y)
+
+    if rule == "newest":  # later tiles overwrite earlier ones, python's sort is stable so ties stay in the supplied order
+        headers.sort(key=lambda hdr: str(hdr["metadata"].get("issueDate", "")))
+    tiles = []
+    for header in headers:
+        offsets = []
+        for origin, start, res in ((header["origin_y"], miny, res_y), (header["origin_x"], minx, res_x)):
+            offset = (origin - start) / res
+            if abs(offset - round(offset)) > 0.01:
+                raise S102Exception("{} nodes do not line up with the other files".format(header["path"]))
+            offsets.append(int(round(offset)))
+        tiles.append((header["path"], offsets[0], offsets[1], header["rows"], header["cols"], header["depth_fill"], header["uncertainty_fill"]))
+
+    writer = S102GridWriter(output_file, (rows, cols), out_metadata, overwrite=overwrite, overviews=overviews)
+    band_args = []
+    for row_start in range(0, rows, writer.block_rows):
+        row_end = min(row_start + writer.block_rows, rows)
+        band_tiles = [tile for tile in tiles if tile[1] < row_end and tile[1] + tile[3] > row_start]
+        if band_tiles:  # bands without any data are left as the fill value
+            band_args.append((band_tiles, row_start, row_end, cols, rule))
+    for args, (depth, uncertainty) in zip(band_args, ordered_imap(_mosaic_band, band_args, max_workers=max_workers)):
+        writer.write_block(args[1], 0, depth, uncertainty)
+    return writer.finish()
+
+
+def to_geotiff(input_file, output_path, cog: bool = False, nodata_value: float = None, overviews: bool = True,
+               overview_resampling: str = "AVERAGE", block_size: int = 256):
+    """ Exports the BathymetryCoverage of an S102 file to a two band (depth, uncertainty) tiled and compressed GeoTIFF
+    or Cloud Optimized GeoTIFF.
+
+    The HDF5 grid is read in blocks of rows aligned to its chunking so the full grid is never held in memory.
+    S102 nodes are the centers of the GeoTIFF pixels, so the geotransform is shifted by half a cell from gridOrigin,
+    and the rows are flipped since S102 stores the southern row first and GeoTIFFs are written north up.
+
+    Parameters
+    ----------
+    input_file
+        path to an S102 file
+    output_path
+        path of the .tif to create
+    cog
+        if True then make a Cloud Optimized GeoTIFF (COG driver, requires GDAL 3.1+), otherwise a tiled GTiff
+    nodata_value
+        value to replace the S102 fillValue with, by default the fillValue is kept and marked as the nodata value
+    overviews
+        if True then build reduced resolution overviews, halving until the image fits in one block
+    overview_resampling
+        GDAL resampling method used for the overviews
+    block_size
+        width and height of the GeoTIFF tiles
+
+    Returns
+    -------
+    None
+    """
+    header = _read_tile_header(input_file)
+    rows, cols = header["rows"], header["cols"]
+    res_x, res_y = header["res_x"], header["res_y"]
+    fill_values = (header["depth_fill"], header["uncertainty_fill"])
+    nodata_values = fill_values if nodata_value is None else (nodata_value, nodata_value)
+
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(int(header["metadata"].get("horizontalDatumValue", 4326)))
+    # gridOrigin is the south west node, GDAL wants the north west corner of the north west pixel
+    geotransform = (header["origin_x"] - res_x / 2, res_x, 0, header["origin_y"] + res_y * (rows - 1) + res_y / 2, 0, -res_y)
+
+    options = ["TILED=YES", "BLOCKXSIZE=%d" % block_size, "BLOCKYSIZE=%d" % block_size, "COMPRESS=DEFLATE", "PREDICTOR=3", "BIGTIFF=IF_SAFER"]
+    tiff_path = output_path + ".tmp.tif" if cog else output_path
+    dataset = gdal.GetDriverByName('GTiff').Create(tiff_path, cols, rows, 2, gdal.GDT_Float32, options=options)
+    dataset.SetGeoTransform(geotransform)
+    dataset.SetProjection(srs.ExportToWkt())
+    dataset.SetMetadataItem("AREA_OR_POINT", "Area")
+    bands = [dataset.GetRasterBand(1), dataset.GetRasterBand(2)]
+    for band, description, nodata in zip(bands, (DEPTH, UNCERTAINTY), nodata_values):
+        band.SetDescription(description)
+        band.SetNoDataValue(nodata)
+
+    with h5py.File(input_file, "r") as h5_file:
+        values = _get_values_dataset(h5_file)
+        field_names = (_get_field_name(values, S102File.depth_keys), _get_field_name(values, S102File.uncertainty_keys))
+        step = values.chunks[0] if values.chunks else block_size
+        for row_start in range(0, rows, step):
+            row_end = min(row_start + step, rows)
+            block = values[row_start:row_end]  # one read for both fields
+            for band, name, fill, nodata in zip(bands, field_names, fill_values, nodata_values):
+                data = numpy.flipud(block[name])
+                if nodata != fill:
+                    data = numpy.where(data == fill, nodata, data)
+                band.WriteArray(data, 0, rows - row_end)
+
+    if overviews:
+        levels = []
+        factor = 2
+        while max(rows, cols) / factor >= block_size / 2:
+            levels.append(factor)
+            factor *= 2
+        if levels:
+            dataset.BuildOverviews(overview_resampling, levels)
+    dataset.FlushCache()
+    dataset = None  # close the GDAL file
+
+    if cog:
+        source = gdal.Open(tiff_path)
+        try:
+            gdal.GetDriverByName('COG').CreateCopy(output_path, source, options=[
+                "BLOCKSIZE=%d" % block_size, "COMPRESS=DEFLATE", "PREDICTOR=YES", "BIGTIFF=IF_SAFER",
+                "OVERVIEWS=AUTO" if overviews else "OVERVIEWS=NONE", "RESAMPLING=" + overview_resampling])
+        finally:
+            source = None  # close before deleting the intermediate file
+            gdal.GetDriverByName('GTiff').Delete(tiff_path)
+
+
+def _reduce_band(depth, uncertainty, fill_values):
+    """ Halves a band of rows in each direction keeping the shoalest depth and the largest uncertainty of each 2x2 block of nodes.
+    An odd last row or column is reduced on its own.  Empty nodes (fill value or NaN) are ignored.
+    """
+    reduced_fields = []
+    for data, fill, reduce in zip((depth, uncertainty), fill_values, (numpy.nanmin, numpy.nanmax)):
+        rows, cols = data.shape
+        padded = numpy.full((rows + rows % 2, cols + cols % 2), numpy.nan, dtype=numpy.float32)
+        padded[:rows, :cols] = numpy.where(data == fill, numpy.nan, data)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # blocks that are all empty
+            reduced = reduce(padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2), axis=(1, 3))
+        reduced_fields.append(numpy.where(numpy.isnan(reduced), fill, reduced).astype(numpy.float32))
+    return reduced_fields
+
+
+def build_overviews(input_file, output_path: str = None, min_size: int = 256) -> str:
+    """ Makes a pyramid of reduced resolution copies of the depth and uncertainty grids for fast display
+    and stores them in an HDF5 sidecar file next to the S102 file, which itself is not changed.
+
+    Each level halves the previous one in both directions (2x2 nodes become 1), using the shoalest depth
+    so shoals are never hidden when zoomed out and the largest uncertainty.
+    Levels are made until the grid is no larger than min_size in either direction.
+    The grids are processed in bands of rows so the full resolution grid is never held in memory.
+    The modification time and size of the S102 file are stored too and the overviews are ignored once it changes,
+    so make them after the S102 file is finished.
+    Use :any:`S102File.get_overview` or :any:`read_overview` to read the level that fits a display size.
+
+    Parameters
+    ----------
+    input_file
+        path to an S102 file or an open S102File/h5py.File
+    output_path
+        path for the sidecar, default is the S102 file name + OVERVIEW_SUFFIX which is where the readers look for it
+    min_size
+        stop making levels once the number of rows and columns are both this size or smaller
+
+    Returns
+    -------
+    str
+        the path of the sidecar file
+    """
+    if isinstance(input_file, h5py.File):
+        h5_file = input_file
+    else:
+        h5_file = h5py.File(input_file, "r")
+    if output_path is None:
+        output_path = h5_file.filename + OVERVIEW_SUFFIX
+    try:
+        values = _get_values_dataset(h5_file)
+        field_names = (_get_field_name(values, S102File.depth_keys), _get_field_name(values, S102File.uncertainty_keys))
+        try:
+            file_fills = h5_file["Group_F/BathymetryCoverage"]["fillValue"]
+            fill_values = (float(file_fills[0]), float(file_fills[1]))
+        except KeyError:
+            fill_values = (FILLVALUE, FILLVALUE)
+
+        def read_full_resolution(row_start, row_end):
+            block = values[row_start:row_end]  # one read for both fields
+            return block[field_names[0]], block[field_names[1]]
+
+        read_rows = read_full_resolution
+        shape = values.shape
+        band_rows = values.chunks[0] if values.chunks else 256
+        h5_file.flush()
+        with h5py.File(output_path, "w") as overview_file:
+            overview_file.attrs["sourceShape"] = shape
+            overview_file.attrs["sourceStamp"] = file_stamp(h5_file.filename)
+            overview_file.attrs["fillValue"] = fill_values
+            overview_file.attrs["depthReduction"] = "shoalest"
+            overview_file.attrs["uncertaintyReduction"] = "largest"
+            level = 0
+            while max(shape) > min_size:
+                level += 1
+                band_rows += band_rows % 2  # bands must start on even rows to map onto whole rows of the next level
+                shape = ((shape[0] + 1) // 2, (shape[1] + 1) // 2)
+                group = overview_file.create_group("Level_%02d" % level)
+                group.attrs["factor"] = 2 ** level
+                datasets = [group.create_dataset(name, shape=shape, dtype=numpy.float32, chunks=True, compression='gzip',
+                                                 compression_opts=9, fillvalue=fill) for name, fill in zip((DEPTH, UNCERTAINTY), fill_values)]
+                for row_start in range(0, shape[0] * 2, band_rows):
+                    depth, uncertainty = read_rows(row_start, row_start + band_rows)
+                    for dataset, data, fill in zip(datasets, _reduce_band(depth, uncertainty, fill_values), fill_values):
+                        if (data != fill).any():  # leave empty areas unwritten, like the S102 grid itself
+                            dataset[row_start // 2:row_start // 2 + data.shape[0]] = data
+
+                def read_previous_level(row_start, row_end, datasets=datasets):
+                    return datasets[0][row_start:row_end], datasets[1][row_start:row_end]
+
+                read_rows = read_previous_level
+                band_rows = datasets[0].chunks[0]
+    finally:
+        if h5_file is not input_file:
+            h5_file.close()
+    return output_path
+
+
 def get_valid_epsg() -> list:
     """
     Create and return the list of valid EPSG codes for S-102 version 2.0.
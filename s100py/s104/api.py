@@ -7,8 +7,8 @@ from enum import Enum, IntEnum
 import numpy
 import h5py
 
-from s100py.s1xx import s1xx_sequence, S1xxAttributesBase, S1xxMetadataListBase, S1xxDatasetBase, S1xxGridsBase, S1XXFile, h5py_string_dtype
-from s100py.s100 import S100Root, S100Exception, FeatureContainerDCF2, FeatureInstanceDCF2, FeatureInformation, FeatureInformationDataset, GroupFBase
+from s100py.s1xx import s1xx_sequence, LazyGridField, S1xxAttributesBase, S1xxMetadataListBase, S1xxDatasetBase, S1xxGridsBase, S1XXFile, h5py_string_dtype
+from s100py.s100 import TIME_SERIES_SUFFIX, S100Root, S100Exception, FeatureContainerDCF2, FeatureInstanceDCF2, FeatureInformation, FeatureInformationDataset, GroupFBase
 
 WATER_LEVEL = "WaterLevel"
 
@@ -212,7 +212,7 @@ class GeometryValuesDataset(S1xxGridsBase):
 
 class PositioningGroup(S1xxAttributesBase):
 
-    geometry_values_attribute_name = "geometry_values"
+    geometry_values_attribute_name = "geometryValues"
 
     @property
     def __version__(self) -> int:
@@ -325,11 +325,27 @@ class WaterLevelValues(S1xxGridsBase):
     def get_compound_dtype(self):
         return [self.water_level_height_dtype, self.water_level_trend_dtype]
 
+    def get_fill_values(self):
+        return [FILLVALUE_HEIGHT, FILLVALUE_TREND]
+
+    def get_precisions(self):
+        return [2, None]
+
 
 class WaterLevelGroup(S1xxAttributesBase):
+    """ A Group_NNN of a feature instance.  For the gridded formats (2 and 3) each group is one time,
+    for stationwise time series (Data Coding Format 8) each group is one station holding all of its times
+    and uses the station and start/end time attributes instead of timePoint.
+    """
 
     values_attribute_name = "values"
     time_point_attribute_name = "timePoint"
+    station_name_attribute_name = "stationName"
+    station_identification_attribute_name = "stationIdentification"
+    start_date_time_attribute_name = "startDateTime"
+    end_date_time_attribute_name = "endDateTime"
+    number_of_times_attribute_name = "numberOfTimes"
+    time_record_interval_attribute_name = "timeRecordInterval"
 
     @property
     def values(self) -> WaterLevelValues:
@@ -370,6 +386,126 @@ class WaterLevelGroup(S1xxAttributesBase):
         # pylint: disable=attribute-defined-outside-init
         self.time_point = self.time_point_type()
 
+    @property
+    def station_name(self) -> str:
+        """Name of the station (Data Coding Format 8)"""
+        return self._attributes[self.station_name_attribute_name]
+
+    @station_name.setter
+    def station_name(self, val: str):
+        self._attributes[self.station_name_attribute_name] = val
+
+    @property
+    def station_name_type(self) -> Type[str]:
+        """Attribute datatype"""
+        return str
+
+    def station_name_create(self):
+        """ Creates a blank, empty or zero value for station_name"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.station_name = self.station_name_type()
+
+    @property
+    def station_identification(self) -> str:
+        """Identifier of the station (Data Coding Format 8)"""
+        return self._attributes[self.station_identification_attribute_name]
+
+    @station_identification.setter
+    def station_identification(self, val: str):
+        self._attributes[self.station_identification_attribute_name] = val
+
+    @property
+    def station_identification_type(self) -> Type[str]:
+        """Attribute datatype"""
+        return str
+
+    def station_identification_create(self):
+        """ Creates a blank, empty or zero value for station_identification"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.station_identification = self.station_identification_type()
+
+    @property
+    def start_date_time(self) -> str:
+        """Time of the first value of the station (Data Coding Format 8)"""
+        return self._attributes[self.start_date_time_attribute_name]
+
+    @start_date_time.setter
+    def start_date_time(self, val: str):
+        self._attributes[self.start_date_time_attribute_name] = val
+
+    @property
+    def start_date_time_type(self) -> Type[str]:
+        """Attribute datatype"""
+        return str
+
+    def start_date_time_create(self):
+        """ Creates a blank, empty or zero value for start_date_time"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.start_date_time = self.start_date_time_type()
+
+    @property
+    def end_date_time(self) -> str:
+        """Time of the last value of the station (Data Coding Format 8)"""
+        return self._attributes[self.end_date_time_attribute_name]
+
+    @end_date_time.setter
+    def end_date_time(self, val: str):
+        self._attributes[self.end_date_time_attribute_name] = val
+
+    @property
+    def end_date_time_type(self) -> Type[str]:
+        """Attribute datatype"""
+        return str
+
+    def end_date_time_create(self):
+        """ Creates a blank, empty or zero value for end_date_time"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.end_date_time = self.end_date_time_type()
+
+    @property
+    def number_of_times(self) -> int:
+        """Number of values of the station (Data Coding Format 8)"""
+        return self._attributes[self.number_of_times_attribute_name]
+
+    @number_of_times.setter
+    def number_of_times(self, val: int):
+        self._attributes[self.number_of_times_attribute_name] = val
+
+    @property
+    def number_of_times_type(self) -> Type[numpy.int32]:
+        """Attribute datatype"""
+        return numpy.int32
+
+    def number_of_times_create(self):
+        """ Creates a blank, empty or zero value for number_of_times"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.number_of_times = self.number_of_times_type()
+
+    @property
+    def time_record_interval(self) -> int:
+        """Seconds between the values of the station (Data Coding Format 8)"""
+        return self._attributes[self.time_record_interval_attribute_name]
+
+    @time_record_interval.setter
+    def time_record_interval(self, val: int):
+        self._attributes[self.time_record_interval_attribute_name] = val
+
+    @property
+    def time_record_interval_type(self) -> Type[numpy.int32]:
+        """Attribute datatype"""
+        return numpy.int32
+
+    def time_record_interval_create(self):
+        """ Creates a blank, empty or zero value for time_record_interval"""
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.time_record_interval = self.time_record_interval_type()
+
     @property
     def __version__(self) -> int:
         return 1
@@ -401,6 +537,7 @@ class WaterLevelFeatureInstance(FeatureInstanceDCF2):
     water_level_group_attribute_name = "Group" + r"[\._]\d+"
     uncertainty_dataset_attribute_name = "uncertainty"
     number_of_nodes_attribute_name = "numberOfNodes"
+    number_of_stations_attribute_name = "numberOfStations"
     type_of_water_level_data_attribute_name = "typeOfWaterLevelData"
 
     @property
@@ -438,6 +575,53 @@ class WaterLevelFeatureInstance(FeatureInstanceDCF2):
         # pylint: disable=attribute-defined-outside-init
         self.number_of_nodes = self.number_of_nodes_type()
 
+    @property
+    def number_of_stations(self) -> S1xxAttributesBase:
+        return self._attributes[self.number_of_stations_attribute_name]
+
+    @number_of_stations.setter
+    def number_of_stations(self, val: S1xxAttributesBase):
+        self._attributes[self.number_of_stations_attribute_name] = val
+
+    @property
+    def number_of_stations_type(self) -> Type[numpy.int32]:
+        return numpy.int32
+
+    def number_of_stations_create(self):
+        # noinspection PyAttributeOutsideInit
+        # pylint: disable=attribute-defined-outside-init
+        self.number_of_stations = self.number_of_stations_type()
+
+    def station_time_series(self, station) -> tuple:
+        """ Reads all the values of one station of a stationwise (Data Coding Format 8) instance.
+        Each station is its own contiguous values dataset, so for a file opened with lazy_grids=True this is a single read
+        of one slab of the file, otherwise the values were already read when the file was opened.
+
+        Args:
+            station: index of the station (0 is Group_001) or its stationIdentification
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray, numpy.ndarray): the datetime64 times, waterLevelHeight and waterLevelTrend of the station
+        """
+        groups = self.water_level_group
+        if not isinstance(station, (int, numpy.integer)):
+            identifiers = [grp._attributes.get(grp.station_identification_attribute_name) for grp in groups]
+            try:
+                station = identifiers.index(station)
+            except ValueError:
+                raise S104Exception("No station with identification {}".format(station))
+        grp = groups[station]
+        values = grp.values
+        fields = [val for val in values._attributes.values() if isinstance(val, LazyGridField)]
+        if fields:  # read from a file, read the whole compound slab once rather than once per field
+            data = fields[0].dataset[()]
+            heights, trends = data[values.water_level_height_attribute_name], data[values.water_level_trend_attribute_name]
+        else:
+            heights, trends = numpy.asarray(values.water_level_height), numpy.asarray(values.water_level_trend)
+        start = numpy.datetime64(datetime.datetime.strptime(grp.start_date_time, "%Y%m%dT%H%M%SZ"), "s")
+        times = start + numpy.arange(len(heights)) * numpy.timedelta64(int(grp.time_record_interval), "s")
+        return times, heights, trends
+
     @property
     def uncertainty_dataset(self) -> S1xxDatasetBase:
         """Defines the conversion from python naming to HDF5 (S104) naming"""
@@ -834,3 +1018,49 @@ class S104File(S1XXFile):
 
     def __init__(self, *args, **kywrds):
         super().__init__(*args, root=S104Root, **kywrds)
+
+    def time_series_at(self, points, fields=None, instance: int = 0, use_index: bool = True):
+        """ Water levels at the grid nodes nearest to the points for every time in a feature instance,
+        see :any:`FeatureInstanceDCF2.time_series_at`
+
+        Args:
+            points: sequence of (longitude, latitude) positions
+            fields: name or list of names of the fields, default is waterLevelHeight and waterLevelTrend
+            instance: index of the WaterLevel.NN feature instance, 0 is WaterLevel.01
+            use_index: read from the time-major sidecar made by :any:`build_time_series_index` if it exists
+                and was made from this file as it is now
+
+        Returns:
+            (list, dict): the timePoint of each time and a dict of field name to array of shape (times, points)
+        """
+        feature_instance = self.root.water_level.water_level[instance]
+        index_file = self.filename + TIME_SERIES_SUFFIX if use_index else None
+        series = feature_instance.time_series_at(points, fields, index_file=index_file, source_path=self.filename)
+        return feature_instance.get_time_points(), series
+
+    def station_time_series(self, station, instance: int = 0):
+        """ All the values of one station of a stationwise (Data Coding Format 8) file,
+        see :any:`WaterLevelFeatureInstance.station_time_series`.
+        Open the file with lazy_grids=True to read only this station's values rather than every station's.
+
+        Args:
+            station: index of the station (0 is Group_001) or its stationIdentification
+            instance: index of the WaterLevel.NN feature instance, 0 is WaterLevel.01
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray, numpy.ndarray): the datetime64 times, waterLevelHeight and waterLevelTrend of the station
+        """
+        return self.root.water_level.water_level[instance].station_time_series(station)
+
+    def build_time_series_index(self, instance: int = None, output_path: str = None):
+        """ Makes the time-major sidecar used by :any:`time_series_at`, see :any:`FeatureInstanceDCF2.build_time_series_index`
+
+        Args:
+            instance: index of the WaterLevel.NN feature instance to index, None indexes all of them
+            output_path: path of the sidecar, default is the file name + TIME_SERIES_SUFFIX
+        """
+        if output_path is None:
+            output_path = self.filename + TIME_SERIES_SUFFIX
+        instances = self.root.water_level.water_level
+        for feature_instance in (instances if instance is None else [instances[instance]]):
+            feature_instance.build_time_series_index(output_path, self.filename)
@@ -0,0 +1,433 @@
+import os
+import numpy
+import datetime
+import fire
+import re
+import importlib
+
+import netCDF4
+
+from s100py.s1xx import ordered_imap
+from s100py.s100 import BarycentricRegridder, REGRID_WEIGHTS_SUFFIX
+from s100py.s104 import utils
+
+PRODUCER_CODE = 'USA1'
+DEFAULT_UNCERTAINTY = -1.0
+# m/hr, rates of change below this are a steady water level
+DEFAULT_TREND_THRESHOLD = 0.2
+TYPE_OF_WATER_LEVEL_DATA = 5
+COMMON_POINT_RULE = 4
+INTERPOLATION_TYPE = 10
+VERTICAL_CS = 6498
+VERTICAL_COORDINATE_BASE = 2
+VERTICAL_DATUM_REFERENCE = 1
+VERTICAL_DATUM = 3
+
+MODELTYPE_FVCOM = 'fvcom'
+MODELTYPE_HYCOM = 'hycom'
+MODELTYPE_POM = 'pom'
+MODELTYPE_ROMS = 'roms'
+
+DATETIME_ROUNDING_NEAREST_HOUR = 'nearest_hour'
+
+
+class WaterLevelModelFile:
+    """ Reads the water level of a native model output file.
+
+    The thyme model files only read the currents, this reads the free surface (zeta) at the model nodes
+    directly with netCDF4.  Subclasses name the variables of each model type.
+    Nodes that are never wet (i.e. masked out in the model mask) are dropped, so the same nodes are returned for every time step.
+    """
+    var_zeta = 'zeta'
+    var_lon = 'lon'
+    var_lat = 'lat'
+    var_time = 'time'
+    var_mask = None
+
+    def __init__(self, path, datetime_rounding=None):
+        self.path = path
+        self.datetime_rounding = datetime_rounding
+        self.nc_file = None
+        self.datetime_values = None
+        self._nodes = None
+        self._positions = None
+
+    def open(self):
+        self.nc_file = netCDF4.Dataset(self.path, 'r')
+        time = self.nc_file.variables[self.var_time]
+        values = netCDF4.num2date(time[:], time.units, calendar=getattr(time, 'calendar', 'standard'),
+                                  only_use_cftime_datetimes=False, only_use_python_datetimes=True)
+        self.datetime_values = [self._round(value) for value in numpy.atleast_1d(values)]
+
+    def close(self):
+        if self.nc_file is not None:
+            self.nc_file.close()
+            self.nc_file = None
+
+    def _round(self, value):
+        if self.datetime_rounding == DATETIME_ROUNDING_NEAREST_HOUR:
+            value = (value + datetime.timedelta(minutes=30)).replace(minute=0, second=0, microsecond=0)
+        return value
+
+    def _horizontal_shape(self):
+        return self.nc_file.variables[self.var_zeta].shape[1:]
+
+    def read_positions(self):
+        """ Returns the (longitude, latitude) of the nodes as 1d arrays """
+        if self._positions is not None:
+            return self._positions
+        lon = numpy.ma.filled(self.nc_file.variables[self.var_lon][:], numpy.nan).astype(numpy.float64)
+        lat = numpy.ma.filled(self.nc_file.variables[self.var_lat][:], numpy.nan).astype(numpy.float64)
+        if lon.ndim == 1 and lat.ndim == 1 and len(self._horizontal_shape()) == 2:
+            lon, lat = numpy.meshgrid(lon, lat)
+        lon = numpy.where(lon > 180, lon - 360, lon).ravel()
+        lat = lat.ravel()
+
+        valid = numpy.isfinite(lon) & numpy.isfinite(lat)
+        if self.var_mask is not None and self.var_mask in self.nc_file.variables:
+            valid &= numpy.ma.filled(self.nc_file.variables[self.var_mask][:], 0).ravel() == 1
+        self._nodes = numpy.flatnonzero(valid)
+        self._positions = lon[self._nodes], lat[self._nodes]
+        return self._positions
+
+    def read_water_level(self, time_index):
+        """ Returns the water level of the nodes (see read_positions) at a time step as a 1d masked array """
+        if self._nodes is None:
+            self.read_positions()
+        zeta = self.nc_file.variables[self.var_zeta][time_index]
+        zeta = numpy.ma.masked_invalid(numpy.ma.asarray(zeta, dtype=numpy.float64).ravel()[self._nodes])
+        return zeta
+
+
+class ROMSWaterLevelFile(WaterLevelModelFile):
+    var_lon = 'lon_rho'
+    var_lat = 'lat_rho'
+    var_time = 'ocean_time'
+    var_mask = 'mask_rho'
+
+
+class FVCOMWaterLevelFile(WaterLevelModelFile):
+    pass
+
+
+class POMWaterLevelFile(WaterLevelModelFile):
+    var_mask = 'mask'
+
+
+class HYCOMWaterLevelFile(WaterLevelModelFile):
+    var_zeta = 'surf_el'
+
+
+MODEL_FILE_CLASS = {
+    MODELTYPE_FVCOM: FVCOMWaterLevelFile,
+    MODELTYPE_HYCOM: HYCOMWaterLevelFile,
+    MODELTYPE_POM: POMWaterLevelFile,
+    MODELTYPE_ROMS: ROMSWaterLevelFile
+}
+
+# thyme module and class of the model index files, imported only when a regular grid is read (Data Coding Format 2)
+MODEL_INDEX_CLASS = {
+    MODELTYPE_FVCOM: ('thyme.model.fvcom', 'FVCOMIndexFile'),
+    MODELTYPE_HYCOM: ('thyme.model.hycom', 'HYCOMIndexFile'),
+    MODELTYPE_POM: ('thyme.model.pom', 'POMIndexFile'),
+    MODELTYPE_ROMS: ('thyme.model.roms', 'ROMSIndexFile')
+}
+
+
+PRODUCT_DESCRIPTION_FVCOM = 'FVCOM_Hydrodynamic_Model_Forecasts'
+PRODUCT_DESCRIPTION_HYCOM = 'HYCOM_Hydrodynamic_Model_Forecasts'
+PRODUCT_DESCRIPTION_POM = 'POM_Hydrodynamic_Model_Forecasts'
+PRODUCT_DESCRIPTION_ROMS = 'ROMS_Hydrodynamic_Model_Forecasts'
+
+MODELS = {
+    'cbofs': {
+        'region': 'Chesapeake_Bay',
+        'product': PRODUCT_DESCRIPTION_ROMS,
+        'model_type': MODELTYPE_ROMS,
+        'datetime_rounding': None
+    },
+    'nyofs': {
+
+        'region': 'Port_of_New_York_and_New_Jersey',
+        'product': PRODUCT_DESCRIPTION_POM,
+        'model_type': MODELTYPE_POM,
+        'datetime_rounding': DATETIME_ROUNDING_NEAREST_HOUR
+    },
+    'gomofs': {
+
+        'region': 'Gulf_of_Maine',
+        'product': PRODUCT_DESCRIPTION_ROMS,
+        'model_type': MODELTYPE_ROMS,
+        'datetime_rounding': None
+    }
+}
+
+
+class RegularGrid:
+    """ The regular grid (and its subgrids) of a model index file, read once so it can be sent to worker processes """
+
+    def __init__(self, x, y, mask, subgrids, weights_cache_file=None):
+        self.x = x
+        self.y = y
+        self.mask = mask
+        # list of (name, (y slice, x slice)), the whole grid is a single unnamed subgrid
+        self.subgrids = subgrids
+        self.weights_cache_file = weights_cache_file
+        self._regridder = None
+
+    @classmethod
+    def from_index(cls, model_index, min_valid=20, weights_cache_file=None):
+        """ Reads the grid from an open thyme model index file, subgrids with fewer than min_valid wet cells are skipped.
+        The interpolation weights are stored in weights_cache_file if it is given, see :any:`BarycentricRegridder`.
+        """
+        x = numpy.ma.filled(model_index.var_x[:], numpy.nan).astype(numpy.float64)
+        y = numpy.ma.filled(model_index.var_y[:], numpy.nan).astype(numpy.float64)
+        mask = numpy.ma.filled(model_index.var_mask[:], 0) != 1
+
+        subgrids = []
+        if model_index.dim_subgrid is not None and model_index.var_subgrid_id is not None:
+            for i in range(model_index.dim_subgrid.size):
+                x_min = int(model_index.var_subgrid_x_min[i])
+                x_max = int(model_index.var_subgrid_x_max[i])
+                y_min = int(model_index.var_subgrid_y_min[i])
+                y_max = int(model_index.var_subgrid_y_max[i])
+                subgrid = (slice(y_min, y_max + 1), slice(x_min, x_max + 1))
+                if numpy.count_nonzero(~mask[subgrid]) < min_valid:
+                    continue
+                if model_index.var_subgrid_name is not None:
+                    name = str(model_index.var_subgrid_name[i])
+                else:
+                    name = f'FID_{model_index.var_subgrid_id[i]}'
+                subgrids.append((name, subgrid))
+        else:
+            subgrids.append((None, (slice(None), slice(None))))
+        return cls(x, y, mask, subgrids, weights_cache_file)
+
+    @classmethod
+    def from_index_path(cls, model_type, model_index_path):
+        """ Opens the model index file, reads the grid and closes it again, the weights are cached next to the index file """
+        module_name, class_name = MODEL_INDEX_CLASS[model_type]
+        model_index = getattr(importlib.import_module(module_name), class_name)(model_index_path)
+        try:
+            model_index.open()
+            return cls.from_index(model_index, weights_cache_file=f'{model_index_path}{REGRID_WEIGHTS_SUFFIX}')
+        finally:
+            model_index.close()
+
+    def grid_properties(self, subgrid):
+        """ The grid_properties of a subgrid, see :any:`utils.add_data_from_arrays` """
+        x = self.x[subgrid[1]]
+        y = self.y[subgrid[0]]
+        return {
+            'maxx': numpy.nanmax(numpy.round(x, 7)),
+            'minx': numpy.nanmin(numpy.round(x, 7)),
+            'miny': numpy.nanmin(numpy.round(y, 7)),
+            'maxy': numpy.nanmax(numpy.round(y, 7)),
+            'cellsize_x': self.x[1] - self.x[0],
+            'cellsize_y': self.y[1] - self.y[0],
+            'nx': x.size,
+            'ny': y.size
+        }
+
+    def regridder(self, longitude, latitude):
+        """ The BarycentricRegridder from the nodes to the grid, built (or read from the caches) on the first call
+        and then kept, so the positions are only hashed once.  A RegularGrid is used with one model mesh. """
+        if self._regridder is None:
+            grid_x, grid_y = numpy.meshgrid(self.x, self.y)
+            self._regridder = BarycentricRegridder.from_positions(longitude, latitude, grid_x, grid_y, self.weights_cache_file)
+        return self._regridder
+
+    def regrid(self, longitude, latitude, values):
+        """ Linearly interpolates values at scattered nodes onto the grid, cells that are land, outside the nodes
+        or in a triangle with a masked node are masked """
+        regridded = self.regridder(longitude, latitude).regrid(values)
+        return numpy.ma.masked_array(regridded, self.mask | numpy.isnan(regridded))
+
+
+def water_level_time_step(model_file, time_index, regular_grid=None):
+    """ Reads the water level of one time step, regridded onto the regular grid if one is given.
+
+    Args:
+        model_file: Open WaterLevelModelFile.
+        time_index: Index of the time step in the model file.
+        regular_grid: Optional: RegularGrid to interpolate onto (Data Coding Format 2).
+
+    Returns:
+        Masked array of heights, (y, x) for a regular grid otherwise one per node.
+    """
+    zeta = model_file.read_water_level(time_index)
+    if regular_grid is None:
+        return zeta
+    longitude, latitude = model_file.read_positions()
+    return regular_grid.regrid(longitude, latitude, zeta)
+
+
+# model file and RegularGrid of each conversion, opened on the first time step a worker process converts
+_worker_files = {}
+
+
+def _water_level_time_step(model_file_path, model_type, datetime_rounding, model_index_path, time_index):
+    """ Worker process entry point of water_level_time_step, the files stay open for the life of the process """
+    key = (model_file_path, model_type, datetime_rounding, model_index_path)
+    if key not in _worker_files:
+        model_file = MODEL_FILE_CLASS[model_type](model_file_path, datetime_rounding=datetime_rounding)
+        model_file.open()
+        regular_grid = None
+        if model_index_path is not None:
+            regular_grid = RegularGrid.from_index_path(model_type, model_index_path)
+        _worker_files[key] = model_file, regular_grid
+    model_file, regular_grid = _worker_files[key]
+    return water_level_time_step(model_file, time_index, regular_grid)
+
+
+class CLI:
+    """
+    Container for methods exposed through CLI via Python Fire.
+    """
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def generate_metadata_dict(filename, model_name, model_file):
+
+        metadata = {
+            'horizontalCRS': 4326,
+            'metadata': f'MD_{filename}.XML',
+            'geographicIdentifier': MODELS[model_name]['region'],
+            'waterLevelHeightUncertainty': DEFAULT_UNCERTAINTY,
+            'verticalUncertainty': DEFAULT_UNCERTAINTY,
+            'horizontalPositionUncertainty': DEFAULT_UNCERTAINTY,
+            'timeUncertainty': DEFAULT_UNCERTAINTY,
+            'waterLevelTrendThreshold': DEFAULT_TREND_THRESHOLD,
+            'verticalCS': VERTICAL_CS,
+            'verticalCoordinateBase': VERTICAL_COORDINATE_BASE,
+            'verticalDatumReference': VERTICAL_DATUM_REFERENCE,
+            'verticalDatum': VERTICAL_DATUM,
+            'commonPointRule': COMMON_POINT_RULE,
+            'interpolationType': INTERPOLATION_TYPE,
+            'typeOfWaterLevelData': TYPE_OF_WATER_LEVEL_DATA,
+            'methodWaterLevelProduct': MODELS[model_name]['product'],
+            'datetimeOfFirstRecord': model_file.datetime_values[0].strftime('%Y%m%dT%H%M%SZ')
+        }
+
+        return metadata
+
+    def convert(self, model_file_path, output_path, data_coding_format, model_index_path=None, max_workers=1, quantize=False):
+        """Convert the water levels of a NetCDF hydrodynamic model to S104 format.
+
+        The time steps are read (and regridded for Data Coding Format 2), optionally in a pool of worker processes,
+        and streamed in order into the S104 files, with the trend of each step computed from the steps on either side.
+        Each time step is regridded once and written to the file of every subgrid.  The interpolation weights are computed
+        for the first model run and stored next to the model index file, later runs on the same mesh only read them.
+
+        Args:
+            model_file_path: Path to native ofs model file.
+            output_path:  Path to output hdf5 file.
+            data_coding_format: 2: Regularly-gridded arrays
+                                3: Ungeorectified gridded arrays
+            model_index_path: Path to model index file, required for Data Coding Format 2.
+            max_workers: Optional: Number of worker processes, None uses the number of cpus and the default
+                of 1 converts in this process.
+            quantize: Optional: Store the heights quantized to centimeters for smaller files.
+
+        Returns:
+            List of paths to HDF5 files created.
+        """
+        if data_coding_format not in (2, 3):
+            raise ValueError(f'Data Coding Format {data_coding_format} is not supported, use 2 or 3')
+        if data_coding_format == 2 and model_index_path is None:
+            raise ValueError('A model index file is required for Data Coding Format 2')
+
+        s104_path_prefix = os.path.normpath(output_path)
+        if not os.path.isdir(s104_path_prefix):
+            s104_path_prefix = os.path.split(s104_path_prefix)[0]
+        model_filename = os.path.split(model_file_path)[-1]
+        model_name = model_filename.split('.')[1]
+        model_type = MODELS[model_name]['model_type']
+        datetime_rounding = MODELS[model_name]['datetime_rounding']
+
+        file_date = re.findall(r'\d{8}', model_filename)[0]
+        cycletime = re.findall(r'(?<=t)[^t:]+(?=:?z)', model_filename)[0]
+        file_issuance = f"{file_date}T{cycletime}Z"
+        s104_filename = f'104{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}'
+
+        regular_grid = None
+        if data_coding_format == 2:
+            regular_grid = RegularGrid.from_index_path(model_type, model_index_path)
+
+        model_file = MODEL_FILE_CLASS[model_type](model_file_path, datetime_rounding=datetime_rounding)
+        data_files = []
+        try:
+            model_file.open()
+            datetime_values = model_file.datetime_values
+            if regular_grid is not None:
+                # build (or load) the interpolation weights once here, the worker processes only read them
+                regular_grid.regridder(*model_file.read_positions())
+                outputs = [(name, subgrid, regular_grid.grid_properties(subgrid)) for name, subgrid in regular_grid.subgrids]
+            else:
+                longitude, latitude = model_file.read_positions()
+                outputs = [(None, slice(None), {
+                    'maxx': numpy.nanmax(numpy.round(longitude, 7)),
+                    'minx': numpy.nanmin(numpy.round(longitude, 7)),
+                    'miny': numpy.nanmin(numpy.round(latitude, 7)),
+                    'maxy': numpy.nanmax(numpy.round(latitude, 7)),
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'nodes': longitude.size
+                })]
+
+            s104_paths = []
+            for name, subgrid, grid_properties in outputs:
+                filename = s104_filename if name is None else f'{s104_filename}_{name}'
+                path = os.path.join(s104_path_prefix, f'{filename}.h5')
+                data_file = utils.create_s104(path)
+                utils.add_metadata(self.generate_metadata_dict(filename, model_name, model_file), data_file)
+                s104_paths.append(path)
+                data_files.append(data_file)
+
+            hours = [(value - datetime_values[0]).total_seconds() / 3600.0 for value in datetime_values]
+            time_indices = range(len(datetime_values))
+            if max_workers is not None and max_workers <= 1:
+                heights = (water_level_time_step(model_file, time_index, regular_grid) for time_index in time_indices)
+            else:
+                index_path = model_index_path if regular_grid is not None else None
+                step_args = ((model_file_path, model_type, datetime_rounding, index_path, time_index) for time_index in time_indices)
+                heights = ordered_imap(_water_level_time_step, step_args, max_workers)
+            steps = utils.iter_water_level_trends_of_steps(heights, DEFAULT_TREND_THRESHOLD, hours)
+            for value, (height, trend) in zip(datetime_values, steps):
+                datetime_value = value.strftime('%Y%m%dT%H%M%SZ')
+                for data_file, (name, subgrid, grid_properties) in zip(data_files, outputs):
+                    utils.add_data_from_arrays(height[subgrid], trend[subgrid], data_file, grid_properties, datetime_value,
+                                               data_coding_format, stream=True, quantize=quantize)
+
+            if len(datetime_values) == 1:
+                interval_sec = 0
+            else:
+                interval = datetime_values[1] - datetime_values[0]
+                interval_sec = int(interval.total_seconds())
+
+            update_meta = {
+                'dateTimeOfLastRecord': datetime_values[-1].strftime('%Y%m%dT%H%M%SZ'),
+                'numberOfGroups': len(datetime_values),
+                'numberOfTimes': len(datetime_values),
+                'timeRecordInterval': interval_sec,
+                'num_instances': 1,
+            }
+            for data_file, (name, subgrid, grid_properties) in zip(data_files, outputs):
+                utils.update_metadata(data_file, grid_properties, update_meta)
+                utils.write_data_file(data_file)
+        finally:
+            for data_file in data_files:
+                if data_file.id.valid:
+                    data_file.close()
+            model_file.close()
+
+        return s104_paths
+
+
+def main():
+    fire.Fire(CLI())
+
+
+if __name__ == "__main__":
+    main()
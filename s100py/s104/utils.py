@@ -4,11 +4,14 @@
 import logging
 import sys
 import datetime
+import collections
+import itertools
+from typing import Callable
 
 import numpy
 
-from ..s1xx import s1xx_sequence
-from .api import S104File, FILLVALUE_HEIGHT, FILLVALUE_TREND, S104Exception
+from ..s1xx import s1xx_sequence, constant_array, ordered_imap
+from .api import S104File, WaterLevelFeatureInstance, FILLVALUE_HEIGHT, FILLVALUE_TREND, S104Exception, WaterLevelTrend
 
 
 def _get_S104File(output_file):
@@ -204,18 +207,10 @@ def add_metadata(metadata: dict, data_file) -> S104File:
 
     water_level_feature = root.water_level
     water_level_feature.water_level_create()
-    water_level_feature_instance_01 = water_level_feature.water_level.append_new_item()
-
-    water_level_feature_instance_01.water_level_group_create()
-
-    water_level_feature_instance_01.uncertainty_dataset_create()
-    water_level_height_uncertainty = water_level_feature_instance_01.uncertainty_dataset.append_new_item()
-    water_level_height_uncertainty.name = "waterLevelHeight"
-    water_level_height_uncertainty.value = metadata["waterLevelHeightUncertainty"]
+    add_feature_instance(metadata, data_file)
 
     water_level_feature.min_dataset_height = 0
     water_level_feature.max_dataset_height = 0
-    water_level_feature_instance_01.time_record_interval = 0
 
     root.product_specification = S104File.PRODUCT_SPECIFICATION
     root.metadata = metadata["metadata"]
@@ -232,13 +227,48 @@ def add_metadata(metadata: dict, data_file) -> S104File:
     water_level_feature.vertical_uncertainty = metadata["verticalUncertainty"]
     water_level_feature.horizontal_position_uncertainty = metadata["horizontalPositionUncertainty"]
     water_level_feature.method_water_level_product = metadata["methodWaterLevelProduct"]
-    water_level_feature_instance_01.type_of_water_level_data = metadata["typeOfWaterLevelData"]
-    water_level_feature_instance_01.date_time_of_first_record = metadata["datetimeOfFirstRecord"]
 
     return data_file
 
 
-def add_data_from_arrays(height: s1xx_sequence, trend, data_file, grid_properties: dict, datetime_value, data_coding_format) -> S104File:
+def add_feature_instance(metadata: dict, data_file) -> WaterLevelFeatureInstance:
+    """  Adds another water level feature instance (WaterLevel.NN) to an S104File, i.e. a subgrid of a regional model
+        with its own grid and time groups.  :any:`add_metadata` adds the first one (WaterLevel.01),
+        pass the index of the instance to :any:`add_data_from_arrays` to fill in the others.
+
+        Parameters
+        ----------
+        metadata
+            a dictionary of metadata for the instance, uses the "waterLevelHeightUncertainty",
+            "typeOfWaterLevelData" and "datetimeOfFirstRecord" keys described in :any:`add_metadata`
+        data_file
+            S104File object that :any:`add_metadata` was called on
+
+        Returns
+        -------
+        WaterLevelFeatureInstance
+            The new feature instance, its index is len(data_file.root.water_level.water_level) - 1
+        """
+    water_level_feature = data_file.root.water_level
+    water_level_feature_instance = water_level_feature.water_level.append_new_item()
+
+    water_level_feature_instance.water_level_group_create()
+
+    water_level_feature_instance.uncertainty_dataset_create()
+    water_level_height_uncertainty = water_level_feature_instance.uncertainty_dataset.append_new_item()
+    water_level_height_uncertainty.name = "waterLevelHeight"
+    water_level_height_uncertainty.value = metadata["waterLevelHeightUncertainty"]
+
+    water_level_feature_instance.time_record_interval = 0
+    water_level_feature_instance.type_of_water_level_data = metadata["typeOfWaterLevelData"]
+    water_level_feature_instance.date_time_of_first_record = metadata["datetimeOfFirstRecord"]
+    water_level_feature.num_instances = len(water_level_feature.water_level)
+
+    return water_level_feature_instance
+
+
+def add_data_from_arrays(height: s1xx_sequence, trend, data_file, grid_properties: dict, datetime_value, data_coding_format, stream: bool = False,
+                         quantize: bool = False, instance: int = 0) -> S104File:
     """  Updates an S104File object based on numpy array/h5py datasets.
         Calls :any:`create_s104` then fills in the HDF5 datasets with the
         supplied water level height and trend numpy.arrays.
@@ -251,7 +281,7 @@ def add_data_from_arrays(height: s1xx_sequence, trend, data_file, grid_propertie
         height
             1d or 2d array containing water level heights
         trend
-            1d or 2d array containing water level trends
+            1d or 2d array containing water level trends, or None to write the trend fill value (unknown) for every point
         data_file
             S104File object
         datetime_value
@@ -277,6 +307,17 @@ def add_data_from_arrays(height: s1xx_sequence, trend, data_file, grid_propertie
             - 'TIN': 7
             - 'Time Series at fixed stations (stationwise)': 8
 
+        stream
+            If True the new Group_NNN is written to the file immediately, along with the updated min/max,
+            numGRP and dateTimeOfLastRecord attributes, and the arrays are released so only one time step is held in memory.
+            The data_file must be open for writing, :any:`write_data_file` still has to be called at the end.
+
+        quantize
+            If True the values are stored quantized to their precision (see :any:`quantize_array`) with the shuffle filter,
+            they read back the same at that precision and the file is considerably smaller.
+        instance
+            index of the WaterLevel.NN feature instance to add to, 0 is WaterLevel.01, see :any:`add_feature_instance`
+
         Returns
         -------
         data_file
@@ -285,36 +326,39 @@ def add_data_from_arrays(height: s1xx_sequence, trend, data_file, grid_propertie
         """
     root = data_file.root
     water_level_feature = root.water_level
-    water_level_feature_instance_01 = root.water_level.water_level[0]
+    water_level_feature_instance = root.water_level.water_level[instance]
 
     if data_coding_format == 2:
         water_level_feature.data_coding_format = data_coding_format
-        water_level_feature_instance_01.start_sequence = "0,0"
+        water_level_feature_instance.start_sequence = "0,0"
         water_level_feature.sequencing_rule_scan_direction = "longitude, latitude"
         water_level_feature.sequencing_rule_type = 1
-        water_level_feature_instance_01.grid_origin_longitude = grid_properties['minx']
-        water_level_feature_instance_01.grid_origin_latitude = grid_properties['miny']
-        water_level_feature_instance_01.grid_spacing_longitudinal = grid_properties['cellsize_x']
-        water_level_feature_instance_01.grid_spacing_latitudinal = grid_properties['cellsize_y']
+        water_level_feature_instance.grid_origin_longitude = grid_properties['minx']
+        water_level_feature_instance.grid_origin_latitude = grid_properties['miny']
+        water_level_feature_instance.grid_spacing_longitudinal = grid_properties['cellsize_x']
+        water_level_feature_instance.grid_spacing_latitudinal = grid_properties['cellsize_y']
 
-        water_level_feature_instance_01.num_points_latitudinal = grid_properties['ny']
-        water_level_feature_instance_01.num_points_longitudinal = grid_properties['nx']
+        water_level_feature_instance.num_points_latitudinal = grid_properties['ny']
+        water_level_feature_instance.num_points_longitudinal = grid_properties['nx']
 
     elif data_coding_format == 3:
         water_level_feature.data_coding_format = data_coding_format
-        water_level_feature_instance_01.number_of_nodes = grid_properties['nodes']
+        water_level_feature_instance.number_of_nodes = grid_properties['nodes']
 
-        water_level_feature_instance_01.positioning_group_create()
-        positioning = water_level_feature_instance_01.positioning_group
+        water_level_feature_instance.positioning_group_create()
+        positioning = water_level_feature_instance.positioning_group
         positioning.geometry_values_create()
         geometry_values = positioning.geometry_values
         geometry_values.longitude = grid_properties['longitude']
         geometry_values.latitude = grid_properties['latitude']
 
-    water_level_feature_instance_01.east_bound_longitude = grid_properties['minx']
-    water_level_feature_instance_01.west_bound_longitude = grid_properties['maxx']
-    water_level_feature_instance_01.south_bound_latitude = grid_properties['miny']
-    water_level_feature_instance_01.north_bound_latitude = grid_properties['maxy']
+    elif data_coding_format == 8:
+        raise S104Exception("Stationwise time series (Data Coding Format 8) hold all times of a station, use add_stationwise_data_from_arrays")
+
+    water_level_feature_instance.east_bound_longitude = grid_properties['minx']
+    water_level_feature_instance.west_bound_longitude = grid_properties['maxx']
+    water_level_feature_instance.south_bound_latitude = grid_properties['miny']
+    water_level_feature_instance.north_bound_latitude = grid_properties['maxy']
     root.water_level.dimension = height.ndim
 
     water_level_feature.axis_names = numpy.array(["longitude", "latitude"])
@@ -332,23 +376,372 @@ def add_data_from_arrays(height: s1xx_sequence, trend, data_file, grid_propertie
         height = height.filled(FILLVALUE_HEIGHT)
 
     height = numpy.round(height, decimals=2)
-    trend.astype(int)
+    if trend is None:  # unknown trend everywhere, stored without allocating a grid
+        trend = constant_array(height.shape, FILLVALUE_TREND, numpy.uint8)
 
     if height.shape != trend.shape:
         raise S104Exception("Water level height & trend grids have different shapes")
 
-    water_level_group_object = water_level_feature_instance_01.water_level_group.append_new_item()
+    water_level_group_object = water_level_feature_instance.water_level_group.append_new_item()
     water_level_group_object.time_point = datetime_value
 
     water_level_group_object.values_create()
     grid = water_level_group_object.values
     grid.water_level_height = height
     grid.water_level_trend = trend
+    grid.quantize = quantize
+
+    if stream:
+        water_level_feature_instance.write_incremental(data_file, water_level_feature)
+
+    return data_file
+
+
+def add_stationwise_data_from_arrays(heights: s1xx_sequence, trends, data_file, station_properties: dict, datetime_values,
+                                     instance: int = 0) -> S104File:
+    """  Updates an S104File object with time series at fixed stations stored stationwise (Data Coding Format 8).
+        Each station becomes one Group_NNN whose values dataset holds every time of that station,
+        stored contiguously so reading a station touches a single slab of the file.
+
+        Raises an S104Exception if the shapes don't match or the times are not evenly spaced.
+
+        Parameters
+        ----------
+        heights
+            2d array of water level heights with one row per station and one column per time, may be masked
+        trends
+            2d array of water level trends the same shape as heights, or None to derive them with
+            :any:`compute_water_level_trend` using the waterLevelTrendThreshold of the file
+        data_file
+            S104File object
+        station_properties
+            a dictionary of metadata describing the stations,
+            metadata can have the following key/value pairs:
+                - "longitude": longitude of each station
+                - "latitude": latitude of each station
+                - "name": Optional, name of each station
+                - "identification": Optional, identifier of each station, default is the station number
+        datetime_values
+            datetime of each column, evenly spaced
+        instance
+            index of the WaterLevel.NN feature instance to add to, 0 is WaterLevel.01, see :any:`add_feature_instance`
+
+        Returns
+        -------
+        data_file
+            An S104File object updated by this function.
+
+        """
+    root = data_file.root
+    water_level_feature = root.water_level
+    water_level_feature_instance = root.water_level.water_level[instance]
+
+    if len(heights.shape) != 2:
+        raise S104Exception("Stationwise heights must be 2d (station, time), got shape {}".format(heights.shape))
+    num_stations, num_times = heights.shape
+    if len(datetime_values) != num_times:
+        raise S104Exception("{} datetimes supplied for {} times".format(len(datetime_values), num_times))
+    longitude = numpy.asarray(station_properties['longitude'], dtype=numpy.float64)
+    latitude = numpy.asarray(station_properties['latitude'], dtype=numpy.float64)
+    if longitude.shape != (num_stations,) or latitude.shape != (num_stations,):
+        raise S104Exception("longitude and latitude must have one value per station ({})".format(num_stations))
+    intervals = {(later - earlier).total_seconds() for earlier, later in zip(datetime_values[:-1], datetime_values[1:])}
+    if len(intervals) > 1:
+        raise S104Exception("Stationwise times must be evenly spaced, found intervals of {} seconds".format(sorted(intervals)))
+    interval = int(intervals.pop()) if intervals else 0
+
+    if trends is None:
+        hours = numpy.arange(num_times) * interval / 3600.0
+        # the trend is computed along the first axis, so compute on the transpose (time, station)
+        trends = compute_water_level_trend(numpy.ma.asarray(heights).T, root.water_level_trend_threshold, hours).T
+    if trends.shape != heights.shape:
+        raise S104Exception("Water level height & trend arrays have different shapes")
+
+    water_level_feature.data_coding_format = 8
+    water_level_feature.axis_names = numpy.array(["longitude", "latitude"])
+    water_level_feature_instance.number_of_stations = num_stations
+    water_level_feature_instance.positioning_group_create()
+    positioning = water_level_feature_instance.positioning_group
+    positioning.geometry_values_create()
+    positioning.geometry_values.longitude = longitude
+    positioning.geometry_values.latitude = latitude
+
+    water_level_feature_instance.west_bound_longitude = numpy.nanmin(longitude)
+    water_level_feature_instance.east_bound_longitude = numpy.nanmax(longitude)
+    water_level_feature_instance.south_bound_latitude = numpy.nanmin(latitude)
+    water_level_feature_instance.north_bound_latitude = numpy.nanmax(latitude)
+
+    min_height = numpy.round(numpy.nanmin(heights), decimals=2)
+    max_height = numpy.round(numpy.nanmax(heights), decimals=2)
+    if min_height < water_level_feature.min_dataset_height:
+        water_level_feature.min_dataset_height = min_height
+    if max_height > water_level_feature.max_dataset_height:
+        water_level_feature.max_dataset_height = max_height
+
+    if numpy.ma.is_masked(heights):
+        heights = heights.filled(FILLVALUE_HEIGHT)
+    # one C ordered array so every station row is a contiguous block that is written with a single copy
+    heights = numpy.ascontiguousarray(numpy.round(heights, decimals=2), dtype=numpy.float32)
+    trends = numpy.ascontiguousarray(trends, dtype=numpy.uint8)
+
+    start = datetime_values[0].strftime('%Y%m%dT%H%M%SZ') if num_times else ""
+    end = datetime_values[-1].strftime('%Y%m%dT%H%M%SZ') if num_times else ""
+    names = station_properties.get('name')
+    identifications = station_properties.get('identification')
+    for station in range(num_stations):
+        water_level_group_object = water_level_feature_instance.water_level_group.append_new_item()
+        water_level_group_object.station_identification = str(identifications[station]) if identifications is not None else "{:d}".format(station + 1)
+        if names is not None:
+            water_level_group_object.station_name = str(names[station])
+        water_level_group_object.start_date_time = start
+        water_level_group_object.end_date_time = end
+        water_level_group_object.number_of_times = num_times
+        water_level_group_object.time_record_interval = interval
+
+        water_level_group_object.values_create()
+        grid = water_level_group_object.values
+        grid.contiguous = True
+        grid.water_level_height = heights[station]
+        grid.water_level_trend = trends[station]
+
+    water_level_feature_instance.num_grp = len(water_level_feature_instance.water_level_group)
+    water_level_feature_instance.number_of_times = num_times
+    water_level_feature_instance.time_record_interval = interval
+    water_level_feature_instance.date_time_of_first_record = start
+    water_level_feature_instance.date_time_of_last_record = end
+
+    return data_file
+
 
+def compute_water_level_trend(heights, threshold: float, hours=None) -> numpy.ndarray:
+    """  Computes the water level trend of every node at every time step of a height cube.
+        The rate of change at each step is the centered difference of the steps before and after it
+        (one sided at the first and last step) and is compared against the threshold:
+        more than +threshold is Increasing, less than -threshold is Decreasing and anything else is Steady.
+        Nodes that are missing at the step or at a step used in the difference get the trend fill value (unknown).
+
+        Parameters
+        ----------
+        heights
+            (time, y, x) or (time, node) array of water level heights in meters.
+            Missing heights may be masked, NaN or FILLVALUE_HEIGHT.
+        threshold
+            waterLevelTrendThreshold, the rate of change in meters/hour below which the water level is steady
+        hours
+            time of each step in hours (any origin), the default is one hour between steps
+
+        Returns
+        -------
+        numpy.ndarray
+            uint8 array the same shape as heights holding WaterLevelTrend values or FILLVALUE_TREND
+        """
+    data = numpy.array(numpy.ma.getdata(heights), dtype=numpy.float64)
+    data[numpy.ma.getmaskarray(heights) | (data == FILLVALUE_HEIGHT)] = numpy.nan
+    num_times = data.shape[0]
+    trend = numpy.full(data.shape, FILLVALUE_TREND, dtype=numpy.uint8)
+    if num_times < 2:
+        return trend
+    hours = numpy.arange(num_times, dtype=numpy.float64) if hours is None else numpy.asarray(hours, dtype=numpy.float64)
+    if hours.shape != (num_times,):
+        raise S104Exception("hours must have one value per time step, got {} for {} steps".format(hours.shape, num_times))
+    hours = hours.reshape((num_times,) + (1,) * (data.ndim - 1))
+
+    rate = numpy.empty_like(data)
+    rate[1:-1] = (data[2:] - data[:-2]) / (hours[2:] - hours[:-2])
+    rate[0] = (data[1] - data[0]) / (hours[1] - hours[0])
+    rate[-1] = (data[-1] - data[-2]) / (hours[-1] - hours[-2])
+
+    known = numpy.isfinite(rate) & numpy.isfinite(data)
+    trend[known] = WaterLevelTrend.Steady
+    trend[known & (rate > threshold)] = WaterLevelTrend.Increasing
+    trend[known & (rate < -threshold)] = WaterLevelTrend.Decreasing
+    return trend
+
+
+def iter_water_level_trends(heights: s1xx_sequence, threshold: float, hours=None, block_size: int = 24):
+    """  Computes the water level trends of a height cube a block of time steps at a time and yields them one step at a time,
+        so a cube stored in an h5py dataset or numpy.memmap is never read into memory all at once.
+        Each block is read with one extra step on either side so the results match :any:`compute_water_level_trend` of the whole cube.
+
+        Parameters
+        ----------
+        heights
+            (time, y, x) or (time, node) array of water level heights, see :any:`compute_water_level_trend`
+        threshold
+            waterLevelTrendThreshold in meters/hour
+        hours
+            time of each step in hours, the default is one hour between steps
+        block_size
+            number of time steps computed at once
+
+        Returns
+        -------
+        Iterator
+            (height, trend) for each time step
+        """
+    num_times = heights.shape[0]
+    hours = numpy.arange(num_times, dtype=numpy.float64) if hours is None else numpy.asarray(hours, dtype=numpy.float64)
+    block_size = max(int(block_size), 1)
+    for start in range(0, num_times, block_size):
+        stop = min(start + block_size, num_times)
+        read_start, read_stop = max(start - 1, 0), min(stop + 1, num_times)
+        block = heights[read_start:read_stop]
+        trends = compute_water_level_trend(block, threshold, hours[read_start:read_stop])
+        for index in range(start - read_start, stop - read_start):
+            yield block[index], trends[index]
+
+
+def iter_water_level_trends_of_steps(heights, threshold: float, hours=None):
+    """  Computes the water level trends of time steps that arrive one at a time, i.e. from a model converter,
+        and yields each step with its trend as soon as the step after it is known.
+        Only three steps are held at once and the results match :any:`compute_water_level_trend` of the whole cube.
+
+        Parameters
+        ----------
+        heights
+            iterable of (y, x) or (node) arrays of water level heights in time order, see :any:`compute_water_level_trend`
+        threshold
+            waterLevelTrendThreshold in meters/hour
+        hours
+            iterable of the time of each step in hours, the default is one hour between steps
+
+        Returns
+        -------
+        Iterator
+            (height, trend) for each time step
+        """
+    window = collections.deque(maxlen=3)
+    window_hours = collections.deque(maxlen=3)
+    started = False
+    for height, hour in zip(heights, itertools.count() if hours is None else hours):
+        window.append(height)
+        window_hours.append(hour)
+        if len(window) == 2 and not started:
+            started = True
+            yield window[0], compute_water_level_trend(numpy.ma.stack(window), threshold, window_hours)[0]
+        elif len(window) == 3:
+            yield window[1], compute_water_level_trend(numpy.ma.stack(window), threshold, window_hours)[1]
+    if window:
+        yield window[-1], compute_water_level_trend(numpy.ma.stack(window), threshold, window_hours)[-1]
+
+
+def add_data_from_height_cube(heights: s1xx_sequence, data_file, grid_properties: dict, datetime_values, data_coding_format,
+                              stream: bool = False, block_size: int = 24, quantize: bool = False, instance: int = 0) -> S104File:
+    """  Adds every time step of a height cube to an S104File with the water level trends derived from the heights,
+        see :any:`compute_water_level_trend`.  The trend threshold is the waterLevelTrendThreshold of the file,
+        so :any:`add_metadata` must be called first.
+
+        Parameters
+        ----------
+        heights
+            (time, y, x) or (time, node) array of water level heights, numpy array, h5py dataset or numpy.memmap
+        data_file
+            S104File object
+        grid_properties
+            a dictionary of metadata describing the grids, see :any:`add_data_from_arrays`
+        datetime_values
+            datetime of each time step
+        data_coding_format
+            - 'Regularly-Gridded arrays': 2
+            - 'Ungeorectified Grid': 3
+        stream
+            write each time step as it is added, see :any:`add_data_from_arrays`
+        block_size
+            number of time steps to compute trends for at once
+        quantize
+            store the heights quantized to their precision, see :any:`add_data_from_arrays`
+        instance
+            index of the WaterLevel.NN feature instance to add to, 0 is WaterLevel.01, see :any:`add_feature_instance`
+
+        Returns
+        -------
+        data_file
+            An S104File object updated by this function.
+        """
+    if len(datetime_values) != heights.shape[0]:
+        raise S104Exception("{} datetimes supplied for {} time steps".format(len(datetime_values), heights.shape[0]))
+    try:
+        threshold = data_file.root.water_level_trend_threshold
+    except KeyError:
+        raise S104Exception("waterLevelTrendThreshold is not set, call add_metadata before adding data")
+    hours = numpy.array([(value - datetime_values[0]).total_seconds() / 3600.0 for value in datetime_values])
+    steps = iter_water_level_trends(heights, threshold, hours, block_size)
+    for datetime_value, (height, trend) in zip(datetime_values, steps):
+        add_data_from_arrays(height, trend, data_file, grid_properties, datetime_value, data_coding_format, stream=stream,
+                             quantize=quantize, instance=instance)
+    return data_file
+
+
+def add_instances_in_parallel(data_file, metadata: dict, prepare_instance: Callable, instance_args, data_coding_format,
+                              max_workers: int = 1, stream: bool = False, quantize: bool = False) -> S104File:
+    """  Fills in one water level feature instance (WaterLevel.NN) per subgrid, with the subgrids optionally prepared in parallel.
+        With max_workers other than 1, prepare_instance runs in a pool of worker processes, one call per item of
+        instance_args, while this process is the single writer that adds the results to the file in order as they finish (see :any:`ordered_imap`).
+        An instance made by :any:`add_metadata` that has no data yet is used for the first subgrid,
+        the rest are added with :any:`add_feature_instance`.  The bounds of the file become the extent of all the subgrids.
+
+        Parameters
+        ----------
+        data_file
+            S104File object that :any:`add_metadata` was called on
+        metadata
+            metadata used for new feature instances, see :any:`add_feature_instance`
+        prepare_instance
+            a module level (picklable) function called as prepare_instance(*args) for each item in instance_args.
+            It returns (grid_properties, datetime_values, heights, trends) with heights being a (time, y, x) or (time, node) cube
+            and trends a cube of the same shape or None to derive them with :any:`compute_water_level_trend`.
+            grid_properties are described in :any:`add_data_from_arrays`.
+        instance_args
+            iterable of argument tuples, one per feature instance
+        data_coding_format
+            - 'Regularly-Gridded arrays': 2
+            - 'Ungeorectified Grid': 3
+        max_workers
+            number of worker processes, None uses the number of cpus and the default of 1 prepares everything in this process
+        stream
+            write each time step as it is added, see :any:`add_data_from_arrays`
+        quantize
+            store the heights quantized to their precision, see :any:`add_data_from_arrays`
+
+        Returns
+        -------
+        data_file
+            An S104File object updated by this function.
+        """
+    water_level_instances = data_file.root.water_level.water_level
+    extent = {}
+    for grid_properties, datetime_values, heights, trends in ordered_imap(prepare_instance, instance_args, max_workers):
+        empty = [index for index, feature_instance in enumerate(water_level_instances) if len(feature_instance.water_level_group) == 0]
+        if empty:
+            instance = empty[0]
+        else:
+            add_feature_instance(metadata, data_file)
+            instance = len(water_level_instances) - 1
+        water_level_instances[instance].date_time_of_first_record = datetime_values[0].strftime('%Y%m%dT%H%M%SZ')
+
+        if trends is None:
+            add_data_from_height_cube(heights, data_file, grid_properties, datetime_values, data_coding_format,
+                                      stream=stream, quantize=quantize, instance=instance)
+        else:
+            for datetime_value, height, trend in zip(datetime_values, heights, trends):
+                add_data_from_arrays(height, trend, data_file, grid_properties, datetime_value, data_coding_format,
+                                     stream=stream, quantize=quantize, instance=instance)
+
+        for key, combine in (("minx", min), ("miny", min), ("maxx", max), ("maxy", max)):
+            extent[key] = combine(extent.get(key, grid_properties[key]), grid_properties[key])
+        interval = int((datetime_values[1] - datetime_values[0]).total_seconds()) if len(datetime_values) > 1 else 0
+        update_meta = {
+            'dateTimeOfLastRecord': datetime_values[-1].strftime('%Y%m%dT%H%M%SZ'),
+            'numberOfGroups': len(datetime_values),
+            'numberOfTimes': len(datetime_values),
+            'timeRecordInterval': interval,
+            'num_instances': len(water_level_instances)
+        }
+        update_metadata(data_file, extent, update_meta, instance=instance)
     return data_file
 
 
-def update_metadata(data_file, grid_properties: dict, update_meta: dict) -> S104File:
+def update_metadata(data_file, grid_properties: dict, update_meta: dict, instance: int = 0) -> S104File:
     """  Updates an S104File object based on dynamic metadata.
 
           Parameters
@@ -378,6 +771,8 @@ def update_metadata(data_file, grid_properties: dict, update_meta: dict) -> S104
                   - "numberOfTimes": Number of valid times
                   - "timeRecordInterval": Time between forecasts in seconds
                   - "num_instances": Number of water level feature instances
+          instance
+              index of the WaterLevel.NN feature instance to update, 0 is WaterLevel.01
 
           Returns
           -------
@@ -387,13 +782,13 @@ def update_metadata(data_file, grid_properties: dict, update_meta: dict) -> S104
           """
     root = data_file.root
     water_level_feature = root.water_level
-    water_level_feature.num_instances = update_meta["num_instances"]
-    water_level_feature_instance_01 = root.water_level.water_level[0]
+    water_level_feature.num_instances = update_meta.get("num_instances", len(water_level_feature.water_level))
+    water_level_feature_instance = root.water_level.water_level[instance]
 
-    water_level_feature_instance_01.date_time_of_last_record = update_meta['dateTimeOfLastRecord']
-    water_level_feature_instance_01.num_grp = update_meta['numberOfGroups']
-    water_level_feature_instance_01.number_of_times = update_meta['numberOfTimes']
-    water_level_feature_instance_01.time_record_interval = update_meta['timeRecordInterval']
+    water_level_feature_instance.date_time_of_last_record = update_meta['dateTimeOfLastRecord']
+    water_level_feature_instance.num_grp = update_meta['numberOfGroups']
+    water_level_feature_instance.number_of_times = update_meta['numberOfTimes']
+    water_level_feature_instance.time_record_interval = update_meta['timeRecordInterval']
 
     root.east_bound_longitude = grid_properties["minx"]
     root.west_bound_longitude = grid_properties["maxx"]
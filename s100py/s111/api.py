@@ -8,7 +8,7 @@ import numpy
 import h5py
 
 from s100py.s1xx import s1xx_sequence, S1xxAttributesBase, S1xxMetadataListBase, S1xxDatasetBase, S1xxGridsBase, S1XXFile, h5py_string_dtype
-from s100py.s100 import S100Root, S100Exception, FeatureContainerDCF2, FeatureInstanceDCF2, FeatureInformation, FeatureInformationDataset, GroupFBase
+from s100py.s100 import TIME_SERIES_SUFFIX, S100Root, S100Exception, FeatureContainerDCF2, FeatureInstanceDCF2, FeatureInformation, FeatureInformationDataset, GroupFBase
 
 SURFACE_CURRENT = "SurfaceCurrent"
 
@@ -188,7 +188,7 @@ class GeometryValuesDataset(S1xxGridsBase):
 
 class PositioningGroup(S1xxAttributesBase):
 
-    geometry_values_attribute_name = "geometry_values"
+    geometry_values_attribute_name = "geometryValues"
 
     @property
     def __version__(self) -> int:
@@ -283,6 +283,12 @@ class SurfaceCurrentValues(S1xxGridsBase):
     def get_compound_dtype(self):
         return [self.surface_current_speed_dtype, self.surface_current_direction_dtype]
 
+    def get_fill_values(self):
+        return [FILLVALUE, FILLVALUE]
+
+    def get_precisions(self):
+        return [2, 1]
+
 
 class SurfaceCurrentGroup(S1xxAttributesBase):
     """ 10.2.5 of v1.0.1
@@ -699,3 +705,45 @@ class S111File(S1XXFile):
 
     def __init__(self, *args, **kywrds):
         super().__init__(*args, root=S111Root, **kywrds)
+
+    def time_series_at(self, points, fields=None, instance: int = 0, use_index: bool = True):
+        """ Surface currents at the grid nodes nearest to the points for every time in a feature instance,
+        see :any:`FeatureInstanceDCF2.time_series_at`
+
+        Parameters
+        ----------
+        points
+            sequence of (longitude, latitude) positions
+        fields
+            name or list of names of the fields, default is surfaceCurrentSpeed and surfaceCurrentDirection
+        instance
+            index of the SurfaceCurrent.NN feature instance, 0 is SurfaceCurrent.01
+        use_index
+            read from the time-major sidecar made by :any:`build_time_series_index` if it exists
+            and was made from this file as it is now
+
+        Returns
+        -------
+        (list, dict)
+            the timePoint of each time and a dict of field name to array of shape (times, points)
+        """
+        feature_instance = self.root.surface_current.surface_current[instance]
+        index_file = self.filename + TIME_SERIES_SUFFIX if use_index else None
+        series = feature_instance.time_series_at(points, fields, index_file=index_file, source_path=self.filename)
+        return feature_instance.get_time_points(), series
+
+    def build_time_series_index(self, instance: int = None, output_path: str = None):
+        """ Makes the time-major sidecar used by :any:`time_series_at`, see :any:`FeatureInstanceDCF2.build_time_series_index`
+
+        Parameters
+        ----------
+        instance
+            index of the SurfaceCurrent.NN feature instance to index, None indexes all of them
+        output_path
+            path of the sidecar, default is the file name + TIME_SERIES_SUFFIX
+        """
+        if output_path is None:
+            output_path = self.filename + TIME_SERIES_SUFFIX
+        instances = self.root.surface_current.surface_current
+        for feature_instance in (instances if instance is None else [instances[instance]]):
+            feature_instance.build_time_series_index(output_path, self.filename)
@@ -6,7 +6,9 @@ import re
 
 from thyme.model import model, roms, fvcom, pom, hycom
 from thyme.util import dateutil
+from s100py.s1xx import ordered_imap
 from s100py.s111 import utils
+from s100py.s100 import BarycentricRegridder, REGRID_WEIGHTS_SUFFIX
 
 # Default fill value for NetCDF variables
 FILLVALUE = -9999.0
@@ -69,6 +71,228 @@ MODELS = {
 }
 
 
+class RegularGridSession:
+    """
+    Keeps a model index open for a whole conversion and caches everything about the regular grid
+    that is the same for every time step: the mask, the slices of each subgrid and their grid properties.
+    Each time step then only does the interpolation and the u/v to speed/direction conversion.
+
+    With cache_weights the interpolation is done with a :any:`BarycentricRegridder` from the native grid output of the model
+    instead of the model's own uv_to_regular_grid, so the triangulation is only done once per mesh and stored in weights_cache_file.
+    The regridder is built from the nodes of the first time step and kept for the session.  Nodes missing from a later time step
+    (i.e. dried out) are NaN so the grid cells in triangles touching them are masked, nodes that only appear later are not used.
+    """
+    def __init__(self, model_index, cache_weights=False, weights_cache_file=None):
+        self.model_index = model_index
+        self.cache_weights = cache_weights
+        self.weights_cache_file = weights_cache_file
+        self.grid_x = None
+        self.grid_y = None
+        self.mask = None
+        self.subgrid_slices = None
+        self.subgrid_valid_counts = None
+        self._grid_properties = {}
+        self._regridder = None
+        self._node_order = None
+        self._sorted_nodes = None
+
+    def open(self):
+        model_index = self.model_index
+        model_index.open()
+        self.mask = numpy.ma.filled(model_index.var_mask[:], 0) != 1
+        if self.cache_weights:
+            self.grid_x, self.grid_y = numpy.meshgrid(model_index.var_x, model_index.var_y)
+        self.subgrid_slices = []
+        self.subgrid_valid_counts = []
+        if self.has_subgrids:
+            for i in range(model_index.dim_subgrid.size):
+                x_min = int(model_index.var_subgrid_x_min[i])
+                x_max = int(model_index.var_subgrid_x_max[i])
+                y_min = int(model_index.var_subgrid_y_min[i])
+                y_max = int(model_index.var_subgrid_y_max[i])
+                subgrid = (slice(y_min, y_max + 1), slice(x_min, x_max + 1))
+                self.subgrid_slices.append(subgrid)
+                self.subgrid_valid_counts.append(numpy.count_nonzero(~self.mask[subgrid]))
+
+    def close(self):
+        self.model_index.close()
+
+    @property
+    def has_subgrids(self):
+        return self.model_index.dim_subgrid is not None and self.model_index.var_subgrid_id is not None
+
+    def grid_properties(self, idx):
+        """Grid properties of a subgrid, or of the whole grid if the index has no subgrids.
+
+        Args:
+            idx: Index of the subgrid.
+
+        Returns:
+            Dict of grid properties as used by utils.add_data_from_arrays.
+        """
+        if idx not in self._grid_properties:
+            model_index = self.model_index
+            if self.has_subgrids:
+                y_slice, x_slice = self.subgrid_slices[idx]
+                minx = model_index.var_x[x_slice.start]
+                maxx = model_index.var_x[x_slice.stop - 1]
+                miny = model_index.var_y[y_slice.start]
+                maxy = model_index.var_y[y_slice.stop - 1]
+                nx = x_slice.stop - x_slice.start
+                ny = y_slice.stop - y_slice.start
+            else:
+                nx = model_index.dim_x.size
+                ny = model_index.dim_y.size
+                minx = numpy.nanmin(numpy.round(model_index.var_x, 7))
+                maxx = numpy.nanmax(numpy.round(model_index.var_x, 7))
+                miny = numpy.nanmin(numpy.round(model_index.var_y, 7))
+                maxy = numpy.nanmax(numpy.round(model_index.var_y, 7))
+
+            self._grid_properties[idx] = {
+                'maxx': maxx,
+                'minx': minx,
+                'miny': miny,
+                'maxy': maxy,
+                'cellsize_x': model_index.var_x[1] - model_index.var_x[0],
+                'cellsize_y': model_index.var_y[1] - model_index.var_y[0],
+                'nx': nx,
+                'ny': ny
+            }
+        return self._grid_properties[idx]
+
+    def regrid(self, model_file, time_index):
+        """Interpolate the currents of a time step onto the whole regular grid.
+
+        Args:
+            model_file: Open native model file.
+            time_index: Index of the time step in the model file.
+
+        Returns:
+            Masked speed and direction arrays, masked on land and outside of the model.
+        """
+        if self.cache_weights:
+            # Get native-grid output with invalid/masked values removed and interpolate it with the cached weights
+            u, v, latitude, longitude = model_file.output_native_grid(time_index, DEFAULT_TARGET_DEPTH)
+            regridder = self.regridder(model_file)
+            u, v = self.node_values(longitude, latitude, u, v)
+            reg_grid_u = regridder.regrid(u)
+            reg_grid_v = regridder.regrid(v)
+        else:
+            # Get native-grid output with invalid/masked values removed
+            reg_grid_u, reg_grid_v = model_file.uv_to_regular_grid(self.model_index, time_index, DEFAULT_TARGET_DEPTH)
+
+        reg_grid_u = numpy.ma.masked_array(reg_grid_u, self.mask)
+        reg_grid_v = numpy.ma.masked_array(reg_grid_v, self.mask)
+
+        # Convert currents at regular grid points from u/v to speed/direction
+        speed, direction = model.regular_uv_to_speed_direction(reg_grid_u, reg_grid_v)
+
+        # If any valid data points fall outside of the scipy griddata convex hull
+        # nan values will be used, add them to the mask
+        speed = numpy.ma.masked_array(speed, self.mask | numpy.isnan(numpy.ma.getdata(speed)))
+        direction = numpy.ma.masked_array(direction, self.mask | numpy.isnan(numpy.ma.getdata(direction)))
+
+        return speed, direction
+
+    def regridder(self, model_file):
+        """The BarycentricRegridder from the native grid nodes of the first time step to the regular grid,
+        built (or read from weights_cache_file) on the first call and then kept, so the positions are only hashed once.
+
+        Args:
+            model_file: Open native model file.
+
+        Returns:
+            The BarycentricRegridder of the session.
+        """
+        if self._regridder is None:
+            u, v, latitude, longitude = model_file.output_native_grid(0, DEFAULT_TARGET_DEPTH)
+            nodes = numpy.asarray(longitude, dtype=numpy.float64) + 1j * numpy.asarray(latitude, dtype=numpy.float64)
+            self._node_order = numpy.argsort(nodes)  # complex values sort by longitude then latitude
+            self._sorted_nodes = nodes[self._node_order]
+            self._regridder = BarycentricRegridder.from_positions(longitude, latitude, self.grid_x, self.grid_y, self.weights_cache_file)
+        return self._regridder
+
+    def node_values(self, longitude, latitude, *values):
+        """Places the values of a time step's native grid output at the nodes of the regridder (see :any:`regridder`).
+
+        Args:
+            longitude: Longitude of the time step's nodes.
+            latitude: Latitude of the time step's nodes.
+            values: Arrays with one value per node of the time step.
+
+        Returns:
+            A list with an array per values, one float64 per regridder node, NaN for the nodes missing from the time step.
+        """
+        nodes = numpy.asarray(longitude, dtype=numpy.float64) + 1j * numpy.asarray(latitude, dtype=numpy.float64)
+        position = numpy.minimum(numpy.searchsorted(self._sorted_nodes, nodes), len(self._sorted_nodes) - 1)
+        found = self._sorted_nodes[position] == nodes
+        result = []
+        for node_values in values:
+            full = numpy.full(len(self._sorted_nodes), numpy.nan)
+            full[self._node_order[position[found]]] = numpy.ma.filled(numpy.ma.asarray(node_values, dtype=numpy.float64), numpy.nan)[found]
+            result.append(full)
+        return result
+
+    def subgrid(self, grid, idx):
+        """Slice a whole grid array down to a subgrid, the whole grid is returned if the index has no subgrids."""
+        if self.has_subgrids:
+            return grid[self.subgrid_slices[idx]]
+        return grid
+
+    def convert(self, model_file, time_index, idx):
+        """Regrid a time step and slice out a subgrid.
+
+        Args:
+            model_file: Open native model file.
+            time_index: Index of the time step in the model file.
+            idx: Index of the subgrid.
+
+        Returns:
+            Speed, direction and grid properties of the subgrid.
+        """
+        speed, direction = self.regrid(model_file, time_index)
+        return self.subgrid(speed, idx), self.subgrid(direction, idx), self.grid_properties(idx)
+
+
+def convert_time_step(model_file, session, data_coding_format, time_index):
+    """Convert the currents of one time step.
+
+    Args:
+        model_file: Open native model file.
+        session: Open RegularGridSession, only used for Data Coding Format 2.
+        data_coding_format: 2: Regularly-gridded arrays
+                            3: Ungeorectified gridded arrays
+        time_index: Index of the time step in the model file.
+
+    Returns:
+        Speed and direction of the whole regular grid for Data Coding Format 2,
+        otherwise the return values of CLI.convert_irregular.
+    """
+    if data_coding_format == 2:
+        return session.regrid(model_file, time_index)
+    return CLI.convert_irregular(model_file, time_index)
+
+
+# model file and RegularGridSession of each conversion, opened on the first time step a worker process converts
+_worker_files = {}
+
+
+def _convert_time_step(model_name, model_file_path, model_index_path, cache_weights, data_coding_format, time_index):
+    """Worker process entry point of convert_time_step, the files stay open for the life of the process."""
+    key = (model_name, model_file_path, model_index_path, cache_weights, data_coding_format)
+    if key not in _worker_files:
+        model_type = MODELS[model_name]['model_type']
+        model_file = MODEL_FILE_CLASS[model_type](model_file_path, datetime_rounding=MODELS[model_name]['datetime_rounding'])
+        model_file.open()
+        session = None
+        if data_coding_format == 2:
+            session = RegularGridSession(MODEL_INDEX_CLASS[model_type](model_index_path), cache_weights, f'{model_index_path}{REGRID_WEIGHTS_SUFFIX}')
+            session.open()
+        _worker_files[key] = model_file, session
+    model_file, session = _worker_files[key]
+    return convert_time_step(model_file, session, data_coding_format, time_index)
+
+
 class CLI:
     """
     Container for methods exposed through CLI via Python Fire.
@@ -137,66 +361,15 @@ class CLI:
 
     @staticmethod
     def convert_regular(model_file, model_index, time_index, idx):
+        session = RegularGridSession(model_index)
         try:
-            model_index.open()
-            # Get native-grid output with invalid/masked values removed
-            reg_grid_u, reg_grid_v = model_file.uv_to_regular_grid(model_index, time_index, 4.5)
-
-            reg_grid_u = numpy.ma.masked_array(reg_grid_u, model_index.var_mask.mask)
-            reg_grid_v = numpy.ma.masked_array(reg_grid_v, model_index.var_mask.mask)
-
-            # Convert currents at regular grid points from u/v to speed/direction
-            speed, direction = model.regular_uv_to_speed_direction(reg_grid_u, reg_grid_v)
-
-            # Apply mask
-            direction = numpy.ma.masked_array(direction, model_index.var_mask.mask)
-            speed = numpy.ma.masked_array(speed, model_index.var_mask.mask)
-
-            # If any valid data points fall outside of the scipy griddata convex hull
-            # nan values will be used, if nan values are present
-            # add nan values to the original mask
-            if numpy.isnan(speed).any():
-                nan_mask_speed = numpy.ma.masked_invalid(speed)
-                nan_mask_direction = numpy.ma.masked_invalid(direction)
-                speed_mask = numpy.ma.mask_or(model_index.var_mask.mask, nan_mask_speed.mask)
-                direction_mask = numpy.ma.mask_or(model_index.var_mask.mask, nan_mask_direction.mask)
-
-                speed = numpy.ma.masked_array(speed, speed_mask)
-                direction = numpy.ma.masked_array(direction, direction_mask)
-
-            cellsize_x = model_index.var_x[1] - model_index.var_x[0]
-            cellsize_y = model_index.var_y[1] - model_index.var_y[0]
-
-            if model_index.dim_subgrid is not None and model_index.var_subgrid_id is not None:
-
-                x_min = model_index.var_subgrid_x_min[idx]
-                x_max = model_index.var_subgrid_x_max[idx]
-                y_min = model_index.var_subgrid_y_min[idx]
-                y_max = model_index.var_subgrid_y_max[idx]
-                speed = speed[y_min:y_max + 1, x_min:x_max + 1]
-                direction = direction[y_min:y_max + 1, x_min:x_max + 1]
-
-                nx = 1 + model_index.var_subgrid_x_max[idx] - model_index.var_subgrid_x_min[idx]
-                ny = 1 + model_index.var_subgrid_y_max[idx] - model_index.var_subgrid_y_min[idx]
-                minx = model_index.var_x[model_index.var_subgrid_x_min[idx]]
-                miny = model_index.var_y[model_index.var_subgrid_y_min[idx]]
-                maxx = model_index.var_x[model_index.var_subgrid_x_max[idx]]
-                maxy = model_index.var_y[model_index.var_subgrid_y_max[idx]]
-
-            else:
-
-                nx = model_index.dim_x.size
-                ny = model_index.dim_y.size
-
-                minx = numpy.nanmin(numpy.round(model_index.var_x, 7))
-                maxx = numpy.nanmax(numpy.round(model_index.var_x, 7))
-                miny = numpy.nanmin(numpy.round(model_index.var_y, 7))
-                maxy = numpy.nanmax(numpy.round(model_index.var_y, 7))
-
+            session.open()
+            speed, direction, grid_properties = session.convert(model_file, time_index, idx)
         finally:
-            model_index.close()
+            session.close()
 
-        return speed, direction, cellsize_x, cellsize_y, nx, ny, minx, maxx, miny, maxy
+        return (speed, direction, grid_properties['cellsize_x'], grid_properties['cellsize_y'], grid_properties['nx'], grid_properties['ny'],
+                grid_properties['minx'], grid_properties['maxx'], grid_properties['miny'], grid_properties['maxy'])
 
     @staticmethod
     def convert_irregular(model_file, time_index):
@@ -213,7 +386,7 @@ class CLI:
 
         return speed, direction, longitude, latitude, minx, maxx, miny, maxy
 
-    def convert(self, model_file_path, output_path, data_coding_format, model_index_path=None):
+    def convert(self, model_file_path, output_path, data_coding_format, model_index_path=None, cache_weights=False, max_workers=1):
         """Convert NetCDF hydrodynamic model to S111 format.
 
         Args:
@@ -227,6 +400,8 @@ class CLI:
                                 6. Variable cell size
                                 7. TIN
             model_index_path: Optional: Path to model index file.
+            cache_weights: Optional: Interpolate with weights computed once per model mesh and stored next to the
+                           model index file, instead of triangulating every time step.
 
         Returns:
             List of paths to HDF5 files created.
@@ -239,6 +414,7 @@ class CLI:
 
         s111_filenames = []
         subgrid_index = []
+        session = None
 
         if os.path.isdir(s111_path_prefix):
             if not s111_path_prefix.endswith(os.path.sep):
@@ -253,55 +429,36 @@ class CLI:
             epoch = self.determine_epoch(dt)
 
             if model_index_path is not None:
-                try:
-                    model_index = MODEL_INDEX_CLASS[MODELS[model_name]['model_type']](model_index_path)
-                    model_index.open()
-
-                    if model_index.dim_subgrid is not None and model_index.var_subgrid_id is not None:
-                        for i in range(model_index.dim_subgrid.size):
-
-                            if model_index.var_subgrid_name is not None:
-                                x_min = model_index.var_subgrid_x_min[i]
-                                x_max = model_index.var_subgrid_x_max[i]
-                                y_min = model_index.var_subgrid_y_min[i]
-                                y_max = model_index.var_subgrid_y_max[i]
-
-                                subgrid_valid = model_index.var_mask[y_min:y_max + 1, x_min:x_max + 1]
-                                valid_occurrences = numpy.count_nonzero(subgrid_valid == 1)
+                session = RegularGridSession(MODEL_INDEX_CLASS[MODELS[model_name]['model_type']](model_index_path), cache_weights,
+                                             f'{model_index_path}{REGRID_WEIGHTS_SUFFIX}')
+                session.open()
+                model_index = session.model_index
 
-                                if valid_occurrences >= 20:
-                                    subgrid_index.append(i)
+                if session.has_subgrids:
+                    for i in range(model_index.dim_subgrid.size):
 
-                                if model_index.var_subgrid_name is not None:
-                                    s111_subgrid_filename = f'111{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}_{model_index.var_subgrid_name[i]}'
-                                    s111_filenames.append(s111_subgrid_filename)
+                        if model_index.var_subgrid_name is not None:
+                            if session.subgrid_valid_counts[i] >= 20:
+                                subgrid_index.append(i)
 
-                                else:
-                                    s111_subgrid_filename = f'111{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}_FID_{model_index.var_subgrid_name[i]}'
-                                    s111_filenames.append(s111_subgrid_filename)
+                            s111_subgrid_filename = f'111{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}_{model_index.var_subgrid_name[i]}'
+                            s111_filenames.append(s111_subgrid_filename)
 
-                    else:
-                        s111_filename = f'111{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}'
-                        s111_filenames.append(s111_filename)
-
-                finally:
-                    model_index.close()
+                else:
+                    s111_filename = f'111{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}'
+                    s111_filenames.append(s111_filename)
 
             else:
                 s111_subgrid_filename = f'111{PRODUCER_CODE}_{file_issuance}_{model_name.upper()}_DCF{data_coding_format}'
                 s111_filenames.append(s111_subgrid_filename)
 
         model_file = MODEL_FILE_CLASS[MODELS[model_name]['model_type']](model_file_path, datetime_rounding=MODELS[model_name]['datetime_rounding'])
-
-        if data_coding_format == 2:
-            model_index = MODEL_INDEX_CLASS[MODELS[model_name]['model_type']](model_index_path)
+        data_files = []
 
         try:
             model_file.open()
 
-            data_file_data = None
-            grid_properties = None
-
+            # every subgrid file stays open for the whole run so each time step is converted once and written to all of them
             for idx, file in enumerate(s111_filenames):
                 if idx in subgrid_index or not subgrid_index:
 
@@ -309,64 +466,76 @@ class CLI:
                     data_file = utils.create_s111(filename)
 
                     metadata = self.generate_metadata_dict(file, model_name, epoch, model_file)
-                    data_file_meta = utils.add_metadata(metadata, data_file)
-
-                    for time_index, value in enumerate(model_file.datetime_values):
-                        if data_coding_format == 2:
-                            speed, direction, cellsize_x, cellsize_y, nx, ny, minx, maxx, miny, maxy = self.convert_regular(model_file, model_index, time_index, idx)
-
-                            grid_properties = {
-                                'maxx': maxx,
-                                'minx': minx,
-                                'miny': miny,
-                                'maxy': maxy,
-                                'cellsize_x': cellsize_x,
-                                'cellsize_y': cellsize_y,
-                                'nx': nx,
-                                'ny': ny
-                            }
-
-                            datetime_value = value.strftime('%Y%m%dT%H%M%SZ')
-                            data_file_data = utils.add_data_from_arrays(speed, direction, data_file_meta, grid_properties, datetime_value, data_coding_format)
-
-                        if data_coding_format == 3:
-                            speed, direction, longitude, latitude, minx, maxx, miny, maxy = self.convert_irregular(model_file, time_index)
-
-                            grid_properties = {
-                                'maxx': maxx,
-                                'minx': minx,
-                                'miny': miny,
-                                'maxy': maxy,
-                                'latitude': latitude,
-                                'longitude': longitude,
-                                'nodes': longitude.size
-                            }
-
-                            datetime_value = value.strftime('%Y%m%dT%H%M%SZ')
-                            data_file_data = utils.add_data_from_arrays(speed, direction, data_file_meta, grid_properties, datetime_value, data_coding_format)
-
-                    last_record = model_file.datetime_values[-1].strftime('%Y%m%dT%H%M%SZ')
-
-                    if len(model_file.datetime_values) == 1:
-                        interval_sec = 0
-                    else:
-                        interval = model_file.datetime_values[1] - model_file.datetime_values[0]
-                        interval_sec = int(interval.total_seconds())
-
-                    update_meta = {
-                        'dateTimeOfLastRecord': last_record,
-                        'numberOfGroups': len(model_file.datetime_values),
-                        'numberOfTimes': len(model_file.datetime_values),
-                        'timeRecordInterval': interval_sec,
-                        'num_instances': 1,
+                    utils.add_metadata(metadata, data_file)
+                    data_files.append((idx, data_file))
+
+            time_indices = range(len(model_file.datetime_values))
+            if max_workers is not None and max_workers <= 1:
+                time_steps = (convert_time_step(model_file, session, data_coding_format, time_index) for time_index in time_indices)
+            else:
+                if data_coding_format == 2 and cache_weights:
+                    # build (or load) the interpolation weights here so the worker processes only read them
+                    session.regridder(model_file)
+                step_args = ((model_name, model_file_path, model_index_path, cache_weights, data_coding_format, time_index) for time_index in time_indices)
+                time_steps = ordered_imap(_convert_time_step, step_args, max_workers)
+
+            grid_properties = {}
+            for value, time_step in zip(model_file.datetime_values, time_steps):
+                datetime_value = value.strftime('%Y%m%dT%H%M%SZ')
+
+                if data_coding_format == 2:
+                    speed, direction = time_step
+
+                    for idx, data_file in data_files:
+                        grid_properties[idx] = session.grid_properties(idx)
+                        utils.add_data_from_arrays(session.subgrid(speed, idx), session.subgrid(direction, idx), data_file,
+                                                   grid_properties[idx], datetime_value, data_coding_format, stream=True)
+
+                if data_coding_format == 3:
+                    speed, direction, longitude, latitude, minx, maxx, miny, maxy = time_step
+
+                    irregular_grid_properties = {
+                        'maxx': maxx,
+                        'minx': minx,
+                        'miny': miny,
+                        'maxy': maxy,
+                        'latitude': latitude,
+                        'longitude': longitude,
+                        'nodes': longitude.size
                     }
 
-                    data_file_update = utils.update_metadata(data_file_data, grid_properties, update_meta)
+                    for idx, data_file in data_files:
+                        grid_properties[idx] = irregular_grid_properties
+                        utils.add_data_from_arrays(speed, direction, data_file, grid_properties[idx], datetime_value, data_coding_format, stream=True)
+
+            last_record = model_file.datetime_values[-1].strftime('%Y%m%dT%H%M%SZ')
+
+            if len(model_file.datetime_values) == 1:
+                interval_sec = 0
+            else:
+                interval = model_file.datetime_values[1] - model_file.datetime_values[0]
+                interval_sec = int(interval.total_seconds())
+
+            update_meta = {
+                'dateTimeOfLastRecord': last_record,
+                'numberOfGroups': len(model_file.datetime_values),
+                'numberOfTimes': len(model_file.datetime_values),
+                'timeRecordInterval': interval_sec,
+                'num_instances': 1,
+            }
+
+            for idx, data_file in data_files:
+                data_file_update = utils.update_metadata(data_file, grid_properties[idx], update_meta)
 
-                    utils.write_data_file(data_file_update)
+                utils.write_data_file(data_file_update)
 
         finally:
             model_file.close()
+            if session is not None:
+                session.close()
+            for idx, data_file in data_files:
+                if data_file.id.valid:
+                    data_file.close()
 
 
 def main():
@@ -11,6 +11,8 @@ import warnings
 import shutil
 from thyme.model import model
 
+from ..s1xx import quantize_array, ordered_imap
+
 with warnings.catch_warnings():
     warnings.filterwarnings('ignore', category=FutureWarning)
     import h5py
@@ -72,9 +74,16 @@ class S111File:
             metadata.
         groupF_dset: Handle to the underlying ``h5py.Dataset`` for Group_F 
             metadata.
+        num_groups: Number of feature instance groups (Group_NNN) in the file,
+            counted in memory as data is added.
+
+    The attributes derived from all the groups (dateTimeOfLastRecord, the
+    dataset min/max speed, chunking etc.) are kept in memory as groups are
+    added and written once when the file is closed, so appending a group
+    doesn't have to traverse the existing ones.
     """
 
-    def __init__(self, path, input_metadata, data_coding_format, model_index=None, subgrid_index=None, clobber=False):
+    def __init__(self, path, input_metadata, data_coding_format, model_index=None, subgrid_index=None, clobber=False, quantize=False):
         """Initializes S111File object and opens h5 file at specified path.
 
         If ``path`` has an extension other than '.h5', it is replaced with
@@ -96,6 +105,10 @@ class S111File:
             clobber: (Optional, default False) If True, existing h5 file at
                 specified path, if any, will be deleted and the new file will
                 be opened in write mode.
+            quantize: (Optional, default False) If True, speed and direction
+                are stored quantized to their 2 and 1 decimal precision with
+                the shuffle filter (see ``s1xx.quantize_array``), which reads
+                back the same at that precision in a much smaller file.
         """
         prefix, extension = os.path.splitext(path)
         self.path = prefix + '.h5'
@@ -104,6 +117,17 @@ class S111File:
         self.input_metadata = input_metadata
         self.data_coding_format = data_coding_format
         self.subgrid_index = subgrid_index
+        self.quantize = quantize
+        self.num_groups = 0
+        self._first_time = None
+        self._second_time = None
+        self._last_time_str = None
+        self._min_speed = None
+        self._max_speed = None
+        self._dimension = None
+        self._current_depth = None
+        self._chunking_str = None
+        self._first_values_shape = None
 
         if not os.path.exists(self.path) or clobber:
             # File doesn't exist, open in create (write) mode and add metadata
@@ -113,7 +137,6 @@ class S111File:
             self.groupF = self.h5_file.create_group('Group_F')
             self.feature = self.h5_file.create_group('SurfaceCurrent')
             self.feature_instance = self.feature.create_group('SurfaceCurrent.01')
-            self.feature_instance_groups = None
             self.groupF_dset = None
 
             # Add feature content
@@ -127,14 +150,48 @@ class S111File:
         else:
             # File already exists, open in append mode
             self.h5_file = h5py.File(self.path, 'r+')
+            self.groupF = self.h5_file['Group_F']
+            self.feature = self.h5_file['SurfaceCurrent']
+            self.feature_instance = self.feature['SurfaceCurrent.01']
+            self.groupF_dset = self.groupF['SurfaceCurrent']
+            self._read_group_state()
+
+    def _read_group_state(self):
+        """Initializes the in-memory group counter and running attributes from an existing file, once."""
+        group_names = [name for name in self.feature_instance if name.startswith('Group_')]
+        self.num_groups = len(group_names)
+        if self.num_groups == 0:
+            return
+        self._first_time = datetime.datetime.strptime(self.feature_instance['Group_001'].attrs['timePoint'], '%Y%m%dT%H%M%SZ')
+        if self.num_groups > 1:
+            self._second_time = datetime.datetime.strptime(self.feature_instance['Group_002'].attrs['timePoint'], '%Y%m%dT%H%M%SZ')
+        self._first_values_shape = self.feature_instance['Group_001/values'].shape
+        self._last_time_str = self.feature_instance.attrs['dateTimeOfLastRecord']
+        self._min_speed = self.feature.attrs['minDatasetCurrentSpeed']
+        self._max_speed = self.feature.attrs['maxDatasetCurrentSpeed']
+
+    def _write_derived_attributes(self):
+        """Writes the attributes derived from all the groups added, see ``add_feature_instance_group_data``."""
+        if self.num_groups == 0 or not self.h5_file.id.valid:
+            return
+        self.feature_instance.attrs.modify('dateTimeOfLastRecord', numpy.string_(self._last_time_str))
+        self.feature.attrs.create('minDatasetCurrentSpeed', self._min_speed, dtype=numpy.float32)
+        self.feature.attrs.create('maxDatasetCurrentSpeed', self._max_speed, dtype=numpy.float32)
+        if self._dimension is not None:  # no groups were added since the file was opened
+            self.feature.attrs.create('dimension', self._dimension, dtype=numpy.uint8)
+            self.h5_file.attrs.create('surfaceCurrentDepth', self._current_depth, dtype=numpy.float32)
+            self.groupF_dset.attrs.create('chunking', self._chunking_str, dtype=h5py.special_dtype(vlen=str))
+            self.feature_instance.attrs.create('instanceChunking', numpy.string_(self._chunking_str))
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
+        self._write_derived_attributes()
         self.h5_file.close()
 
     def close(self):
+        self._write_derived_attributes()
         self.h5_file.flush()
         self.h5_file.close()
 
@@ -291,7 +348,9 @@ class S111File:
     def add_feature_instance_group_data(self, datetime_value, speed, direction, cycletime, target_depth):
         """Add data to the S111 file.
         
-        As data is added, new groups will be created and relevant attributes updated.
+        As data is added, new groups will be created.  The attributes that
+        depend on every group, like the min/max speed, are kept in memory and
+        written when the file is closed.
 
         Args:
             datetime_value: ``datetime.datetime`` instance representing valid time of
@@ -304,12 +363,6 @@ class S111File:
                 Must be greater than or equal to 0. For areas shallower than the
                 target depth, half the water column height is used instead.
         """
-        # Create a list of all feature instance objects and groups
-        feature_instance_objs = []
-        self.feature_instance.visit(feature_instance_objs.append)
-        self.feature_instance_groups = [obj for obj in feature_instance_objs if
-                                        isinstance(self.feature_instance[obj], h5py.Group)]
-
         # Convert time value to string
         time_str = datetime_value.strftime('%Y%m%dT%H%M%SZ')
 
@@ -320,7 +373,7 @@ class S111File:
         max_speed = numpy.round(max_speed, decimals=2)
 
         # Create feature instance groups
-        if len(self.feature_instance_groups) == 0:
+        if self.num_groups == 0:
             self.feature.attrs.create('numInstances', len(self.feature_instance), dtype=numpy.int32)
             feature_group = self.feature_instance.create_group('Group_001')
 
@@ -328,10 +381,9 @@ class S111File:
             self.feature_instance.attrs.create('dateTimeOfFirstRecord', numpy.string_(time_str), dtype=h5py.special_dtype(vlen=str))
             self.feature_instance.attrs.create('dateTimeOfLastRecord', numpy.string_(time_str), dtype=h5py.special_dtype(vlen=str))
             self.feature_instance.attrs.create('timeRecordInterval', 0, dtype=numpy.int32)
-
-            # Add initial speed attributes
-            self.feature.attrs.create('minDatasetCurrentSpeed', min_speed, dtype=numpy.float32)
-            self.feature.attrs.create('maxDatasetCurrentSpeed', max_speed, dtype=numpy.float32)
+            self._first_time = datetime_value
+            self._min_speed = min_speed
+            self._max_speed = max_speed
 
             feature_instance_date = int(cycletime.strftime('%Y%m'))
 
@@ -351,19 +403,18 @@ class S111File:
             self.h5_file.attrs.create('epoch', epoch, dtype=h5py.special_dtype(vlen=str))
 
         else:
-            # num_groups is 0-based
-            num_groups = len(self.feature_instance_groups)
-            add_group = num_groups + 1
-            feature_group = self.feature_instance.create_group('Group_{:03d}'.format(add_group))
-            self.feature_instance.attrs.modify('dateTimeOfLastRecord', numpy.string_(time_str))
+            feature_group = self.feature_instance.create_group('Group_{:03d}'.format(self.num_groups + 1))
+            if self.num_groups == 1:
+                self._second_time = datetime_value
 
             # Update speed attributes each time data is added
-            prior_min_speed = self.feature.attrs['minDatasetCurrentSpeed']
-            prior_max_speed = self.feature.attrs['maxDatasetCurrentSpeed']
-            if min_speed < prior_min_speed:
-                self.feature.attrs.modify('minDatasetCurrentSpeed', min_speed)
-            if max_speed > prior_max_speed:
-                self.feature.attrs.modify('maxDatasetCurrentSpeed', max_speed)
+            if min_speed < self._min_speed:
+                self._min_speed = min_speed
+            if max_speed > self._max_speed:
+                self._max_speed = max_speed
+
+        self.num_groups += 1
+        self._last_time_str = time_str
 
         # Add time string to feature instance group compound dataset
         feature_group.attrs.create('timePoint', numpy.string_(time_str), None, h5py.special_dtype(vlen=str))
@@ -380,25 +431,27 @@ class S111File:
         # Format speed/direction
         speed = numpy.round(speed, decimals=2)
         direction = numpy.round(direction, decimals=1)
+        if self.quantize:
+            speed = quantize_array(speed, 2)
+            direction = quantize_array(direction, 1)
 
         # Add speed/direction data
         values = numpy.zeros(speed.shape, dtype=values_dtype)
         values['surfaceCurrentSpeed'] = speed
         values['surfaceCurrentDirection'] = direction
-        values_dset = feature_group.create_dataset('values', speed.shape, dtype=values_dtype, chunks=True, compression='gzip', compression_opts=9)
+        values_dset = feature_group.create_dataset('values', speed.shape, dtype=values_dtype, chunks=True, compression='gzip',
+                                                   compression_opts=6 if self.quantize else 9, shuffle=self.quantize)
         values_dset[...] = values
+        if self._first_values_shape is None:
+            self._first_values_shape = speed.shape
 
-        self.feature.attrs.create('dimension', speed.ndim, dtype=numpy.uint8)
+        self._dimension = speed.ndim
 
         # Update depth attribute
-        current_depth = (-abs(target_depth)) + 0
-        self.h5_file.attrs.create('surfaceCurrentDepth', current_depth, dtype=numpy.float32)
+        self._current_depth = (-abs(target_depth)) + 0
 
         # Update chunking attributes
-        chunking_str = ','.join(str(x) for x in values_dset.chunks)
-
-        self.groupF_dset.attrs.create('chunking', chunking_str, dtype=h5py.special_dtype(vlen=str))
-        self.feature_instance.attrs.create('instanceChunking', numpy.string_(chunking_str))
+        self._chunking_str = ','.join(str(x) for x in values_dset.chunks)
 
     def add_positioning(self, longitude, latitude):
         """Add positioning group and data to the S111 file.
@@ -455,23 +508,16 @@ class S111File:
         self.feature.attrs.create('interpolationType', self.input_metadata.INTERPOLATION_TYPE['discrete'],
                                   dtype=h5py.special_dtype(enum=(numpy.uint8, self.input_metadata.INTERPOLATION_TYPE)))
 
-        # Update attributes after all the value groups have been added, 0-based
-        num_feature_instance_groups = len(self.feature_instance_groups) + 1
-        self.feature_instance.attrs.create('numGRP', num_feature_instance_groups, dtype=numpy.int32)
-        self.feature_instance.attrs.create('numberOfTimes', num_feature_instance_groups, dtype=numpy.int32)
-
-        if self.h5_file.__contains__('/SurfaceCurrent/SurfaceCurrent.01/Group_002'):
-            first_time = datetime.datetime.strptime(
-                (self.h5_file['/SurfaceCurrent/SurfaceCurrent.01/Group_001'].attrs['timePoint']), '%Y%m%dT%H%M%SZ')
-            second_time = datetime.datetime.strptime(
-                (self.h5_file['/SurfaceCurrent/SurfaceCurrent.01/Group_002'].attrs['timePoint']), '%Y%m%dT%H%M%SZ')
+        # Update attributes after all the value groups have been added
+        self.feature_instance.attrs.create('numGRP', self.num_groups, dtype=numpy.int32)
+        self.feature_instance.attrs.create('numberOfTimes', self.num_groups, dtype=numpy.int32)
 
-            time_interval_secs = (second_time - first_time).total_seconds()
+        if self.num_groups > 1:
+            time_interval_secs = (self._second_time - self._first_time).total_seconds()
             self.feature_instance.attrs.modify('timeRecordInterval', time_interval_secs)
 
         if self.data_coding_format == 3:
-            nodes = self.h5_file['/SurfaceCurrent/SurfaceCurrent.01/Group_001/values']
-            num_nodes = nodes.shape[0]
+            num_nodes = self._first_values_shape[0]
             self.feature_instance.attrs.create('numberOfNodes', num_nodes, dtype=numpy.int32)
 
         utc_now = datetime.datetime.utcnow()
@@ -488,13 +534,11 @@ class S111File:
         Args: datetime_values: List of datetime objects
         """
 
-        num_feature_instance_groups = len(self.feature_instance_groups) + 1
+        num_feature_instance_groups = self.num_groups
         self.feature_instance.attrs.create('numGRP', num_feature_instance_groups, dtype=numpy.int32)
 
-        last_time_str = datetime_values[-1].strftime('%Y%m%dT%H%M%SZ')
-
-        # Overwrite last date time record
-        self.feature_instance.attrs.modify('dateTimeOfLastRecord', numpy.string_(last_time_str))
+        # Overwrite last date time record, written when the file is closed
+        self._last_time_str = datetime_values[-1].strftime('%Y%m%dT%H%M%SZ')
 
         interval = datetime_values[1] - datetime_values[0]
         time_interval = interval.total_seconds()
@@ -643,7 +687,116 @@ class S111TimeSeries:
         self.datetime_values = datetime_values
 
 
-def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, input_metadata, data_coding_format, target_depth):
+def _regular_speed_direction(model_file, model_index_file, time_index, target_depth):
+    """Interpolate the currents of a model time step onto the model index grid.
+
+    Args:
+        model_file: Open ``ModelFile`` instance.
+        model_index_file: Open ``ModelIndexFile`` instance.
+        time_index: Index of the time step in the model file.
+        target_depth: The water current at a specified target depth below the sea surface in meters.
+
+    Returns:
+        Masked speed and direction arrays of the whole grid.
+    """
+    reg_grid_u, reg_grid_v = model_file.uv_to_regular_grid(model_index_file, time_index, target_depth)
+
+    reg_grid_u = numpy.ma.masked_array(reg_grid_u, model_index_file.var_mask.mask)
+    reg_grid_v = numpy.ma.masked_array(reg_grid_v, model_index_file.var_mask.mask)
+
+    # Convert currents at regular grid points from u/v to speed/direction
+    speed, direction = model.regular_uv_to_speed_direction(reg_grid_u, reg_grid_v)
+
+    # Apply mask
+    direction = numpy.ma.masked_array(direction, model_index_file.var_mask.mask)
+    speed = numpy.ma.masked_array(speed, model_index_file.var_mask.mask)
+
+    # If any valid data points fall outside of the scipy griddata convex hull
+    # nan values will be used, if nan values are present
+    # add nan values to the original mask
+    if numpy.isnan(speed).any():
+
+        nan_mask_speed = numpy.ma.masked_invalid(speed)
+        nan_mask_direction = numpy.ma.masked_invalid(direction)
+        speed_mask = numpy.ma.mask_or(model_index_file.var_mask.mask, nan_mask_speed.mask)
+        direction_mask = numpy.ma.mask_or(model_index_file.var_mask.mask, nan_mask_direction.mask)
+
+        speed = numpy.ma.masked_array(speed, speed_mask)
+        direction = numpy.ma.masked_array(direction, direction_mask)
+
+    return speed, direction
+
+
+def _irregular_speed_direction(model_file, time_index, target_depth):
+    """Convert the currents of a model time step at the native grid nodes.
+
+    Returns:
+        Speed, direction, latitude and longitude of the valid nodes.
+    """
+    # Get native-grid output with invalid/masked values removed
+    u_compressed, v_compressed, lat_compressed, lon_compressed = model_file.output_native_grid(time_index, target_depth)
+
+    # Convert currents from u/v to speed/direction
+    speed, direction = model.irregular_uv_to_speed_direction(u_compressed, v_compressed)
+
+    return speed, direction, lat_compressed, lon_compressed
+
+
+# model and index files opened by a worker process, keyed by their classes and paths
+_worker_files = {}
+
+
+def _time_step_in_worker(model_file_class, model_file_path, datetime_rounding, index_file_class, index_file_path, time_index, target_depth):
+    """Worker process entry point of _time_steps, the files stay open for the life of the process."""
+    key = (model_file_class, model_file_path, index_file_class, index_file_path)
+    if key not in _worker_files:
+        model_file = model_file_class(model_file_path, datetime_rounding=datetime_rounding)
+        model_file.open()
+        model_index_file = None
+        if index_file_class is not None:
+            model_index_file = index_file_class(index_file_path)
+            model_index_file.open()
+        _worker_files[key] = model_file, model_index_file
+
+    model_file, model_index_file = _worker_files[key]
+    if model_index_file is None:
+        return _irregular_speed_direction(model_file, time_index, target_depth)
+    return _regular_speed_direction(model_file, model_index_file, time_index, target_depth)
+
+
+def _time_steps(model_file, model_index_file, target_depth, max_workers):
+    """Yield the converted time steps of an open model file in chronological order.
+
+    With max_workers other than 1 the time steps are converted in a pool of processes, with a bounded number in flight,
+    and yielded in order so a single writer produces the same file as the serial conversion.
+
+    Args:
+        model_file: Open ``ModelFile`` instance.
+        model_index_file: Open ``ModelIndexFile`` instance to regrid onto, or None for the native grid.
+        target_depth: The water current at a specified target depth below the sea surface in meters.
+        max_workers: Number of processes, None uses the number of cpus.
+
+    Returns:
+        Iterator of the return values of ``_regular_speed_direction`` or ``_irregular_speed_direction``.
+    """
+    time_indices = range(len(model_file.datetime_values))
+    if max_workers is not None and max_workers <= 1:
+        for time_index in time_indices:
+            if model_index_file is None:
+                yield _irregular_speed_direction(model_file, time_index, target_depth)
+            else:
+                yield _regular_speed_direction(model_file, model_index_file, time_index, target_depth)
+        return
+
+    index_file_class = None if model_index_file is None else type(model_index_file)
+    index_file_path = None if model_index_file is None else model_index_file.path
+    step_args = ((type(model_file), model_file.path, getattr(model_file, 'datetime_rounding', None), index_file_class, index_file_path,
+                  time_index, target_depth) for time_index in time_indices)
+    yield from ordered_imap(_time_step_in_worker, step_args, max_workers)
+
+
+def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, input_metadata, data_coding_format, target_depth,
+                  max_workers=1):
     """Convert NetCDF hydrodynamic model to S111 format.
 
     If the supplied model index NetCDF contains information identifying
@@ -673,6 +826,10 @@ def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, in
             3:Ungeorectified gridded arrays, 4:Time series for one moving platform.
         target_depth: The water current at a specified target depth below the sea
             surface in meters.
+        max_workers: Number of processes converting the time steps of each model
+            file, None uses the number of cpus. The time steps are written in
+            chronological order by this process, so the files are the same as
+            with 1 (the default, convert in this process).
 
     Returns:
         List of paths to HDF5 files created.
@@ -694,11 +851,11 @@ def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, in
 
     if data_coding_format == 2:
 
+        stack = contextlib.ExitStack()
         try:
             model_index_file.open()
             if model_index_file.dim_subgrid is not None and model_index_file.var_subgrid_id is not None:
                 # Output to subgrids
-                stack = contextlib.ExitStack()
                 s111_files = []
                 for i in range(model_index_file.dim_subgrid.size):
                     if model_index_file.var_subgrid_name is not None:
@@ -720,39 +877,16 @@ def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, in
                 s111_file = S111File('{}.h5'.format(s111_path_prefix), input_metadata, data_coding_format,
                                      model_index_file, clobber=True)
                 s111_file_paths.append(s111_file.path)
+                stack.enter_context(s111_file)
 
             for model_file in model_files:
                 try:
                     model_file.open()
-                    for time_index in range(len(model_file.datetime_values)):
-                        # Call model method and convert and interpolate u/v to regular grid
-                        # The water current at a specified target depth below the sea surface in meters the default
-                        # target depth is 4.5 meters, target interpolation depth must be greater or equal to 0.
-
-                        reg_grid_u, reg_grid_v = model_file.uv_to_regular_grid(model_index_file, time_index, target_depth)
-
-                        reg_grid_u = numpy.ma.masked_array(reg_grid_u, model_index_file.var_mask.mask)
-                        reg_grid_v = numpy.ma.masked_array(reg_grid_v, model_index_file.var_mask.mask)
-
-                        # Convert currents at regular grid points from u/v to speed/direction
-                        speed, direction = model.regular_uv_to_speed_direction(reg_grid_u, reg_grid_v)
-
-                        # Apply mask
-                        direction = numpy.ma.masked_array(direction, model_index_file.var_mask.mask)
-                        speed = numpy.ma.masked_array(speed, model_index_file.var_mask.mask)
-
-                        # If any valid data points fall outside of the scipy griddata convex hull
-                        # nan values will be used, if nan values are present
-                        # add nan values to the original mask
-                        if numpy.isnan(speed).any():
-
-                            nan_mask_speed = numpy.ma.masked_invalid(speed)
-                            nan_mask_direction = numpy.ma.masked_invalid(direction)
-                            speed_mask = numpy.ma.mask_or(model_index_file.var_mask.mask, nan_mask_speed.mask)
-                            direction_mask = numpy.ma.mask_or(model_index_file.var_mask.mask, nan_mask_direction.mask)
-
-                            speed = numpy.ma.masked_array(speed, speed_mask)
-                            direction = numpy.ma.masked_array(direction, direction_mask)
+                    # Call model method and convert and interpolate u/v to regular grid
+                    # The water current at a specified target depth below the sea surface in meters the default
+                    # target depth is 4.5 meters, target interpolation depth must be greater or equal to 0.
+                    time_steps = _time_steps(model_file, model_index_file, target_depth, max_workers)
+                    for time_index, (speed, direction) in enumerate(time_steps):
 
                         if model_index_file.dim_subgrid is not None and model_index_file.var_subgrid_id is not None:
                             # Output to subgrids
@@ -784,6 +918,8 @@ def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, in
                     model_file.close()
 
         finally:
+            # Closing the S111 files writes their derived attributes
+            stack.close()
             model_index_file.close()
 
     else:
@@ -793,14 +929,8 @@ def model_to_s111(model_index_file, model_files, s111_path_prefix, cycletime, in
             for model_file in model_files:
                 try:
                     model_file.open()
-                    for time_index in range(len(model_file.datetime_values)):
-
-                        # Get native-grid output with invalid/masked values removed
-                        u_compressed, v_compressed, lat_compressed, lon_compressed = model_file.output_native_grid(
-                            time_index, target_depth)
-
-                        # Convert currents from u/v to speed/direction
-                        speed, direction = model.irregular_uv_to_speed_direction(u_compressed, v_compressed)
+                    time_steps = _time_steps(model_file, None, target_depth, max_workers)
+                    for time_index, (speed, direction, lat_compressed, lon_compressed) in enumerate(time_steps):
 
                         s111_file.add_feature_instance_group_data(model_file.datetime_values[time_index], speed,
                                                                   direction, cycletime, target_depth)
@@ -876,6 +1006,9 @@ def time_series_to_s111(input_data, s111_path_prefix, input_metadata, data_codin
 def concatenate_s111(h5_files, output_path):
     """Concatenate multiple S111 HDF5 hourly forecasts files into a single S111 HDF5 forecast cycle file.
 
+    The values of each hourly file are copied chunk for chunk as they are stored, without being decompressed and
+    compressed again, and the attributes are merged from the headers, so concatenating is bound by I/O.
+
     Limitations:
         Specified h5_files must be S-111 type-2 files each containing a single hourly forecast.
 
@@ -888,54 +1021,39 @@ def concatenate_s111(h5_files, output_path):
     # Use the first forecast file as a template for the new S111 file
     first_forecast_file = shutil.copy(h5_files[0], output_path)
 
-    try:
-        output_file = h5py.File(first_forecast_file, 'r+')
+    with h5py.File(first_forecast_file, 'r+') as output_file:
+        output_container = output_file['SurfaceCurrent']
+        output_instance = output_file['SurfaceCurrent/SurfaceCurrent.01']
+        min_speed = output_container.attrs['minDatasetCurrentSpeed']
+        max_speed = output_container.attrs['maxDatasetCurrentSpeed']
+        time_str = None
+        time_interval_secs = None
+
         # Add data starting with the second forecast file, use a starting index of 2
         for idx, path in enumerate(h5_files[1:], 2):
-
-            # Create new group for each input_file
-            output_file['SurfaceCurrent/SurfaceCurrent.01'].create_group(f'Group_{idx:03d}')
-
-            # Open and read input_file
-            try:
-                input_file = h5py.File(path, 'r')
-
-                data_shape = input_file['SurfaceCurrent/SurfaceCurrent.01/Group_001/values'].shape
-                time_str = input_file['/SurfaceCurrent/SurfaceCurrent.01/Group_001'].attrs['timePoint']
+            with h5py.File(path, 'r') as input_file:
+                input_group = input_file['SurfaceCurrent/SurfaceCurrent.01/Group_001']
+                time_str = input_group.attrs['timePoint']
 
                 if idx == 2:
-                    first_time = datetime.datetime.strptime(
-                        (output_file['/SurfaceCurrent/SurfaceCurrent.01/Group_001'].attrs['timePoint']), '%Y%m%dT%H%M%SZ')
-                    second_time = datetime.datetime.strptime(
-                        (input_file['/SurfaceCurrent/SurfaceCurrent.01/Group_001'].attrs['timePoint']), '%Y%m%dT%H%M%SZ')
-
+                    first_time = datetime.datetime.strptime(output_instance['Group_001'].attrs['timePoint'], '%Y%m%dT%H%M%SZ')
+                    second_time = datetime.datetime.strptime(time_str, '%Y%m%dT%H%M%SZ')
                     time_interval_secs = (second_time - first_time).total_seconds()
-                    output_file['SurfaceCurrent/SurfaceCurrent.01'].attrs.modify('timeRecordInterval', time_interval_secs)
-
-                output_file['SurfaceCurrent/SurfaceCurrent.01'].attrs.modify('dateTimeOfLastRecord', numpy.string_(time_str))
-                output_file[f'SurfaceCurrent/SurfaceCurrent.01/Group_{idx:03d}'].attrs.create('timePoint', numpy.string_(time_str), None, h5py.special_dtype(vlen=str))
-
-                # If the input_file has a lower minimum speed use the input_file minDatasetCurrentSpeed speed value
-                if input_file['SurfaceCurrent'].attrs['minDatasetCurrentSpeed'] < output_file['SurfaceCurrent'].attrs['minDatasetCurrentSpeed']:
-                    output_file['SurfaceCurrent'].attrs.modify('minDatasetCurrentSpeed', input_file['SurfaceCurrent'].attrs['minDatasetCurrentSpeed'])
-
-                # If the input_file has a greater maximum speed use the input_file maxDatasetCurrentSpeed speed value
-                if input_file['SurfaceCurrent'].attrs['maxDatasetCurrentSpeed'] > output_file['SurfaceCurrent'].attrs['maxDatasetCurrentSpeed']:
-                    output_file['SurfaceCurrent'].attrs.modify('maxDatasetCurrentSpeed', input_file['SurfaceCurrent'].attrs['maxDatasetCurrentSpeed'])
-
-                output_file['SurfaceCurrent/SurfaceCurrent.01'].attrs.modify('numGRP', idx)
-                output_file['SurfaceCurrent/SurfaceCurrent.01'].attrs.modify('numberOfTimes', idx)
-
-                # Add each input file's compound dataset containing spd/dir values to the output file
-                values_dtype = numpy.dtype([('surfaceCurrentSpeed', numpy.float32), ('surfaceCurrentDirection', numpy.float32)])
-                values = numpy.zeros(data_shape, dtype=values_dtype)
-                values['surfaceCurrentSpeed'] = input_file['SurfaceCurrent/SurfaceCurrent.01/Group_001/values']['surfaceCurrentSpeed']
-                values['surfaceCurrentDirection'] = input_file['SurfaceCurrent/SurfaceCurrent.01/Group_001/values']['surfaceCurrentDirection']
-                values_dset = output_file[f'SurfaceCurrent/SurfaceCurrent.01/Group_{idx:03d}'].create_dataset('values', data_shape, dtype=values_dtype, chunks=True, compression='gzip', compression_opts=9)
-                values_dset[...] = values
-            finally:
-                input_file.close()
-
-    finally:
-        output_file.close()
 
+                # Keep the lowest minimum and greatest maximum speed of all the input files
+                min_speed = min(min_speed, input_file['SurfaceCurrent'].attrs['minDatasetCurrentSpeed'])
+                max_speed = max(max_speed, input_file['SurfaceCurrent'].attrs['maxDatasetCurrentSpeed'])
+
+                # Copy the group with its timePoint, HDF5 copies the chunks of the values dataset as they are stored
+                # (with their compression) so nothing is decompressed or compressed again
+                input_file.copy(input_group, output_instance, name=f'Group_{idx:03d}')
+
+        # The header attributes are only written once, after all the groups are copied
+        if time_str is not None:
+            if time_interval_secs is not None:
+                output_instance.attrs.modify('timeRecordInterval', time_interval_secs)
+            output_instance.attrs.modify('dateTimeOfLastRecord', numpy.string_(time_str))
+            output_instance.attrs.modify('numGRP', len(h5_files))
+            output_instance.attrs.modify('numberOfTimes', len(h5_files))
+            output_container.attrs.modify('minDatasetCurrentSpeed', min_speed)
+            output_container.attrs.modify('maxDatasetCurrentSpeed', max_speed)
@@ -11,7 +11,7 @@ import h5py
 import numpy
 from osgeo import gdal, osr
 
-from ..s1xx import s1xx_sequence
+from ..s1xx import s1xx_sequence, ordered_imap
 from .api import S111File, FILLVALUE, S111Exception
 
 
@@ -193,7 +193,8 @@ def add_metadata(metadata: dict, data_file) -> S111File:
     return data_file
 
 
-def add_data_from_arrays(speed: s1xx_sequence, direction: s1xx_sequence, data_file, grid_properties: dict, datetime_value, data_coding_format) -> S111File:
+def add_data_from_arrays(speed: s1xx_sequence, direction: s1xx_sequence, data_file, grid_properties: dict, datetime_value, data_coding_format, stream: bool = False,
+                         quantize: bool = False) -> S111File:
     """  Updates an S111File object based on numpy array/h5py datasets.
         Calls :any:`create_s111` then fills in the HDF5 datasets with the supplied speed and direction numpy.arrays.
 
@@ -227,6 +228,15 @@ def add_data_from_arrays(speed: s1xx_sequence, direction: s1xx_sequence, data_fi
             - 'Ungeorectified gridded arrays': 3,
             - 'Moving platform': 4
 
+        stream
+            If True the new Group_NNN is written to the file immediately, along with the updated min/max,
+            numGRP and dateTimeOfLastRecord attributes, and the arrays are released so only one time step is held in memory.
+            The data_file must be open for writing, :any:`write_data_file` still has to be called at the end.
+
+        quantize
+            If True the values are stored quantized to their precision (see :any:`quantize_array`) with the shuffle filter,
+            they read back the same at that precision and the file is considerably smaller.
+
         Returns
         -------
         data_file
@@ -295,6 +305,10 @@ def add_data_from_arrays(speed: s1xx_sequence, direction: s1xx_sequence, data_fi
     grid = surface_current_group_object.values
     grid.surface_current_speed = speed
     grid.surface_current_direction = direction
+    grid.quantize = quantize
+
+    if stream:
+        surface_current_feature_instance_01.write_incremental(data_file, surface_current_feature)
 
     return data_file
 
@@ -364,15 +378,116 @@ def write_data_file(data_file):
     data_file.close()
 
 
-def to_geotiff(input_path, output_path):
+def _geotiff_time_string(timepoint) -> str:
+    """ Converts a timePoint attribute, S100 (20200101T060000Z) or ISO (2020-01-01T06:00:00), to the form used in the GeoTIFF names """
+    if isinstance(timepoint, bytes):
+        timepoint = timepoint.decode()
+    for time_format in ("%Y%m%dT%H%M%SZ", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.datetime.strptime(str(timepoint), time_format).strftime("%Y%m%dT%H%M%SZ")
+        except ValueError:
+            pass
+    raise S111Exception("Unrecognized timePoint {}".format(timepoint))
+
+
+def _geotiff_jobs(hdf5_file, output_path, time_stacked):
+    """ Reads the header of an S111 file and makes the arguments of :any:`_export_geotiff` for each GeoTIFF to create,
+    one per Group_NNN or, if time_stacked, one per feature instance.
+    """
+    jobs = []
+    filename = os.path.splitext(os.path.split(hdf5_file)[1])[0]
+    with h5py.File(hdf5_file, 'r') as h5_file:
+        instance_names = sorted(name for name, instance in h5_file['SurfaceCurrent'].items()
+                                if isinstance(instance, h5py.Group) and 'gridOriginLongitude' in instance.attrs)
+        for instance_name in instance_names:
+            feature_instance = h5_file['SurfaceCurrent'][instance_name]
+            prefix = filename if len(instance_names) == 1 else '{}_{}'.format(filename, instance_name.split('.')[-1])
+            group_names = ['Group_{:03d}'.format(idx) for idx in range(1, feature_instance.attrs['numGRP'] + 1)]
+            if time_stacked:
+                jobs.append((hdf5_file, feature_instance.name, group_names, '{}/{}.tif'.format(output_path, prefix)))
+            else:
+                for group_name in group_names:
+                    datetime_str = _geotiff_time_string(feature_instance[group_name].attrs['timePoint'])
+                    jobs.append((hdf5_file, feature_instance.name, [group_name], '{}/{}_{}.tif'.format(output_path, prefix, datetime_str)))
+    return jobs
+
+
+def _export_geotiff(hdf5_file, instance_path, group_names, name, cog, block_size):
+    """ Writes the speed and direction of the listed groups of a feature instance to a tiled, compressed GeoTIFF,
+    two bands per group in the order of group_names.  Each values dataset is read only once.
+    Runs in the worker processes of :any:`to_geotiff` so it opens the HDF5 file itself.
+    """
+    with h5py.File(hdf5_file, 'r') as h5_file:
+        feature_instance = h5_file[instance_path]
+        fillvalue = float(h5_file['Group_F']['SurfaceCurrent']['fillValue'][0])
+        y_dim = int(feature_instance.attrs['numPointsLatitudinal'])
+        x_dim = int(feature_instance.attrs['numPointsLongitudinal'])
+        spacing_y = feature_instance.attrs['gridSpacingLatitudinal']
+
+        # the S111 grid starts at the southern row, write the GeoTIFF north up with the nodes as the pixel points
+        geotransform = (feature_instance.attrs['gridOriginLongitude'], feature_instance.attrs['gridSpacingLongitudinal'], 0,
+                        feature_instance.attrs['gridOriginLatitude'] + spacing_y * (y_dim - 1), 0, -spacing_y)
+        srs = osr.SpatialReference()
+        srs.SetWellKnownGeogCS('WGS84')
+
+        options = ['TILED=YES', 'BLOCKXSIZE=%d' % block_size, 'BLOCKYSIZE=%d' % block_size, 'COMPRESS=DEFLATE', 'PREDICTOR=3', 'BIGTIFF=IF_SAFER']
+        if len(group_names) > 1:
+            options.append('INTERLEAVE=BAND')
+        tiff_name = name + '.tmp.tif' if cog else name
+        gdal.SetConfigOption('GTIFF_POINT_GEO_IGNORE', 'True')
+        dataset = gdal.GetDriverByName('GTiff').Create(tiff_name, x_dim, y_dim, 2 * len(group_names), gdal.GDT_Float32, options=options)
+        dataset.SetGeoTransform(geotransform)
+        dataset.SetProjection(srs.ExportToWkt())
+        dataset.SetMetadataItem("AREA_OR_POINT", "POINT")
+
+        for idx, group_name in enumerate(group_names):
+            group = feature_instance[group_name]
+            values = group['values'][()]  # one read for both speed and direction
+            timepoint = _geotiff_time_string(group.attrs['timePoint'])
+            for band_number, field, description in ((2 * idx + 1, 'surfaceCurrentSpeed', 'speed'),
+                                                    (2 * idx + 2, 'surfaceCurrentDirection', 'direction')):
+                band = dataset.GetRasterBand(band_number)
+                band.WriteArray(numpy.flipud(values[field]))
+                band.SetDescription(description if len(group_names) == 1 else '{} {}'.format(description, timepoint))
+                band.SetMetadataItem('timePoint', timepoint)
+                band.SetNoDataValue(fillvalue)
+        dataset.FlushCache()
+        dataset = None  # close the GDAL file
+
+    if cog:
+        source = gdal.Open(tiff_name)
+        try:
+            # direction can't be averaged so the overviews use nearest neighbour
+            gdal.GetDriverByName('COG').CreateCopy(name, source, options=[
+                'BLOCKSIZE=%d' % block_size, 'COMPRESS=DEFLATE', 'PREDICTOR=YES', 'BIGTIFF=IF_SAFER', 'RESAMPLING=NEAREST'])
+        finally:
+            source = None  # close before deleting the intermediate file
+            gdal.GetDriverByName('GTiff').Delete(tiff_name)
+    return name
+
+
+def to_geotiff(input_path, output_path, cog: bool = False, time_stacked: bool = False, max_workers: int = 1, block_size: int = 256):
     """Create a 2-Band GeoTIFF for every speed and direction compound dataset
        within each HDF5 file(s).
 
+    The GeoTIFFs are tiled and DEFLATE compressed and each values dataset is read once for both bands.
+    The files and groups are exported in the current process, or in a pool of processes with max_workers other than 1.
+
     Args:
         input_path: Path to a single S-111 HDF5 file or a directory containing
             one or more.
         output_path: Path to a directory where GeoTIFF file(s) will be
             generated.
+        cog: If True, write Cloud Optimized GeoTIFFs (COG driver, requires GDAL 3.1+).
+        time_stacked: If True, write one GeoTIFF per input file with a speed and a
+            direction band for every time step (described as "speed <timePoint>" etc.)
+            instead of one GeoTIFF per time step.
+        max_workers: Number of processes, None uses the number of cpus and the
+            default of 1 exports everything in the current process.
+        block_size: Width and height of the GeoTIFF tiles.
+
+    Returns:
+        List of the paths of the GeoTIFF files created.
     """
 
     if input_path.endswith('.h5'):
@@ -380,52 +495,8 @@ def to_geotiff(input_path, output_path):
     else:
         hdf5_files = glob('{}/*.h5'.format(input_path))
 
-    for file in hdf5_files:
-        print(file)
-        with h5py.File(file, 'r') as h5_file:
-            feature_instance = h5_file['/SurfaceCurrent/SurfaceCurrent.01/']
-            num_grp = feature_instance.attrs['numGRP']
-            split_path = os.path.split(file)
-            filename = os.path.splitext(split_path[1])
-            fillvalue = float(h5_file['Group_F']['SurfaceCurrent']['fillValue'][0])
-
-            for idx in range(1, num_grp + 1):
-                values = feature_instance['Group_{:03d}/values'.format(idx)]
-                speed = values['surfaceCurrentSpeed']
-                direction = values['surfaceCurrentDirection']
-                timepoint = feature_instance['Group_{:03d}'.format(idx)].attrs['timePoint']
-                timepoint_str = datetime.datetime.strptime(timepoint, "%Y-%m-%dT%H:%M:%S")
-                datetime_str = timepoint_str.strftime("%Y%m%dT%H%M%SZ")
-
-                x_dim = speed.shape[1]
-                y_dim = speed.shape[0]
-
-                geoTransform = []
-                for i in range(6):
-                    geoTransform.append(0.0)
-                geoTransform[0] = feature_instance.attrs['gridOriginLongitude']
-                geoTransform[1] = feature_instance.attrs['gridSpacingLongitudinal']
-                geoTransform[2] = 0
-                geoTransform[3] = feature_instance.attrs['gridOriginLatitude']
-                geoTransform[4] = 0
-                geoTransform[5] = feature_instance.attrs['gridSpacingLatitudinal']
-
-                srs = osr.SpatialReference()
-                srs.SetWellKnownGeogCS('WGS84')
-
-                num_bands = 2
-                name = '{}/{}_{}.tif'.format(output_path, filename[0], datetime_str)
-                gdal.SetConfigOption('GTIFF_POINT_GEO_IGNORE', 'True')
-                dataset = gdal.GetDriverByName('GTiff').Create(name, x_dim, y_dim, num_bands, gdal.GDT_Float32)
-                dataset.SetGeoTransform(geoTransform)
-                dataset.SetProjection(srs.ExportToWkt())
-
-                dataset.GetRasterBand(1).WriteArray(speed)
-                dataset.GetRasterBand(1).SetDescription('speed')
-                dataset.GetRasterBand(1).SetNoDataValue(fillvalue)
-                dataset.GetRasterBand(2).WriteArray(direction)
-                dataset.GetRasterBand(2).SetDescription('direction')
-                dataset.GetRasterBand(2).SetNoDataValue(fillvalue)
-                dataset.SetMetadataItem("AREA_OR_POINT", "POINT")
+    jobs = [job + (cog, block_size) for file in hdf5_files for job in _geotiff_jobs(file, output_path, time_stacked)]
+    names = list(ordered_imap(_export_geotiff, jobs, max_workers))
 
     print('Conversion Complete')
+    return names
@@ -5,6 +5,7 @@ See :any:`extending_the_api` for further details about using the classes to crea
 """
 
 import collections
+import contextvars
 from abc import ABC, abstractmethod
 from typing import Callable, Iterator, Union, Optional, List, Type
 import re
@@ -12,13 +13,115 @@ import logging
 import inspect
 import traceback
 import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 
 import h5py
 # @todo - consider removing the numpy dependence
 import numpy
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+
+class LazyGridField(NDArrayOperatorsMixin):
+    """ A read-only, array-like view of one field of a compound HDF5 dataset (e.g. the depth of a 'values' grid).
+    Nothing is read until the view is indexed, so slicing and striding, like view[100:200, ::10],
+    become HDF5 hyperslab reads of that field and only the chunks that are needed get decompressed.
+    Converting to numpy (numpy.asarray(view) or view[()]) or using it in arithmetic reads the whole field.
+    """
+
+    def __init__(self, dataset: h5py.Dataset, field: str):
+        self.dataset = dataset
+        self.field = field
+
+    def __repr__(self):
+        return "<{} '{}' of {} shape {} type {}>".format(self.__class__.__name__, self.field, self.dataset.name, self.shape, self.dtype)
+
+    @property
+    def shape(self) -> tuple:
+        return self.dataset.shape
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self.dataset.dtype[self.field]
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(numpy.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __array__(self, dtype=None):
+        data = self.dataset[self.field]
+        return data if dtype is None else data.astype(dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(numpy.asarray(val) if isinstance(val, LazyGridField) else val for val in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if not all(k is Ellipsis or isinstance(k, (slice, int, numpy.integer)) for k in key) or key.count(Ellipsis) > 1:
+            return numpy.asarray(self)[key]  # fancy indexing, read everything and let numpy do it
+        if Ellipsis in key:
+            pos = key.index(Ellipsis)
+            key = key[:pos] + (slice(None),) * (self.ndim - len(key) + 1) + key[pos + 1:]
+        if len(key) > self.ndim:
+            raise IndexError("too many indices for {} dimensional grid".format(self.ndim))
+        key = key + (slice(None),) * (self.ndim - len(key))
+        # HDF5 hyperslabs only go forward, read negative steps forwards and reverse them afterwards
+        h5_key, reverse = [], []
+        for k, n in zip(key, self.shape):
+            if isinstance(k, slice):
+                start, stop, step = k.indices(n)
+                if step < 0:
+                    count = len(range(start, stop, step))
+                    reverse.append(slice(None, None, -1))
+                    k = slice(start + step * (count - 1), start + 1, -step) if count else slice(0, 0)
+                else:
+                    reverse.append(slice(None))
+                    k = slice(start, max(start, stop), step)
+            else:
+                k = int(k)
+                if not -n <= k < n:
+                    raise IndexError("index {} is out of bounds for axis with size {}".format(k, n))
+                k = k % n
+            h5_key.append(k)
+        data = self.dataset[(self.field,) + tuple(h5_key)]
+        if any(r.step for r in reverse):
+            data = data[tuple(reverse)]
+        return data
+
+
+Record = s1xx_sequence = Union[numpy.ndarray, h5py.Dataset, LazyGridField]
+
+#: True while an S1XXFile opened with lazy_grids=True is being read, see :any:`S1xxGridsBase.read`
+_lazy_grids = contextvars.ContextVar("lazy_grids", default=False)
+
+#: attributes that change while a file is in SWMR mode, see :any:`S1XXFile.start_swmr`
+SWMR_UPDATED_ATTRIBUTES = ("numGRP", "dateTimeOfLastRecord")
+
+
+def swmr_status_dataset(group):
+    """ Returns the dataset that mirrors the SWMR_UPDATED_ATTRIBUTES of a group for SWMR readers, the values of its first
+    Group_NNN, or None if it has no groups.  SWMR readers only see attribute changes of datasets (after refreshing them), never of groups.
+    """
+    names = [name for name in group if re.match(r"Group_\d+$", name)]
+    if names and "values" in group[min(names)]:
+        return group[min(names)]["values"]
+    return None
+
 
-Record = s1xx_sequence = Union[numpy.ndarray, h5py.Dataset]
 s1xx_sequence_types = s1xx_sequence.__args__
 
 try:
@@ -54,6 +157,118 @@ class FixedTimeZones(datetime.tzinfo):
         return datetime.timedelta(0)
 
 
+def _attribute_unchanged(group_object, key, val) -> bool:
+    """ True if the HDF5 attribute key of group_object already holds val """
+    if key not in group_object.attrs:
+        return False
+    old = group_object.attrs[key]
+    if isinstance(old, bytes):
+        old = old.decode()
+    if isinstance(val, bytes):
+        val = val.decode()
+    try:
+        return numpy.shape(old) == numpy.shape(val) and bool(numpy.all(numpy.asarray(old) == numpy.asarray(val)))
+    except (TypeError, ValueError):
+        return False
+
+
+def ordered_imap(func: Callable, arg_tuples, max_workers: int = None, window: int = None) -> Iterator:
+    """ Like itertools.starmap but runs func in a pool of processes and yields the results in the same order as the arguments.
+    Only `window` calls are in flight at any time so results that are waiting to be consumed don't accumulate in memory.
+
+    Parameters
+    ----------
+    func
+        function to call, must be picklable (i.e. defined at module level)
+    arg_tuples
+        iterable of argument tuples, func(*args) is called for each
+    max_workers
+        number of processes, None uses os.cpu_count().  1 or less runs everything serially in the current process.
+    window
+        maximum number of calls submitted but not yet yielded, default is twice the number of processes
+
+    Returns
+    -------
+    Iterator
+        the results of func in the order of arg_tuples
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1:
+        for args in arg_tuples:
+            yield func(*args)
+        return
+    if window is None:
+        window = 2 * max_workers
+    in_flight = collections.deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for args in arg_tuples:
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+            in_flight.append(executor.submit(func, *args))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def constant_array(shape, value, dtype=numpy.float32) -> numpy.ndarray:
+    """ Make a read-only array of the given shape where every element is `value` without allocating the full array.
+    The result is a zero-stride view of a single element so a field that is all fill (or any other constant)
+    costs nothing until it is written, and the grid writers skip the chunks entirely if the value is the fill value.
+
+    Parameters
+    ----------
+    shape
+        shape of the array
+    value
+        the value of every element
+    dtype
+        numpy datatype of the array
+
+    Returns
+    -------
+    numpy.ndarray
+        a broadcast view that behaves like numpy.full(shape, value, dtype) for reading
+    """
+    return numpy.broadcast_to(numpy.array(value, dtype=dtype), shape)
+
+
+def is_constant_array(val) -> bool:
+    """ Determine if an array was made by constant_array (or any other zero-stride broadcast),
+    meaning every element has the same value and val.flat[0] describes the whole array.
+    """
+    return isinstance(val, numpy.ndarray) and val.ndim > 0 and val.size > 0 and not any(val.strides)
+
+
+def quantize_array(val, decimals: int) -> numpy.ndarray:
+    """ Round floating point data to a power of two step that is finer than 10**-decimals.
+    The result is within a quarter of 10**-decimals of the input while the low mantissa bits become zero.
+    Input that is already rounded to `decimals` (i.e. numpy.round(val, decimals)) rounds back to exactly the same values,
+    other input may round differently in the last decimal place.
+    With the HDF5 shuffle filter the data compresses far better than decimal rounded floats
+    (0.01 has no exact binary representation so decimal rounding leaves every mantissa bit in use).
+    This is the same idea as the HDF5 scale-offset filter which can't be used on the compound datasets of S100 grids.
+
+    Parameters
+    ----------
+    val
+        floating point array, it is not modified.  Fill values that are integers and NaN pass through unchanged.
+    decimals
+        number of decimal places that must be preserved, val should already be rounded to them
+
+    Returns
+    -------
+    numpy.ndarray
+        quantized array of the same dtype
+    """
+    val = numpy.asarray(val)
+    # half the step must be under half of 10**-decimals, so a step of 2**-bits < 10**-decimals
+    scale = val.dtype.type(2.0 ** (int(numpy.ceil(decimals * numpy.log2(10))) + 1))
+    if is_constant_array(val):
+        return constant_array(val.shape, numpy.round(val.flat[0] * scale) / scale, val.dtype)
+    # multiplying and dividing by a power of two is exact so this works in the original precision
+    return numpy.round(val * scale) / scale
+
+
 def convert_numpy_strings_to_h5py(vals, names=None):
     """ change numpy arrays with "U" into array using the h5py special string_dtype that translates to utf-8 in the file.
 
@@ -95,6 +310,7 @@ class S1xxAttributesBase(ABC):
     This base class is built from the version 2.0.0 that was eventually published Nov. 2019
     """
     _attr_name_suffix = "_attribute_name"
+    _ignored_hdf5_keys = ()  #: groups or datasets that are expected in the HDF5 but aren't read (i.e. non-S100 extras this package adds)
 
     def __init__(self, recursively_create_children=False, **kywrds):
         self._hdf5_path = ""
@@ -144,26 +360,37 @@ class S1xxAttributesBase(ABC):
         None
 
         """
-        logging.debug("Reading attributes" + str(self))
+        logging.debug("Reading attributes%s", self)
         self._hdf5_path = group_object.name
         expected_items = self.get_standard_properties_mapping()
+        attrs = dict(group_object.attrs)
+        if isinstance(group_object, h5py.Dataset):
+            # copies left by a SWMR writer that couldn't finish (see S1XXFile.finish_swmr) aren't attributes of the dataset
+            for key in SWMR_UPDATED_ATTRIBUTES:
+                attrs.pop(key, None)
+        elif group_object.file.swmr_mode and any(key in attrs for key in SWMR_UPDATED_ATTRIBUTES):
+            # the group attributes stay as they were when the file was opened, the writer mirrors them on a dataset
+            status = swmr_status_dataset(group_object)
+            if status is not None:
+                attrs.update({key: status.attrs[key] for key in SWMR_UPDATED_ATTRIBUTES if key in status.attrs})
         # basic attributes -- should be simple types so just set them
-        for attr_name in group_object.attrs:
+        for attr_name, val in attrs.items():
             if attr_name not in expected_items:
-                logging.info(" The attr/val: " + attr_name + "/" + str(
-                    group_object.attrs[attr_name]) + " was in the group_object but not found in the standard attributes")
-                self._attributes[attr_name] = group_object.attrs[attr_name]
+                logging.info(" The attr/val: " + attr_name + "/" + str(val) + " was in the group_object but not found in the standard attributes")
+                self._attributes[attr_name] = val
             else:
                 use_type = self.__getattribute__(expected_items[attr_name] + "_type")
                 if is_sub_class(use_type, Enum):
-                    logging.debug(" Enumerated attr/val: " + attr_name + "/" + str(group_object.attrs[attr_name]) + " found and read")
-                    self.set_enum_attribute(group_object.attrs[attr_name], attr_name, use_type)
+                    logging.debug(" Enumerated attr/val: " + attr_name + "/" + str(val) + " found and read")
+                    self.set_enum_attribute(val, attr_name, use_type)
                 elif is_sub_class(use_type, (datetime.date, datetime.datetime, datetime.time)):
-                    logging.debug(" datetime string: " + attr_name + "/" + str(group_object.attrs[attr_name]) + " found and read")
-                    self.set_datetime_attribute(group_object.attrs[attr_name], attr_name, use_type)
+                    logging.debug(" datetime string: " + attr_name + "/" + str(val) + " found and read")
+                    self.set_datetime_attribute(val, attr_name, use_type)
                 else:
-                    logging.debug(" Standard attr/val: " + attr_name + "/" + str(group_object.attrs[attr_name]) + " found and read")
-                    setattr(self, expected_items[attr_name], group_object.attrs[attr_name])
+                    logging.debug(" Standard attr/val: " + attr_name + "/" + str(val) + " found and read")
+                    if use_type is str and isinstance(val, bytes):  # fixed length string, see start_swmr
+                        val = val.decode()
+                    setattr(self, expected_items[attr_name], val)
 
     def read(self, group_object):
         """ Given an h5py.File or a h5py group then read the data based on the encoded S100+ spec.
@@ -179,7 +406,7 @@ class S1xxAttributesBase(ABC):
 
         """
 
-        logging.debug("Reading " + str(self))
+        logging.debug("Reading %s", self)
         self.read_simple_attributes(group_object)
 
         expected_items = self.get_standard_properties_mapping()
@@ -201,6 +428,8 @@ class S1xxAttributesBase(ABC):
                 lk.append(data_key)
             elif data_key in expected_items:
                 basic_keys.append(data_key)
+            elif data_key in self._ignored_hdf5_keys:
+                logging.debug(data_key + " is not part of the S100 data, skipping")
             else:
                 logging.warning(
                     data_key + " is an HDF5 group and was in the group_object but not found in the standard attributes, SKIPPING!")
@@ -230,7 +459,7 @@ class S1xxAttributesBase(ABC):
             o = self.__getattribute__(list_type_group)
             o.read(group_object)
 
-    def write_simple_attributes(self, group_object):
+    def write_simple_attributes(self, group_object, changed_only: bool = False, keys=None):
         # this is for all the types that can be attributes of a group or dataset in HDF5
         # these simple hdf5 attributes can't have subgroups or datasets
 
@@ -238,19 +467,27 @@ class S1xxAttributesBase(ABC):
         # if a value is an enum then translate to the correct Enum class
         # if a value is a date, time - convert to character string per S100, section 10C-7 table 10C-1
         # otherwise write as a simple attribute and simple type
+        # with changed_only the attributes that already hold the same value in the file are left alone,
+        # rewriting variable length strings leaves their old copies in the file.  keys limits the attributes written.
         self._hdf5_path = group_object.name
 
         for key, val in self._attributes.items():
-            if isinstance(val, s1xx_sequence_types):
+            if keys is not None and key not in keys:
+                continue
+            elif isinstance(val, s1xx_sequence_types):
                 continue  # skip these types for now
             elif isinstance(val, S1xxWritesOwnGroupBase):
                 continue  # skip these types for now
             elif isinstance(val, S1xxAttributesBase):
                 continue  # skip these types for now
             elif isinstance(val, (datetime.date, datetime.datetime, datetime.time)):
+                if changed_only and _attribute_unchanged(group_object, key, val.isoformat()):
+                    continue
                 logging.debug(key + " datetime: {}", val)
                 group_object.attrs[key] = val.isoformat()
             elif isinstance(val, Enum):
+                if changed_only and _attribute_unchanged(group_object, key, val.value):
+                    continue
                 logging.debug(key + " enumeration: " + str(val))
                 enum_as_dict = collections.OrderedDict([[item.name, item.value] for item in type(val)])
                 int_type = numpy.uint8
@@ -268,6 +505,8 @@ class S1xxAttributesBase(ABC):
                     group_object.attrs.create(key, val.value, dtype=enumtype)
 
             else:
+                if changed_only and _attribute_unchanged(group_object, key, val):
+                    continue
                 logging.debug(key + " simple type: " + str(val))
                 group_object.attrs[key] = val
 
@@ -284,7 +523,7 @@ class S1xxAttributesBase(ABC):
         None
 
         """
-        logging.debug("Writing" + " " + str(self))
+        logging.debug("Writing %s", self)
 
         self.write_simple_attributes(group_object)
 
@@ -640,7 +879,7 @@ class S1xxMetadataListBase(list, S1xxWritesOwnGroupBase):
         return self[-1]
 
     def read(self, group_object):
-        logging.debug("Reading " + str(self))
+        logging.debug("Reading %s", self)
 
         # keys are HDF5 groups or datasets
         self._hdf5_path = group_object.name
@@ -671,7 +910,7 @@ class S1xxMetadataListBase(list, S1xxWritesOwnGroupBase):
         # otherwise write as a simple attribute and simple type
         self._hdf5_path = group_object.name
 
-        logging.debug("Writing" + " " + str(self))
+        logging.debug("Writing %s", self)
         # create N new group objects named as metadata_name.NNN
         for index, val in enumerate(self):
             name = self.metadata_name + self.write_format_str % (index + 1)
@@ -766,7 +1005,7 @@ class S1xxDatasetBase(list, S1xxWritesOwnGroupBase):
 
         """
         # First determine the write order of the keys
-        logging.debug("Writing" + " " + str(self))
+        logging.debug("Writing %s", self)
         dataset = None
         if len(self) > 0:
             val = self[0]
@@ -822,6 +1061,13 @@ class S1xxDatasetBase(list, S1xxWritesOwnGroupBase):
 
 
 class S1xxGridsBase(S1xxWritesOwnGroupBase):
+    #: write the dataset unchunked and uncompressed so reading all of it is one contiguous read,
+    #: for small datasets that are always read whole like the time series of one station
+    contiguous = False
+    #: store fields with a precision (see get_precisions) quantized with :any:`quantize_array` and add the shuffle filter,
+    #: the values read back are the same when rounded to that precision and the files are much smaller
+    quantize = False
+
     @property
     @abstractmethod
     def metadata_name(self) -> str:
@@ -833,8 +1079,39 @@ class S1xxGridsBase(S1xxWritesOwnGroupBase):
         self.read_simple_attributes(group_object)
         # for attr in self.get_standard_properties():
         #    setattr(self, attr, group_object[getattr(self, attr + self._attr_name_suffix)])
-        for name in group_object.dtype.names:
-            self._attributes[name] = group_object[name]
+        if _lazy_grids.get():
+            # opened with lazy_grids=True, indexing the fields reads just the requested part from the file
+            for name in group_object.dtype.names:
+                self._attributes[name] = LazyGridField(group_object, name)
+        else:
+            for name in group_object.dtype.names:
+                self._attributes[name] = group_object[name]
+
+    def get_fill_values(self):
+        """ The fill value of each field in the same order as get_write_order, or None if the grid has no fill value.
+        When supplied, the fill values become the HDF5 fill value of the dataset and chunks
+        that contain nothing but fill are never written, so they take no space in the file.
+        """
+        return None
+
+    def get_precisions(self):
+        """ The number of decimal places that matter in each field in the same order as get_write_order,
+        None for fields (like enumerations) that are stored exactly.  Used when quantize is set.
+        None (the default) means no field is quantized.
+        """
+        return None
+
+    def _gzip_level(self):
+        # quantized and shuffled data compresses as well at level 6 as 9, and several times faster
+        return 6 if self.quantize else 9
+
+    def _quantize_fields(self, write_keys, write_array):
+        precisions = self.get_precisions() if self.quantize else None
+        if precisions is None:
+            return write_array
+        precision_of = dict(zip(self.get_write_order(), precisions))
+        return [quantize_array(val, precision_of[key]) if precision_of.get(key) is not None else val
+                for key, val in zip(write_keys, write_array)]
 
     def write(self, group_object):
         # @todo - is there a bug here if some instances are missing attributes leading to a mismatched array?
@@ -851,8 +1128,13 @@ class S1xxGridsBase(S1xxWritesOwnGroupBase):
         """
 
         # First determine the write order of the keys
-        logging.debug("Writing" + " " + str(self))
+        logging.debug("Writing %s", self)
 
+        dataset = group_object.get(self.metadata_name)
+        if isinstance(dataset, h5py.Dataset) and self.is_stored_in(dataset):
+            # already in the file (read from it or released after streaming it), only the attributes may have changed
+            self.write_simple_attributes(dataset)
+            return
         dataset = None
 
         write_keys = []
@@ -864,24 +1146,142 @@ class S1xxGridsBase(S1xxWritesOwnGroupBase):
             if key not in write_keys and isinstance(val, s1xx_sequence_types):
                 write_keys.append(key)
         # write_keys.extend(set(self._attributes.keys()).difference(write_keys))
-        write_array = [self._attributes[key] for key in write_keys]
+        write_array = self._quantize_fields(write_keys, [self._attributes[key] for key in write_keys])
 
         write_compound_dtype = []
         if self.get_compound_dtype():
             write_compound_dtype.extend(self.get_compound_dtype())
         if len(write_keys) != len(write_compound_dtype):
             raise Exception("write keys and write_compound_dtype must be same length {} vs {}".format(write_keys, write_compound_dtype))
-        # hdf5 needs names to the columns which is done in a record array or structured array.
-        # but to create that without specifying type we need to transpose first then call 'fromarrays'
+        compound_dtype = numpy.dtype([(name, dtype) for name, dtype in zip(write_keys, write_compound_dtype)])
+        try:
+            del group_object[self.metadata_name]
+        except KeyError:
+            pass  # didn't exist, no error
+
+        fill_values = None if self.contiguous else self.get_fill_values()
+        if fill_values is not None and len(fill_values) != len(write_keys):
+            fill_values = None  # extra unordered fields were added, so there is no fill record to compare against
+        if fill_values is not None:
+            write_array = [val if isinstance(val, s1xx_sequence_types) else numpy.asarray(val) for val in write_array]
+            shape = write_array[0].shape
+            if any(val.shape != shape for val in write_array):
+                raise ValueError("All fields of {} must have the same shape, got {}".format(self.metadata_name, [val.shape for val in write_array]))
+            if not shape or 0 in shape:
+                fill_values = None  # chunked storage needs a non-empty shape, use the simple path below
+        if fill_values is None:
+            # hdf5 needs names to the columns which is done in a record array or structured array.
+            # but to create that without specifying type we need to transpose first then call 'fromarrays'
 
-        # numpy.array is coming out with wrong (at least different) shape and fromarrays is working -- not sure why right now.
-        # rec_array = numpy.array(write_array, dtype=[(name, 'f4') for name in write_keys])
-        rec_array = numpy.core.records.fromarrays(write_array, dtype=[(name, dtype) for name, dtype in zip(write_keys, write_compound_dtype)])
-        dataset = group_object.create_dataset(self.metadata_name, data=rec_array, chunks=True, compression='gzip', compression_opts=9)
+            # numpy.array is coming out with wrong (at least different) shape and fromarrays is working -- not sure why right now.
+            # rec_array = numpy.array(write_array, dtype=[(name, 'f4') for name in write_keys])
+            rec_array = numpy.core.records.fromarrays(write_array, dtype=compound_dtype)
+            if self.contiguous:
+                dataset = group_object.create_dataset(self.metadata_name, data=rec_array)
+            else:
+                dataset = group_object.create_dataset(self.metadata_name, data=rec_array, chunks=True, compression='gzip',
+                                                      compression_opts=self._gzip_level(), shuffle=self.quantize)
+        else:
+            dataset = self._write_sparse(group_object, write_keys, write_array, compound_dtype, fill_values)
         #         # noinspection PyAttributeOutsideInit
         # pylint: disable=attribute-defined-outside-init
         self.write_simple_attributes(dataset)
 
+    def is_stored_in(self, dataset) -> bool:
+        """ Returns True if every field is a LazyGridField of the given dataset, so writing to it again is not needed.
+        """
+        fields = [val for val in self._attributes.values() if isinstance(val, s1xx_sequence_types)]
+        return bool(fields) and all(isinstance(val, LazyGridField) and val.dataset == dataset for val in fields) and \
+            set(dataset.dtype.names) == {key for key, val in self._attributes.items() if isinstance(val, s1xx_sequence_types)}
+
+    def release(self, file_obj):
+        """ Replaces the arrays of each field with a LazyGridField of the dataset they were written to so the memory can be freed.
+        Call after writing, the data stays available but is read back from the file when indexed.
+
+        Parameters
+        ----------
+        file_obj
+            The h5py.File (or S1XXFile) the grid was written into
+
+        Returns
+        -------
+        None
+        """
+        dataset = self.get_hdf5_from_file(file_obj)
+        if not isinstance(dataset, h5py.Dataset):
+            raise ValueError("{} has not been written to {} yet".format(self.metadata_name, file_obj))
+        for name in dataset.dtype.names:
+            self._attributes[name] = LazyGridField(dataset, name)
+
+    def _write_sparse(self, group_object, write_keys, write_array, compound_dtype, fill_values):
+        """ Create the dataset with the fill record as the HDF5 fill value then write it one chunk at a time,
+        skipping any chunk where every field is fill.  Skipped chunks are never allocated in the file and
+        read back as the fill value.  Fields made with constant_array are never expanded to full size.
+        """
+        fill_record = numpy.array(tuple(fill_values), dtype=compound_dtype)
+        dataset = group_object.create_dataset(self.metadata_name, shape=write_array[0].shape, dtype=compound_dtype,
+                                              chunks=True, compression='gzip', compression_opts=self._gzip_level(), fillvalue=fill_record,
+                                              shuffle=self.quantize)
+        self._write_chunks(dataset, write_keys, write_array, fill_record)
+        return dataset
+
+    @staticmethod
+    def _write_chunks(dataset, write_keys, write_array, fill_record=None):
+        """ Write the fields into an existing dataset one chunk at a time.
+        If fill_record is supplied then chunks where every field is fill are skipped.
+        """
+        if fill_record is None:
+            constant = constant_is_fill = [False] * len(write_keys)
+        else:
+            # a constant field is either all fill (never forces a write) or all data (always forces a write)
+            constant = [is_constant_array(val) for val in write_array]
+            constant_is_fill = [is_const and val.flat[0] == fill_record[key] for is_const, val, key in zip(constant, write_array, write_keys)]
+            if all(constant_is_fill):
+                return
+        for chunk_slices in dataset.iter_chunks():
+            blocks = []
+            all_fill = fill_record is not None
+            for key, val, is_const, const_fill in zip(write_keys, write_array, constant, constant_is_fill):
+                block = val[chunk_slices]
+                if all_fill and not const_fill:
+                    all_fill = not is_const and bool(numpy.all(block == fill_record[key]))
+                blocks.append(block)
+            if all_fill:
+                continue
+            chunk_data = numpy.empty(blocks[0].shape, dtype=dataset.dtype)
+            for key, block in zip(write_keys, blocks):
+                chunk_data[key] = block
+            dataset[chunk_slices] = chunk_data
+
+    def write_in_place(self, group_object):
+        """ Write the fields into the values dataset that already exists in group_object instead of replacing it.
+        This is what allows data to be written while the file is in SWMR mode (see :any:`S1XXFile.start_swmr`),
+        as HDF5 only allows data to be written to existing datasets then.
+        The dataset must have the same shape and fields and chunks that are all fill are skipped,
+        so it is meant for datasets that were created with fill values and not written yet.
+
+        Parameters
+        ----------
+        group_object
+            HDF5 group that contains the values dataset
+
+        Returns
+        -------
+        HDF5 dataset written to
+        """
+        dataset = group_object[self.metadata_name]
+        write_keys = list(dataset.dtype.names)
+        write_array = self._quantize_fields(write_keys, [self._attributes[key] for key in write_keys])
+        write_array = [val if isinstance(val, s1xx_sequence_types) else numpy.asarray(val) for val in write_array]
+        if any(val.shape != dataset.shape for val in write_array):
+            raise ValueError("The fields of {} must match the existing shape {}, got {}".format(
+                self.metadata_name, dataset.shape, [val.shape for val in write_array]))
+        fill_record = None
+        if self.get_fill_values() is not None:
+            fill_record = numpy.array(dataset.fillvalue, dtype=dataset.dtype)
+        self._write_chunks(dataset, write_keys, write_array, fill_record)
+        return dataset
+
 
 class S1XXFile(h5py.File):
     """
@@ -889,6 +1289,10 @@ class S1XXFile(h5py.File):
     create_dataset  to insert array data
     attrs           a dictionary-like to add/read metadata about the current group
     create_group    to make a group containing datasets and/or metadata
+
+    Pass lazy_grids=True to read the grids as :any:`LazyGridField` views instead of numpy arrays,
+    so opening the file doesn't decompress every grid and indexing a grid only reads the chunks it needs.
+    The views read from the file so they can only be used while it is open.
     """
 
     def __init__(self, *args, **kywrds):
@@ -896,6 +1300,7 @@ class S1XXFile(h5py.File):
         kywrds.setdefault('root', None)
         self.root = None
         self.root_type = kywrds.pop('root')
+        self.lazy_grids = kywrds.pop('lazy_grids', False)
         if "driver" in kywrds:
             if kywrds['driver'] == 'family':  # @todo @fixme -- this is from the NAVO files, figure how to set memb_size automatically.
                 kywrds.setdefault('memb_size', 681574400)
@@ -908,7 +1313,11 @@ class S1XXFile(h5py.File):
     def read(self):
         self.root = self.root_type()
         self.root._hdf5_path = "/"
-        self.root.read(self)
+        token = _lazy_grids.set(self.lazy_grids)
+        try:
+            self.root.read(self)
+        finally:
+            _lazy_grids.reset(token)
 
     def write(self):
         self.root._hdf5_path = "/"
@@ -917,6 +1326,108 @@ class S1XXFile(h5py.File):
     def create_empty_metadata(self):
         self.root = self.root_type(True)
 
+    def start_swmr(self):
+        """ Writes the metadata and data added so far then switches the file to SWMR (single writer multiple reader) mode
+        so other processes can read the file while time steps are still being added.
+
+        The file must have been opened for writing with libver='latest'.
+        HDF5 only supports writing data to existing datasets and changing existing attributes while in SWMR mode,
+        so every Group_NNN has to be added before this is called.  Make the groups that aren't computed yet
+        from :any:`constant_array` of the fill value, those don't use any space in the file,
+        and set numGRP to the number of groups that are complete.
+        Then call :any:`FeatureInstanceDCF2.write_completed_group` as each group is computed.
+
+        Readers open the file with S1XXFile(path, "r", libver='latest', swmr=True) and call :any:`refresh`
+        to see the groups completed since the file was opened.
+        SWMR readers never see changed group attributes, so numGRP and dateTimeOfLastRecord are also copied onto the
+        values dataset of the first Group_NNN (see :any:`swmr_status_dataset`) where refreshing makes the changes visible,
+        and dateTimeOfLastRecord is stored as a fixed length string so changing it can't move it out from under a reader.
+        Closing the file undoes both with :any:`finish_swmr`.
+
+        Returns
+        -------
+        None
+        """
+        if self.root is not None:
+            self.write()
+
+        def _prepare_attributes(_name, obj):
+            keys = [key for key in SWMR_UPDATED_ATTRIBUTES if key in obj.attrs] if isinstance(obj, h5py.Group) else []
+            if not keys:
+                return
+            status = swmr_status_dataset(obj)
+            for key in keys:
+                val = obj.attrs[key]
+                dtype = obj.attrs.get_id(key).dtype
+                if h5py.check_string_dtype(dtype) is not None:
+                    # variable length strings live in the global heap and changing one moves it out from under the readers,
+                    # so store a fixed length string, later values have to be the same length (which S100 date times are)
+                    val = val.encode() if isinstance(val, str) else bytes(val)
+                    dtype = numpy.dtype("S{}".format(max(len(val), 1)))
+                    obj.attrs.create(key, val, dtype=dtype)
+                if status is not None:
+                    status.attrs.create(key, val, dtype=dtype)
+        self.visititems(_prepare_attributes)
+        self.flush()
+        self.swmr_mode = True
+        self._swmr_writer = True
+
+    @staticmethod
+    def finish_swmr(path: str):
+        """ Removes the copies of numGRP and dateTimeOfLastRecord that :any:`start_swmr` made for SWMR readers
+        and stores dateTimeOfLastRecord as a variable length string again, so the finished file is a normal S100 file.
+
+        Closing a file that :any:`start_swmr` was called on does this.  HDF5 doesn't allow it while SWMR readers
+        still have the file open, in which case closing logs a warning and this should be called once the readers are done.
+
+        Parameters
+        ----------
+        path
+            path of the file, it must not be open
+
+        Returns
+        -------
+        None
+        """
+        def _restore_attributes(_name, obj):
+            keys = [key for key in SWMR_UPDATED_ATTRIBUTES if key in obj.attrs] if isinstance(obj, h5py.Group) else []
+            if not keys:
+                return
+            status = swmr_status_dataset(obj)
+            for key in keys:
+                if obj.attrs.get_id(key).dtype.kind == "S":
+                    obj.attrs.create(key, obj.attrs[key].decode(), dtype=h5py_string_dtype)
+                if status is not None and key in status.attrs:
+                    del status.attrs[key]
+        with h5py.File(path, "r+") as h5_file:
+            h5_file.visititems(_restore_attributes)
+
+    def close(self):
+        path = self.filename if getattr(self, "_swmr_writer", False) and self.id.valid else None
+        self._swmr_writer = False
+        super().close()
+        if path is not None:
+            try:
+                self.finish_swmr(path)
+            except OSError:  # HDF5 won't open the file for writing while readers hold it
+                logging.warning("%s is still open by SWMR readers, call S1XXFile.finish_swmr on it after they close it", path)
+
+    def refresh(self):
+        """ For files opened with swmr=True, gets the changes made by the SWMR writer since the file was opened
+        (or last refreshed) and re-reads the metadata, so numGRP and dateTimeOfLastRecord are current and the
+        values datasets show the data written so far.
+
+        Returns
+        -------
+        None
+        """
+        def _refresh(_name, obj):
+            if isinstance(obj, h5py.Dataset):
+                obj.refresh()
+        self.visititems(_refresh)
+        if self.root_type:
+            self.read()
+
     def show_keys(self, obj, indent=0):
         try:  # print attributes of dataset or group
             print("    " * indent + "ATTRS: " + str(list(obj.attrs.items())))
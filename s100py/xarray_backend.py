@@ -0,0 +1,183 @@
+""" An xarray backend for S102, S104 and S111 files.
+
+The grids are exposed as lazily loaded variables (depth/uncertainty, waterLevelHeight/waterLevelTrend,
+surfaceCurrentSpeed/surfaceCurrentDirection) with coordinates made from the grid origin and spacing (or the
+Positioning nodes of Data Coding Format 3) and a time coordinate made from the timePoint of each Group_NNN.
+Only the parts of the HDF5 datasets that are indexed get read and the HDF5 chunking is used as the preferred dask chunking,
+so opening with chunks={} gives dask arrays aligned with the file.
+
+>>> import xarray
+>>> from s100py.xarray_backend import S1xxBackendEntrypoint
+>>> ds = xarray.open_dataset("S111_file.h5", engine=S1xxBackendEntrypoint, chunks={})
+>>> ds.surfaceCurrentSpeed.sel(time="2021-01-01T06:00").mean()
+
+The feature instance (i.e. SurfaceCurrent.02) can be selected with the instance argument, 0 is the first one.
+To use engine="s1xx" instead of the class, register the class under the "xarray.backends" entry point group,
+e.g. s1xx = s100py.xarray_backend:S1xxBackendEntrypoint
+"""
+
+import os
+import datetime
+
+import numpy
+import h5py
+from xarray import Dataset, Variable, decode_cf
+from xarray.backends import BackendArray, BackendEntrypoint
+from xarray.backends.file_manager import CachingFileManager
+from xarray.backends.locks import HDF5_LOCK
+from xarray.core import indexing
+
+from .s1xx import LazyGridField
+
+# top level group of each product -> (module, file class name, feature container property, horizontal dimension names)
+PRODUCTS = {
+    "BathymetryCoverage": ("s100py.s102.api", "S102File", "bathymetry_coverage", ("y", "x")),
+    "WaterLevel": ("s100py.s104.api", "S104File", "water_level", ("lat", "lon")),
+    "SurfaceCurrent": ("s100py.s111.api", "S111File", "surface_current", ("lat", "lon")),
+}
+
+
+def _detect_product(filename):
+    with h5py.File(filename, "r") as h5_file:
+        for top_level in PRODUCTS:
+            if top_level in h5_file:
+                return top_level
+    raise ValueError("{} doesn't contain any of {}".format(filename, list(PRODUCTS.keys())))
+
+
+def _parse_time(value):
+    """ Converts a timePoint (datetime or S100 style string like 20210101T060000Z) to numpy.datetime64 """
+    if value is None:
+        return numpy.datetime64("NaT", "ns")
+    if isinstance(value, bytes):
+        value = value.decode()
+    if isinstance(value, str):
+        text = value.strip().rstrip("Z")
+        for fmt in ("%Y%m%dT%H%M%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y%m%d"):
+            try:
+                value = datetime.datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                pass
+        else:
+            value = datetime.datetime.fromisoformat(text)
+    if getattr(value, "tzinfo", None) is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return numpy.datetime64(value, "ns")
+
+
+def _as_attr(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, numpy.ndarray) and value.dtype.kind == "O":
+        return [_as_attr(v) for v in value]
+    return value
+
+
+class S1xxBackendArray(BackendArray):
+    """ One field of the values datasets of a feature instance, optionally stacked over the Group_NNN (time) datasets """
+
+    def __init__(self, file_manager, paths, field, shape, dtype, stacked):
+        self.file_manager = file_manager
+        self.paths = paths
+        self.field = field
+        self.shape = shape
+        self.dtype = dtype
+        self.stacked = stacked
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self._getitem)
+
+    def _getitem(self, key):
+        with HDF5_LOCK:
+            h5_file = self.file_manager.acquire()
+            if not self.stacked:
+                return LazyGridField(h5_file[self.paths[0]], self.field)[key]
+            time_key, grid_key = key[0], key[1:]
+            if isinstance(time_key, (int, numpy.integer)):
+                return LazyGridField(h5_file[self.paths[time_key]], self.field)[grid_key]
+            data = [LazyGridField(h5_file[path], self.field)[grid_key] for path in self.paths[time_key]]
+        if data:
+            return numpy.stack(data)
+        # no times selected, find the shape the grid_key would make without reading anything
+        return numpy.empty((0,) + numpy.broadcast_to(numpy.empty((), self.dtype), self.shape[1:])[grid_key].shape, self.dtype)
+
+
+class S1xxBackendEntrypoint(BackendEntrypoint):
+    """ Opens S102, S104 and S111 files with xarray.open_dataset(path, engine=S1xxBackendEntrypoint) """
+    open_dataset_parameters = ("filename_or_obj", "drop_variables", "mask_and_scale", "instance")
+    description = "Open IHO S-102, S-104 and S-111 HDF5 files in xarray"
+
+    def guess_can_open(self, filename_or_obj):
+        try:
+            filename = os.fspath(filename_or_obj)
+        except TypeError:
+            return False
+        if os.path.splitext(filename)[1].lower() not in (".h5", ".hdf5", ".he5"):
+            return False
+        try:
+            _detect_product(filename)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def open_dataset(self, filename_or_obj, *, drop_variables=None, mask_and_scale=True, instance: int = 0):
+        filename = os.fspath(filename_or_obj)
+        module_name, class_name, container_name, grid_dims = PRODUCTS[_detect_product(filename)]
+        file_class = getattr(__import__(module_name, fromlist=[class_name]), class_name)
+
+        s1xx_file = file_class(filename, "r", lazy_grids=True)  # only the dataset names and shapes are needed
+        try:
+            container = getattr(s1xx_file.root, container_name)
+            feature_instance = getattr(container, container_name)[instance]
+            grids = feature_instance.get_grids()
+            times = feature_instance.get_time_points()
+            positions = feature_instance.get_node_positions()
+            first = grids[0]
+            fill_values = first.get_fill_values()
+            fills = dict(zip(first.get_write_order(), fill_values)) if fill_values is not None else {}
+            fields = [key for key, val in first._attributes.items() if isinstance(val, LazyGridField)]
+            field_info = {}
+            for field in fields:
+                lazy = first._attributes[field]
+                field_info[field] = ([grid._attributes[field].dataset.name for grid in grids], lazy.shape, lazy.dtype, lazy.dataset.chunks)
+            if positions is None:
+                grid_origin = (feature_instance.grid_origin_latitude, feature_instance.grid_origin_longitude)
+                grid_spacing = (feature_instance.grid_spacing_latitudinal, feature_instance.grid_spacing_longitudinal)
+            attrs = {key: _as_attr(val) for key, val in s1xx_file.attrs.items()}
+        finally:
+            s1xx_file.close()
+
+        stacked = any(t is not None for t in times)
+        coords = {}
+        if positions is None:
+            shape = next(iter(field_info.values()))[1]
+            for dim, origin, spacing, size in zip(grid_dims, grid_origin, grid_spacing, shape):
+                coords[dim] = Variable((dim,), origin + spacing * numpy.arange(size))
+        else:
+            grid_dims = ("node",)
+            coords["lon"] = Variable(grid_dims, positions[0])
+            coords["lat"] = Variable(grid_dims, positions[1])
+        dims = (("time",) if stacked else ()) + tuple(grid_dims)
+        if stacked:
+            coords["time"] = Variable(("time",), numpy.array([_parse_time(t) for t in times]))
+
+        file_manager = CachingFileManager(h5py.File, filename, mode="r")
+        variables = {}
+        for field, (paths, shape, dtype, chunks) in field_info.items():
+            if drop_variables and field in drop_variables:
+                continue
+            backend_array = S1xxBackendArray(file_manager, paths, field, ((len(paths),) if stacked else ()) + tuple(shape), dtype, stacked)
+            encoding = {}
+            if chunks is not None:
+                chunks = ((1,) if stacked else ()) + tuple(chunks)
+                encoding["chunks"] = chunks
+                encoding["preferred_chunks"] = dict(zip(dims, chunks))
+            var_attrs = {"_FillValue": numpy.array(fills[field], dtype=dtype)} if field in fills else {}
+            variables[field] = Variable(dims, indexing.LazilyIndexedArray(backend_array), var_attrs, encoding)
+
+        # decode_cf lazily masks the fill values (to NaN) the same way it is done for netCDF
+        dataset = decode_cf(Dataset(variables, coords=coords, attrs=attrs), mask_and_scale=mask_and_scale, decode_times=False)
+        dataset.set_close(file_manager.close)
+        return dataset
+
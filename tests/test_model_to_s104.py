@@ -0,0 +1,52 @@
+import h5py
+import netCDF4
+import numpy
+
+from s100py.s104 import model_to_s104
+
+NUM_TIMES = 4
+ETA, XI = 6, 8
+
+
+def make_roms_file(directory):
+    """ Writes a small ROMS-like model output with the cbofs naming the converter parses """
+    path = directory / 'nos.cbofs.fields.f001.20200101.t06z.nc'
+    with netCDF4.Dataset(path, 'w') as nc_file:
+        nc_file.createDimension('ocean_time', None)
+        nc_file.createDimension('eta_rho', ETA)
+        nc_file.createDimension('xi_rho', XI)
+        time = nc_file.createVariable('ocean_time', 'f8', ('ocean_time',))
+        time.units = 'seconds since 2020-01-01 06:00:00'
+        time[:] = numpy.arange(NUM_TIMES) * 3600.0
+        longitude, latitude = numpy.meshgrid(numpy.linspace(-77, -76, XI), numpy.linspace(37, 38, ETA))
+        nc_file.createVariable('lon_rho', 'f8', ('eta_rho', 'xi_rho'))[:] = longitude
+        nc_file.createVariable('lat_rho', 'f8', ('eta_rho', 'xi_rho'))[:] = latitude
+        mask = numpy.ones((ETA, XI))
+        mask[0, 0] = 0
+        nc_file.createVariable('mask_rho', 'f8', ('eta_rho', 'xi_rho'))[:] = mask
+        zeta = nc_file.createVariable('zeta', 'f4', ('ocean_time', 'eta_rho', 'xi_rho'), fill_value=1e37)
+        for time_index in range(NUM_TIMES):
+            zeta[time_index] = 0.5 * time_index + 0.01 * numpy.arange(ETA * XI).reshape(ETA, XI)
+    return path
+
+
+def test_convert_dcf3(tmp_path):
+    model_path = make_roms_file(tmp_path)
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+
+    paths = model_to_s104.CLI().convert(str(model_path), str(output_dir), 3)
+
+    assert len(paths) == 1
+    assert paths[0].endswith('104USA1_20200101T06Z_CBOFS_DCF3.h5')
+    with h5py.File(paths[0], 'r') as h5_file:
+        instance = h5_file['WaterLevel/WaterLevel.01']
+        assert instance.attrs['numGRP'] == NUM_TIMES
+        assert instance.attrs['dateTimeOfFirstRecord'] == '20200101T060000Z'
+        assert instance.attrs['dateTimeOfLastRecord'] == '20200101T090000Z'
+        # the masked out node is dropped
+        assert instance['Positioning/geometryValues'].shape == (ETA * XI - 1,)
+        for time_index in range(NUM_TIMES):
+            values = instance[f'Group_{time_index + 1:03d}/values']
+            expected = 0.5 * time_index + 0.01 * numpy.arange(1, ETA * XI)
+            numpy.testing.assert_allclose(values['waterLevelHeight'], expected, atol=1e-5)